@@ -0,0 +1,172 @@
+import argparse
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhppgen.c_generator import C_Generator, AVAILABLE_API_NUMBERS, LOADERS
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+# Compares oglhpp_find_proc, a perfect hash lookup, with a linear strcmp search over the same
+# command names, without any GL context. The driver loads the generated commands with a stub
+# getProcAddress, then looks up every command name --repeat times, and as many names that are not
+# commands, and prints the average time per lookup of each.
+
+khrplatform_include_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests",
+                                       "test-dynamicLoading", "include", "KHR")
+
+driver_prologue = """
+#define _POSIX_C_SOURCE 199309L
+
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+
+static void stub_command(void) {
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    (void)name;
+    return stub_command;
+}
+
+static double now(void) {
+    struct timespec time;
+    clock_gettime(CLOCK_MONOTONIC, &time);
+
+    return time.tv_sec + time.tv_nsec * 1e-9;
+}
+
+"""
+
+driver_epilogue = """
+static int find_linear(const char *name) {
+    unsigned int i;
+
+    for (i = 0; i < NAME_COUNT; i++) {
+        if (strcmp(names[i], name) == 0) {
+            return (int)i;
+        }
+    }
+
+    return -1;
+}
+
+static double time_lookups(const char *const *lookup_names, int linear, unsigned long *found) {
+    double start = now();
+    int repeat;
+    unsigned int i;
+
+    for (repeat = 0; repeat < REPEAT; repeat++) {
+        for (i = 0; i < NAME_COUNT; i++) {
+            if (linear ? find_linear(lookup_names[i]) >= 0 : oglhpp_find_proc(lookup_names[i]) != NULL) {
+                (*found)++;
+            }
+        }
+    }
+
+    return (now() - start) / ((double)REPEAT * NAME_COUNT);
+}
+
+int main(void) {
+    unsigned long found = 0;
+    double hash_hit;
+    double hash_miss;
+    double linear_hit;
+    double linear_miss;
+
+    oglhpp_load_functions(stub_get_proc_address);
+
+    hash_hit = time_lookups(names, 0, &found);
+    hash_miss = time_lookups(missing_names, 0, &found);
+    linear_hit = time_lookups(names, 1, &found);
+    linear_miss = time_lookups(missing_names, 1, &found);
+
+    if (found != 2ul * REPEAT * NAME_COUNT) {
+        fprintf(stderr, "found %lu names, expected %lu\\n", found, 2ul * REPEAT * NAME_COUNT);
+        return 1;
+    }
+
+    printf("%.3f %.3f %.3f %.3f\\n", hash_hit * 1e9, hash_miss * 1e9, linear_hit * 1e9, linear_miss * 1e9);
+
+    return 0;
+}
+"""
+
+
+def collect_command_names(registry, api, number):
+    numbers = AVAILABLE_API_NUMBERS[api]
+    numbers = numbers[:numbers.index(number) + 1]
+
+    command_names = []
+    for feature in registry.feature_list:
+        if feature.api != api or feature.number not in numbers:
+            continue
+
+        for require in feature.require_list:
+            for command_ref in require.command_list:
+                if command_ref.name not in command_names:
+                    command_names.append(command_ref.name)
+
+    return command_names
+
+
+def generate_driver(command_names, repeat):
+    chunks = [f'#define REPEAT {repeat}\n', f'#define NAME_COUNT {len(command_names)}\n', driver_prologue]
+
+    chunks.append('static const char *const names[NAME_COUNT] = {\n')
+    chunks.extend([f'    "{command_name}",\n' for command_name in command_names])
+    chunks.append('};\n\n')
+
+    # names differing from a command by their last character only, the worst case of strcmp
+    chunks.append('static const char *const missing_names[NAME_COUNT] = {\n')
+    chunks.extend([f'    "{command_name}_",\n' for command_name in command_names])
+    chunks.append('};\n')
+
+    chunks.append(driver_epilogue)
+
+    return ''.join(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='oglhpp_find_proc against a linear strcmp search, with a stub getProcAddress')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--api', default='gl')
+    parser.add_argument('--number', default='4.6')
+    parser.add_argument('--loader', choices=[loader for loader in LOADERS if loader != 'context'], default='eager')
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--cc', default=os.environ.get('CC', 'cc'))
+    args = parser.parse_args()
+
+    registry = StreamingRegistryFactory().create_registry(args.gl_xml)
+    command_names = collect_command_names(registry, args.api, args.number)
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        C_Generator(registry=registry, loader=args.loader).write_files(api=args.api, number=args.number, output_dir=build_dir)
+        shutil.copytree(khrplatform_include_dir, os.path.join(build_dir, 'include', 'KHR'))
+
+        driver_path = os.path.join(build_dir, 'src', 'driver.c')
+        with open(driver_path, 'w') as file:
+            file.write(generate_driver(command_names, args.repeat))
+
+        executable_path = os.path.join(build_dir, 'driver')
+        include_dir = os.path.join(build_dir, 'include')
+        subprocess.check_call([args.cc, '-O2', '-std=c99', '-w', '-I', include_dir, os.path.join(build_dir, 'src', 'gl.c'),
+                               driver_path, '-o', executable_path])
+
+        hash_hit, hash_miss, linear_hit, linear_miss = [float(value) for value in
+                                                        subprocess.check_output([executable_path]).decode().split()]
+
+    print(f'{args.api} {args.number}, {args.loader} loader: {len(command_names)} commands')
+    print(f'  perfect hash: {hash_hit:.1f} ns per found name, {hash_miss:.1f} ns per missing name')
+    print(f'  linear strcmp: {linear_hit:.1f} ns per found name, {linear_miss:.1f} ns per missing name')
+
+
+if __name__ == '__main__':
+    main()
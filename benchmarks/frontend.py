@@ -0,0 +1,93 @@
+import argparse
+import os.path
+import resource
+import subprocess
+import sys
+import time
+import xml.dom.minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhpp.glregistry import SinglePassGLXMLParser
+from oglhpp.hppgenerator import CodeGenerator
+from oglhppgen.c_generator import C_Generator
+from oglhppgen.frontend import RegistryFrontend
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+# Compares building both models with one parse each against a single RegistryFrontend pass.
+
+def load_separately(gl_xml_file_path):
+    registry = StreamingRegistryFactory().create_registry(gl_xml_file_path)
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+
+    return registry, repository
+
+
+def load_unified(gl_xml_file_path):
+    return RegistryFrontend().parse(gl_xml_file_path)
+
+
+loaders = {
+    'separate': load_separately,
+    'unified': load_unified,
+}
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, Linux reports kilobytes
+    if sys.platform == 'darwin':
+        peak = peak // 1024
+
+    return peak
+
+
+def generate_both(models, api, number):
+    registry, repository = models
+
+    outputs = C_Generator(registry=registry).generate(api=api, number=number)
+    outputs['hpp'] = CodeGenerator(repository, api=api).generate_consolidated_require(repository.consolidate(api, number))
+
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='one parse per model versus a single shared parse')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--api', default='gl')
+    parser.add_argument('--number', default='4.6')
+    parser.add_argument('--run-loader', choices=list(loaders), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_loader is not None:
+        start = time.perf_counter()
+        loaders[args.run_loader](args.gl_xml)
+        print(f'{time.perf_counter() - start:.6f} {peak_rss_kb()}')
+        return
+
+    expected = generate_both(load_separately(args.gl_xml), args.api, args.number)
+    actual = generate_both(load_unified(args.gl_xml), args.api, args.number)
+    if expected != actual:
+        raise Exception(f'generated output for {args.api} {args.number} differs between both front ends')
+
+    print(f'generated output for {args.api} {args.number} is identical for both front ends')
+
+    for loader_name in loaders:
+        times = []
+        peaks = []
+
+        for i in range(args.repeat):
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), '--gl-xml', args.gl_xml, '--run-loader', loader_name])
+            elapsed, peak = output.decode().split()
+            times.append(float(elapsed))
+            peaks.append(int(peak))
+
+        print(f'{loader_name:>9}: best wall time {min(times) * 1000:.1f} ms, peak RSS {max(peaks) / 1024:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
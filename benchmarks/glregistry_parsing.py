@@ -0,0 +1,95 @@
+import argparse
+import os.path
+import sys
+import time
+import xml.dom.minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhpp.glregistry import GLXMLParser, SinglePassGLXMLParser
+
+
+# Micro-benchmark of the per command cost of building a Repository from an already parsed DOM.
+
+parsers = {
+    'recursive': GLXMLParser,
+    'single-pass': SinglePassGLXMLParser,
+}
+
+
+def model_fields(value):
+    fields = dict(getattr(value, '__dict__', {}))
+
+    for cls in type(value).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            fields[slot] = getattr(value, slot)
+
+    return fields
+
+
+def check_same_model(expected, actual, path):
+    if isinstance(expected, (list, tuple)):
+        if len(expected) != len(actual):
+            raise Exception(f'{path}: {len(expected)} != {len(actual)} items')
+
+        for i in range(len(expected)):
+            check_same_model(expected[i], actual[i], f'{path}[{i}]')
+
+    elif hasattr(expected, '__dict__') or hasattr(type(expected), '__slots__'):
+        expected_fields = model_fields(expected)
+        actual_fields = model_fields(actual)
+
+        for name in expected_fields:
+            check_same_model(expected_fields[name], actual_fields[name], f'{path}.{name}')
+
+    elif expected != actual:
+        raise Exception(f'{path}: {expected} != {actual}')
+
+
+def best_time(repeat, function):
+    best = None
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GLXMLParser per command parse cost')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tree = xml.dom.minidom.parse(args.gl_xml)
+    command_els = []
+    for commands_el in tree.documentElement.getElementsByTagName("commands"):
+        command_els.extend(commands_el.getElementsByTagName("command"))
+
+    repositories = {}
+    for parser_name in parsers:
+        gl_parser = parsers[parser_name]()
+
+        command_time, commands = best_time(args.repeat, lambda: [gl_parser.create_command("GL", el) for el in command_els])
+        total_time, repository = best_time(args.repeat, lambda: gl_parser.create_repository(tree))
+        repositories[parser_name] = repository
+
+        per_command = command_time / len(commands)
+        print(f'{parser_name:>12}: {per_command * 1e6:.2f} us per command ({len(commands)} commands), '
+              f'{total_time * 1000:.1f} ms for the whole repository')
+
+    expected = repositories['recursive']
+    actual = repositories['single-pass']
+    for name in ['features', 'commands', 'enumscollections']:
+        check_same_model(getattr(expected, name), getattr(actual, name), name)
+
+    print('both parsers build the same repository')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhppgen.c_generator import C_Generator, LOADERS
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+# Measures the cost of the instrumentation shims without any GL context. The generated loader is
+# compiled together with a driver whose getProcAddress returns a stub doing nothing, once as is,
+# once with OGLHPP_INSTRUMENT, and once with OGLHPP_INSTRUMENT and hooks set. The driver calls a
+# command --calls times in a loop, checks the call count the instrumentation reports and prints
+# the time per call. The statistics of the last run are dumped to stderr.
+
+khrplatform_include_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests",
+                                       "test-dynamicLoading", "include", "KHR")
+
+driver_source = """
+#define _POSIX_C_SOURCE 199309L
+
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <time.h>
+
+static void stub_command(void) {
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    (void)name;
+    return stub_command;
+}
+
+#if defined(OGLHPP_INSTRUMENT)
+static unsigned long hook_calls;
+
+static void count_hook(unsigned int command) {
+    (void)command;
+    hook_calls++;
+}
+#endif
+
+static double now(void) {
+    struct timespec time;
+    clock_gettime(CLOCK_MONOTONIC, &time);
+
+    return time.tv_sec + time.tv_nsec * 1e-9;
+}
+
+int main(void) {
+    double start;
+    double seconds;
+    long i;
+
+    oglhpp_load_functions(stub_get_proc_address);
+
+#if defined(OGLHPP_INSTRUMENT) && defined(HOOKS)
+    oglhpp_set_instrument_hooks(count_hook, count_hook);
+#endif
+
+    start = now();
+    for (i = 0; i < CALLS; i++) {
+        COMMAND;
+    }
+    seconds = now() - start;
+
+#if defined(OGLHPP_INSTRUMENT)
+    {
+        unsigned int command;
+
+        for (command = 0; command < OGLHPP_COMMAND_COUNT; command++) {
+            if (oglhpp_call_count(command) != 0 && oglhpp_call_count(command) != CALLS) {
+                fprintf(stderr, "unexpected call count %lu for %s\\n", (unsigned long)oglhpp_call_count(command),
+                        oglhpp_command_name(command));
+                return 1;
+            }
+        }
+
+        oglhpp_stats_dump();
+    }
+#endif
+
+    printf("%.3f\\n", seconds * 1e9 / CALLS);
+
+    return 0;
+}
+"""
+
+variants = [
+    ('plain', []),
+    ('instrumented', ['-DOGLHPP_INSTRUMENT']),
+    ('hooked', ['-DOGLHPP_INSTRUMENT', '-DHOOKS']),
+]
+
+
+def run_loader(registry, loader, api, number, command, calls, cc, build_dir):
+    loader_dir = os.path.join(build_dir, loader)
+
+    C_Generator(registry=registry, loader=loader).write_files(api=api, number=number, output_dir=loader_dir)
+    shutil.copytree(khrplatform_include_dir, os.path.join(loader_dir, 'include', 'KHR'))
+
+    driver_path = os.path.join(loader_dir, 'src', 'driver.c')
+    with open(driver_path, 'w') as file:
+        file.write(driver_source)
+
+    include_dir = os.path.join(loader_dir, 'include')
+    nanoseconds_by_variant = {}
+    for variant, defines in variants:
+        executable_path = os.path.join(loader_dir, f'driver-{variant}')
+        subprocess.check_call([cc, '-O2', '-std=c99', '-w', f'-DCALLS={calls}', f'-DCOMMAND={command}', *defines,
+                               '-I', include_dir, os.path.join(loader_dir, 'src', 'gl.c'), driver_path,
+                               '-o', executable_path])
+
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output([executable_path], stderr=None if variant == 'hooked' else devnull)
+
+        nanoseconds_by_variant[variant] = float(output.decode())
+
+    return nanoseconds_by_variant
+
+
+def main():
+    parser = argparse.ArgumentParser(description='cost of the instrumentation shims, with a stub getProcAddress')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--api', default='gl')
+    parser.add_argument('--number', default='4.6')
+    parser.add_argument('--command', default='glClear(0)', help='command call the driver repeats')
+    parser.add_argument('--calls', type=int, default=10000000)
+    parser.add_argument('--cc', default=os.environ.get('CC', 'cc'))
+    args = parser.parse_args()
+
+    registry = StreamingRegistryFactory().create_registry(args.gl_xml)
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        for loader in LOADERS:
+            nanoseconds_by_variant = run_loader(registry, loader, args.api, args.number, args.command, args.calls,
+                                                args.cc, build_dir)
+
+            print(f'{loader:>7}: ' + ', '.join([f'{variant} {nanoseconds:.2f} ns/call'
+                                                for variant, nanoseconds in nanoseconds_by_variant.items()]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhppgen.c_generator import C_Generator, AVAILABLE_API_NUMBERS, LOADERS
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+# Compares the object size and the startup cost of every loader mode without any GL context. The
+# generated loader is compiled together with a driver whose getProcAddress is a stub that hashes
+# the name it is given, counts the lookup and returns a function that does nothing. The driver then
+# calls the first --used commands of the target once, as an application would after loading.
+#
+# Calling the stub through the typed command pointers does not match its signature, which works on
+# the usual C ABIs as long as the results are ignored.
+
+khrplatform_include_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests",
+                                       "test-dynamicLoading", "include", "KHR")
+
+driver_prologue = """
+#define _POSIX_C_SOURCE 199309L
+
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <time.h>
+
+static unsigned long lookups;
+static unsigned int checksum;
+
+static void stub_command(void) {
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    unsigned int hash = 2166136261u;
+
+    for (; *name != 0; name++) {
+        hash = (hash ^ (unsigned char)*name) * 16777619u;
+    }
+
+    checksum += hash;
+    lookups++;
+
+    return stub_command;
+}
+
+static double now(void) {
+    struct timespec time;
+    clock_gettime(CLOCK_MONOTONIC, &time);
+
+    return time.tv_sec + time.tv_nsec * 1e-9;
+}
+
+static void call_used_commands(void) {
+"""
+
+driver_epilogue = """}
+
+int main(void) {
+    double load_seconds = 0.0;
+    double first_call_seconds = 0.0;
+    int i;
+
+    for (i = 0; i < REPEAT; i++) {
+        double start = now();
+        oglhpp_load_functions(stub_get_proc_address);
+        double loaded = now();
+        call_used_commands();
+        double called = now();
+
+        load_seconds += loaded - start;
+        first_call_seconds += called - loaded;
+    }
+
+    printf("%lu %.9f %.9f %u\\n", lookups / REPEAT, load_seconds / REPEAT, first_call_seconds / REPEAT, checksum);
+
+    return 0;
+}
+"""
+
+
+def collect_command_names(registry, api, number):
+    numbers = AVAILABLE_API_NUMBERS[api]
+    numbers = numbers[:numbers.index(number) + 1]
+
+    command_names = []
+    for feature in registry.feature_list:
+        if feature.api != api or feature.number not in numbers:
+            continue
+
+        for require in feature.require_list:
+            for command_ref in require.command_list:
+                if command_ref.name not in command_names:
+                    command_names.append(command_ref.name)
+
+    return command_names
+
+
+def generate_driver(registry, command_names, repeat):
+    command_by_name = {command.name: command for command in registry.command_list}
+
+    chunks = [f'#define REPEAT {repeat}\n', driver_prologue]
+    for command_name in command_names:
+        args_str = ', '.join(['0'] * len(command_by_name[command_name].params))
+        chunks.append(f'    {command_name}({args_str});\n')
+    chunks.append(driver_epilogue)
+
+    return ''.join(chunks)
+
+
+def run_loader(registry, loader, api, number, used_command_names, repeat, cc, build_dir):
+    loader_dir = os.path.join(build_dir, loader)
+
+    C_Generator(registry=registry, loader=loader).write_files(api=api, number=number, output_dir=loader_dir)
+    shutil.copytree(khrplatform_include_dir, os.path.join(loader_dir, 'include', 'KHR'))
+
+    driver_path = os.path.join(loader_dir, 'src', 'driver.c')
+    with open(driver_path, 'w') as file:
+        file.write(generate_driver(registry, used_command_names, repeat))
+
+    include_dir = os.path.join(loader_dir, 'include')
+    object_path = os.path.join(loader_dir, 'gl.o')
+    subprocess.check_call([cc, '-O2', '-std=c99', '-w', '-I', include_dir, '-c',
+                           os.path.join(loader_dir, 'src', 'gl.c'), '-o', object_path])
+
+    executable_path = os.path.join(loader_dir, 'driver')
+    subprocess.check_call([cc, '-O2', '-std=c99', '-w', '-I', include_dir, object_path, driver_path,
+                           '-o', executable_path])
+
+    lookups, load_seconds, first_call_seconds, checksum = subprocess.check_output([executable_path]).decode().split()
+
+    return os.path.getsize(object_path), int(lookups), float(load_seconds), float(first_call_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='loader size and startup benchmark, with a stub getProcAddress')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--api', default='gl')
+    parser.add_argument('--number', default='4.6')
+    parser.add_argument('--used', type=int, default=60, help='number of commands called after loading')
+    parser.add_argument('--repeat', type=int, default=1000)
+    parser.add_argument('--cc', default=os.environ.get('CC', 'cc'))
+    args = parser.parse_args()
+
+    registry = StreamingRegistryFactory().create_registry(args.gl_xml)
+    command_names = collect_command_names(registry, args.api, args.number)
+    used_command_names = command_names[:args.used]
+
+    print(f'{args.api} {args.number}: {len(command_names)} commands, {len(used_command_names)} used')
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        for loader in LOADERS:
+            object_size, lookups, load_seconds, first_call_seconds = run_loader(
+                registry, loader, args.api, args.number, used_command_names, args.repeat, args.cc, build_dir)
+
+            print(f'{loader:>6}: gl.o {object_size / 1024:.1f} KB, {lookups} lookups, load {load_seconds * 1e6:.2f} us, '
+                  f'first calls {first_call_seconds * 1e6:.2f} us, total {(load_seconds + first_call_seconds) * 1e6:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import gc
+import os.path
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhppgen.frontend import RegistryFrontend
+
+
+# tracemalloc report of the memory kept alive by the Registry and Repository models, built with
+# and without the compact mode (interned strings, shared type part and group tuples). Each mode
+# is measured in its own interpreter, so the interned strings of one run do not leak into the other.
+
+def model_fields(value):
+    fields = dict(getattr(value, '__dict__', {}))
+
+    for cls in type(value).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(value, slot):
+                fields[slot] = getattr(value, slot)
+
+    return fields
+
+
+def count_model_instances(roots):
+    counts = {}
+    samples = {}
+    seen = set()
+    pending = list(roots)
+
+    while len(pending) > 0:
+        value = pending.pop()
+
+        if id(value) in seen or isinstance(value, (str, int, float, bool)) or value is None:
+            continue
+
+        seen.add(id(value))
+
+        if isinstance(value, (list, tuple, set)):
+            pending.extend(value)
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        else:
+            cls = type(value)
+            counts[cls] = counts.get(cls, 0) + 1
+            samples[cls] = value
+            pending.extend(model_fields(value).values())
+
+    return counts, samples
+
+
+def dict_backed_size(value):
+    # size of an instance holding the same attributes in a per-instance __dict__
+    plain = type('Plain', (), {})()
+    plain.__dict__.update(model_fields(value))
+
+    return sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+
+
+def measure(gl_xml_file_path, compact):
+    gc.collect()
+    tracemalloc.start()
+
+    models = RegistryFrontend(compact=compact).parse(gl_xml_file_path)
+
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{current} {peak}')
+
+    if compact:
+        counts, samples = count_model_instances(models)
+
+        for cls in sorted(counts, key=lambda cls: -counts[cls]):
+            if '__slots__' not in cls.__dict__:
+                continue
+
+            slotted = sys.getsizeof(samples[cls])
+            print(f'# {cls.__module__}.{cls.__name__} {counts[cls]} {slotted} {dict_backed_size(samples[cls])}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='registry model memory footprint')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--run-mode', choices=['plain', 'compact'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode is not None:
+        measure(args.gl_xml, args.run_mode == 'compact')
+        return
+
+    results = {}
+    for mode in ['plain', 'compact']:
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--gl-xml', args.gl_xml, '--run-mode', mode]).decode()
+        results[mode] = output.splitlines()
+
+        current, peak = results[mode][0].split()
+        print(f'{mode:>8}: {int(current) / (1 << 20):.2f} MB kept by the models, {int(peak) / (1 << 20):.2f} MB peak while parsing')
+
+    print()
+    print('per instance size of the slotted model classes, against the same attributes in a __dict__:')
+    for line in results['compact'][1:]:
+        name, count, slotted, dict_backed = line[2:].split()
+        saved = int(count) * (int(dict_backed) - int(slotted))
+        print(f'    {name:<40} {count:>7} instances, {slotted:>4} bytes instead of {dict_backed:>4} ({saved / 1024:.0f} KB saved)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os.path
+import resource
+import subprocess
+import sys
+import time
+import xml.dom.minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhppgen.model import RegistryFactory
+from oglhppgen.streaming import StreamingRegistryFactory
+from oglhppgen.c_generator import C_Generator
+
+
+# Compares the minidom based RegistryFactory against the iterparse based StreamingRegistryFactory.
+# Each loader runs in its own interpreter, so the reported peak RSS is not polluted by the other one.
+
+def load_minidom(gl_xml_file_path):
+    document = xml.dom.minidom.parse(gl_xml_file_path)
+    return RegistryFactory().create_registry(document.childNodes[0])
+
+
+def load_streaming(gl_xml_file_path):
+    return StreamingRegistryFactory().create_registry(gl_xml_file_path)
+
+
+loaders = {
+    'minidom': load_minidom,
+    'streaming': load_streaming,
+}
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, Linux reports kilobytes
+    if sys.platform == 'darwin':
+        peak = peak // 1024
+
+    return peak
+
+
+def run_loader(loader_name, gl_xml_file_path):
+    start = time.perf_counter()
+    loaders[loader_name](gl_xml_file_path)
+    elapsed = time.perf_counter() - start
+
+    print(f'{elapsed:.6f} {peak_rss_kb()}')
+
+
+def check_identical_output(gl_xml_file_path, api, number):
+    expected = C_Generator(registry=load_minidom(gl_xml_file_path)).generate(api=api, number=number)
+    actual = C_Generator(registry=load_streaming(gl_xml_file_path)).generate(api=api, number=number)
+
+    if expected != actual:
+        raise Exception(f'generated output for {api} {number} differs between the minidom and the streaming loader')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='registry loading benchmark (wall time and peak RSS)')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--api', default='gl')
+    parser.add_argument('--number', default='4.6')
+    parser.add_argument('--run-loader', choices=list(loaders), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_loader is not None:
+        run_loader(args.run_loader, args.gl_xml)
+        return
+
+    check_identical_output(args.gl_xml, args.api, args.number)
+    print(f'generated output for {args.api} {args.number} is identical for both loaders')
+
+    for loader_name in loaders:
+        times = []
+        peaks = []
+
+        for i in range(args.repeat):
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), '--gl-xml', args.gl_xml, '--run-loader', loader_name])
+            elapsed, peak = output.decode().split()
+            times.append(float(elapsed))
+            peaks.append(int(peak))
+
+        print(f'{loader_name:>10}: best wall time {min(times) * 1000:.1f} ms, peak RSS {max(peaks) / 1024:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
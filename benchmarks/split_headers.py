@@ -0,0 +1,76 @@
+import argparse
+import os
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from oglhppgen.c_generator import C_Generator
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+# Compiles the same sample translation unit against the single gl.h, and against the header of
+# the version it needs in the split layout, with the local C compiler. Reports the size of the
+# preprocessed translation unit and the best compile time of each.
+
+khrplatform_include_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests",
+                                       "test-dynamicLoading", "include", "KHR")
+
+sample_source = """#include <oglhpp/{header}>
+
+void clear_frame(void) {{
+    glClearColor(0.2f, 0.4f, 0.8f, 1.0f);
+    glClear(GL_COLOR_BUFFER_BIT);
+}}
+"""
+
+
+def compile_sample(cc, include_dir, header, build_dir, repeat):
+    source_path = os.path.join(build_dir, f'sample-{header}.c')
+    with open(source_path, 'w') as file:
+        file.write(sample_source.format(header=header))
+
+    preprocessed = subprocess.check_output([cc, '-std=c99', '-E', '-I', include_dir, source_path])
+
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([cc, '-std=c99', '-O2', '-I', include_dir, '-c', source_path, '-o', os.devnull])
+        times.append(time.perf_counter() - start)
+
+    return len(preprocessed), min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='compile time of a sample translation unit against the single and split headers')
+    parser.add_argument('--gl-xml', default='OpenGL-Registry/xml/gl.xml')
+    parser.add_argument('--api', default='gl')
+    parser.add_argument('--number', default='4.6')
+    parser.add_argument('--include-number', default='1.0', help='version of the split header the sample includes')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--cc', default=os.environ.get('CC', 'cc'))
+    args = parser.parse_args()
+
+    registry = StreamingRegistryFactory().create_registry(args.gl_xml)
+    split_header = f'{args.api}_{args.include_number.replace(".", "_")}.h'
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        for layout, header in [('single', 'gl.h'), ('split', split_header)]:
+            layout_dir = os.path.join(build_dir, layout)
+            C_Generator(registry=registry, layout=layout).write_files(api=args.api, number=args.number, output_dir=layout_dir)
+
+            include_dir = os.path.join(layout_dir, 'include')
+            shutil.copytree(khrplatform_include_dir, os.path.join(include_dir, 'KHR'))
+
+            preprocessed_size, seconds = compile_sample(args.cc, include_dir, header, build_dir, args.repeat)
+
+            print(f'{layout:>6}: {header:>10}, preprocessed {preprocessed_size / 1024:.1f} KB, '
+                  f'best compile time {seconds * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,121 @@
-
-import xml.dom.minidom
-import sys
-import glregistry
-import hppgenerator
+import argparse
 import os
+import sys
+
+from oglhpp import glregistry
+from oglhpp import hppgenerator
+from oglhppgen.registry_cache import RegistryCache, hash_file
+from oglhppgen.generation_cache import GenerationCache
+from oglhppgen.output import OutputWriter, generator_sources, write_depfile
+from oglhppgen.usage import UsageScanner
 
 def generate_hpp_header_filename(api, version):
     return api + version.replace(".", "") + ".hpp"
 
-def generate_hpp_header(gl_xml_file_path, api, version, output_folder):
+def generate_code(repository, api, version, used_names=None, state_cache=False):
+    consolidated_require = repository.consolidate(api, version)
+
+    # keep only what the scanned sources use
+    if used_names is not None:
+        consolidated_require = glregistry.Require(enums=consolidated_require.enums & used_names,
+                                                  commands=consolidated_require.commands & used_names)
+
+    return hppgenerator.CodeGenerator(repository, state_cache, api).generate_consolidated_require(consolidated_require)
+
+# repository_loader, when given, returns the repository instead of the registry cache, like the one
+# main2.py --hpp-output parses along with the registry of the C loader.
+def generate_hpp_header(gl_xml_file_path, api, version, output_folder, cache_dir, used_names=None, state_cache=False,
+                        repository_loader=None):
     print("generating header file, with api '" + api + "' and version '" + version + "'")
 
-    # Open XML document using minidom parser
-    DOMTree = xml.dom.minidom.parse(gl_xml_file_path)
-    parser = glregistry.GLXMLParser()
-    repository = parser.create_repository(DOMTree)
-    generator = hppgenerator.CodeGenerator(repository)
-    consolidated_require = repository.consolidate(api, version)
-    generated_code = generator.generate_consolidated_require(consolidated_require)
+    # Parse the XML document, or reuse the repository cached from a previous run. Only needed when
+    # the header is missing from the generation cache.
+    repositories = []
+
+    def load_repository():
+        if len(repositories) == 0:
+            if repository_loader is not None:
+                repositories.append(repository_loader())
+            else:
+                repositories.append(RegistryCache(cache_dir).load_repository(gl_xml_file_path))
+
+        return repositories[0]
+
+    # Reuse the header generated by a previous run from the same gl.xml, if any
+    generation_cache = GenerationCache(os.path.join(cache_dir, "generated"))
+    registry_hash = hash_file(gl_xml_file_path)
+    options = {"state_cache": state_cache}
+    if used_names is not None:
+        options["used_names"] = sorted(used_names)
+    key = generation_cache.key(registry_hash, "hpp", hppgenerator.GENERATOR_VERSION, (api, version), options)
+    outputs = generation_cache.lookup(key)
+
+    if outputs is not None:
+        generated_code = outputs["hpp"]
+    else:
+        generated_code = generate_code(load_repository(), api, version, used_names, state_cache)
+        generation_cache.store(key, {"hpp": generated_code})
+
+    print(f"Generation cache: {generation_cache.hits} hits, {generation_cache.misses} misses")
 
     output_filename = os.path.join(output_folder, generate_hpp_header_filename(api, version))
 
-    file = open(output_filename, "w")
-    file.write(generated_code)
-    file.close()
+    # the header is only rewritten when its contents change
+    writer = OutputWriter()
+    writer.write(output_filename, generated_code)
+
+    if used_names is not None:
+        report_trimmed_header(repositories[0] if len(repositories) > 0 else None, generation_cache, registry_hash, api, version,
+                              state_cache, output_filename, generated_code)
+
+    return output_filename
+
+# Compares the size of a header trimmed to the used names with the untrimmed one, taken from the
+# generation cache, or generated again when the repository is already loaded, never parsed for it.
+def report_trimmed_header(repository, generation_cache, registry_hash, api, version, state_cache, output_filename, generated_code):
+    key = generation_cache.key(registry_hash, "hpp", hppgenerator.GENERATOR_VERSION, (api, version), {"state_cache": state_cache})
+    full_outputs = generation_cache.lookup(key)
+
+    if full_outputs is not None:
+        full_size = len(full_outputs["hpp"].encode())
+    elif repository is not None:
+        full_size = len(generate_code(repository, api, version, state_cache=state_cache).encode())
+    else:
+        print(f"Skipped the size report of {output_filename}, its untrimmed header is not cached")
+        return
+
+    trimmed_size = len(generated_code.encode())
+    print(f"Trimmed {output_filename} from {full_size} to {trimmed_size} bytes ({100.0 * (1.0 - trimmed_size / full_size):.1f}% smaller)")
 
 
 def main():
-    generate_hpp_header("OpenGL-Registry/xml/gl.xml", "gl", "3.3", "tests/test-gl10")
+    parser = argparse.ArgumentParser(description="generates the OpenGL C++ wrapper header")
+    parser.add_argument("--gl-xml", default="OpenGL-Registry/xml/gl.xml")
+    parser.add_argument("--api", default="gl")
+    parser.add_argument("--number", default="3.3")
+    parser.add_argument("--output", default="tests/test-gl10")
+    parser.add_argument("--usage", action="append", default=[],
+                        help="only generate the commands and enums used by the sources under this directory, may be repeated")
+    parser.add_argument("--depfile", default=None, help="write a Make/Ninja depfile for the generated header")
+    parser.add_argument("--state-cache", action="store_true",
+                        help="skip binding and enable calls that set the state it already has, see oglhpp/statecache.py")
+    args = parser.parse_args()
+
+    cache_dir = os.environ.get("OGLHPP_CACHE_DIR", ".oglhpp-cache")
+
+    usage_scanner = UsageScanner(os.path.join(cache_dir, "usage"))
+    used_names = None
+    if len(args.usage) > 0:
+        used_names = usage_scanner.scan(args.usage, exclude_dirs=[args.output])
+        print(f"Found {len(used_names)} names in {len(usage_scanner.source_paths)} files "
+              f"({usage_scanner.misses} scanned, {usage_scanner.hits} cached)")
+
+    output_filename = generate_hpp_header(args.gl_xml, args.api, args.number, args.output, cache_dir, used_names,
+                                          args.state_cache)
+
+    if args.depfile is not None:
+        write_depfile(args.depfile, [output_filename], [args.gl_xml, os.path.abspath(sys.argv[0])] + generator_sources() +
+                      usage_scanner.source_paths)
     
 if __name__ == "__main__":
     main()
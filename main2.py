@@ -1,27 +1,211 @@
+import argparse
+import os
 import os.path
-import xml.dom.minidom
+import sys
+import time
 
-from oglhppgen.model import RegistryFactory
-from oglhppgen.c_generator import C_Generator
+from oglhppgen.registry_cache import RegistryCache, hash_file
+from oglhppgen.generation_cache import GenerationCache
+from oglhppgen.c_generator import C_Generator, GENERATOR_VERSION, LOADERS, PROFILES, LAYOUTS
+from oglhppgen.batch import BatchGenerator, all_targets, target_path, target_options
+from oglhppgen.output import OutputWriter, generator_sources, write_depfile
+from oglhppgen.usage import UsageScanner
 
-if __name__ == "__main__":
-    parent_path = "tests/test-dynamicLoading"
-    gl_xml_file_path = "OpenGL-Registry/xml/gl.xml"
-    # Open XML document using minidom parser
-    document = xml.dom.minidom.parse(gl_xml_file_path)
-
-    root_node = document.childNodes[0]
-    registry_factory = RegistryFactory()
-    registry = registry_factory.create_registry(root_node)
+from main import generate_hpp_header
 
-    generator = C_Generator(registry=registry)
-    lib_source_dict = generator.generate(api="gl", number="3.3")
 
+def write_outputs(lib_source_dict, output_dir, writer):
     for filename_suffix in lib_source_dict:
         print(f"Generating {filename_suffix}")
+        writer.write(os.path.join(output_dir, filename_suffix), lib_source_dict[filename_suffix])
+
+
+def target_name(api, number, profile=None):
+    return f"{api} {number}" if profile is None else f"{api} {number} {profile}"
+
+
+def generate_target(load_registry, generation_cache, registry_hash, generator_options, api, number, output_dir):
+    writer = OutputWriter()
+    key = generation_cache.key(registry_hash, "c", GENERATOR_VERSION, (api, number), generator_options)
+    lib_source_dict = generation_cache.lookup(key)
+
+    if lib_source_dict is not None:
+        write_outputs(lib_source_dict, output_dir, writer)
+    else:
+        generator = C_Generator(registry=load_registry(), **generator_options)
+
+        # the outputs are streamed to their files and to the generation cache at once
+        with generation_cache.open_entry(key) as cache_entry:
+            generator.write_files(api=api, number=number, output_dir=output_dir, writer=writer, cache_entry=cache_entry)
+
+        for path in writer.changed_paths:
+            print(f"Generated {path}")
+
+    for path in writer.unchanged_paths:
+        print(f"Unchanged {path}")
+
+    return writer.paths()
+
+
+def generate_batch(load_registry, generation_cache, registry_hash, generator_options, output_dir, jobs):
+    start = time.perf_counter()
+
+    paths = []
+    missing_targets = []
+    for api, number, profile in all_targets():
+        key = generation_cache.key(registry_hash, "c", GENERATOR_VERSION, (api, number),
+                                   target_options(generator_options, profile))
+        lib_source_dict = generation_cache.lookup(key)
+
+        if lib_source_dict is None:
+            missing_targets.append((api, number, profile))
+            continue
+
+        writer = OutputWriter()
+        for filename_suffix in lib_source_dict:
+            writer.write(os.path.join(target_path(output_dir, api, number, profile), filename_suffix),
+                         lib_source_dict[filename_suffix])
+
+        print(f"Reused {target_name(api, number, profile)} from the generation cache "
+              f"({len(writer.changed_paths)} files changed)")
+        paths += writer.paths()
+
+    results = []
+    if len(missing_targets) > 0:
+        batch_generator = BatchGenerator(registry=load_registry(), max_workers=jobs,
+                                         generation_cache=generation_cache, registry_hash=registry_hash,
+                                         generator_options=generator_options)
+        results = batch_generator.generate(output_dir, targets=missing_targets)
+
+    for result in results:
+        print(f"Generated {target_name(result.api, result.number, result.profile)} into {result.output_path} "
+              f"in {result.seconds * 1000:.1f} ms ({len(result.changed_paths)} files changed)")
+        paths += result.changed_paths + result.unchanged_paths
+
+    print(f"Generated {len(results)} targets in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    return paths
+
+
+def is_header(filename_suffix):
+    return filename_suffix.startswith("include/") and filename_suffix.endswith(".h")
 
-        code = lib_source_dict[filename_suffix]
-        filename = os.path.join("tests/test-dynamicLoading", filename_suffix)
-        text_file = open(filename, "w")
-        text_file.write(code)
-        text_file.close()
+
+# Compares the size of the headers written for a target, among paths, with the one of its
+# untrimmed headers. Those are read from the generation cache, or generated when the registry had
+# to be loaded anyway. The report is skipped otherwise, rather than parsing the registry for it.
+def report_trimmed_headers(registry, generation_cache, registry_hash, generator_options, api, number, output_dir, paths,
+                           profile=None):
+    full_generator_options = {name: value for name, value in target_options(generator_options, profile).items()
+                              if name != "used_names"}
+    key = generation_cache.key(registry_hash, "c", GENERATOR_VERSION, (api, number), full_generator_options)
+    full_outputs = generation_cache.lookup(key)
+
+    if full_outputs is not None:
+        full_size = sum([len(text.encode()) for filename_suffix, text in full_outputs.items() if is_header(filename_suffix)])
+    elif registry is not None:
+        chunks_by_suffix = C_Generator(registry=registry, **full_generator_options).generate_chunks(api, number)
+        full_size = sum([len(chunk.encode()) for filename_suffix, chunks in chunks_by_suffix.items() if is_header(filename_suffix)
+                         for chunk in chunks])
+    else:
+        print(f"Skipped the size report of {target_name(api, number, profile)}, its untrimmed headers are not cached")
+        return
+
+    trimmed_size = 0
+    for path in paths:
+        filename_suffix = os.path.relpath(path, output_dir).replace(os.sep, "/")
+
+        if not filename_suffix.startswith("..") and is_header(filename_suffix):
+            trimmed_size += os.path.getsize(path)
+
+    print(f"Trimmed the headers of {target_name(api, number, profile)} from {full_size} to {trimmed_size} bytes "
+          f"({100.0 * (1.0 - trimmed_size / full_size):.1f}% smaller)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="generates the OpenGL C loader")
+    parser.add_argument("--gl-xml", default="OpenGL-Registry/xml/gl.xml")
+    parser.add_argument("--api", default="gl")
+    parser.add_argument("--number", default="3.3")
+    parser.add_argument("--output", default="tests/test-dynamicLoading")
+    parser.add_argument("--batch", action="store_true", help="generate every api, version and profile, one directory each")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for --batch")
+    parser.add_argument("--loader", choices=LOADERS, default="eager",
+                        help="resolve every entry point when loading, or each one on its first call")
+    parser.add_argument("--profile", choices=PROFILES, default="compatibility",
+                        help="leave out what the core profile removes with 'core', --batch generates both")
+    parser.add_argument("--layout", choices=LAYOUTS, default="single",
+                        help="one gl.h, or one header per version with 'split'")
+    parser.add_argument("--extension", action="append", default=[],
+                        help="also generate the extensions matching this pattern, e.g. 'GL_ARB_*', may be repeated")
+    parser.add_argument("--usage", action="append", default=[],
+                        help="only generate the commands and enums used by the sources under this directory, may be repeated")
+    parser.add_argument("--command-buffer", action="store_true",
+                        help="also generate command_buffer.h, to record commands on any thread and replay them later")
+    parser.add_argument("--hpp-output", default=None,
+                        help="also generate the C++ wrapper header of --api and --number into this directory, "
+                             "from the same parse of gl.xml")
+    parser.add_argument("--depfile", default=None, help="write a Make/Ninja depfile for the generated files")
+    args = parser.parse_args()
+
+    cache_dir = os.environ.get("OGLHPP_CACHE_DIR", ".oglhpp-cache")
+    generation_cache = GenerationCache(os.path.join(cache_dir, "generated"))
+    registry_hash = hash_file(args.gl_xml)
+    generator_options = {"loader": args.loader, "extensions": args.extension, "profile": args.profile,
+                         "layout": args.layout, "command_buffer": args.command_buffer}
+
+    usage_scanner = UsageScanner(os.path.join(cache_dir, "usage"))
+    used_names = None
+    if len(args.usage) > 0:
+        # the generated files would use every name otherwise
+        exclude_dirs = [args.output] if args.hpp_output is None else [args.output, args.hpp_output]
+        used_names = usage_scanner.scan(args.usage, exclude_dirs=exclude_dirs)
+        generator_options["used_names"] = sorted(used_names)
+
+        print(f"Found {len(used_names)} names in {len(usage_scanner.source_paths)} files "
+              f"({usage_scanner.misses} scanned, {usage_scanner.hits} cached)")
+
+    # Parse the XML document in a single streaming pass, or reuse the registry cached from a previous
+    # run. Only needed when some output is missing from the generation cache. With --hpp-output, the
+    # same pass builds the repository of the C++ header as well.
+    models = []
+
+    def load_models():
+        if len(models) == 0:
+            registry_cache = RegistryCache(cache_dir)
+
+            if args.hpp_output is not None:
+                models.append(registry_cache.load_models(args.gl_xml))
+            else:
+                models.append((registry_cache.load_registry(args.gl_xml), None))
+
+        return models[0]
+
+    def load_registry():
+        return load_models()[0]
+
+    if args.batch:
+        paths = generate_batch(load_registry, generation_cache, registry_hash, generator_options, args.output, args.jobs)
+    else:
+        paths = generate_target(load_registry, generation_cache, registry_hash, generator_options, args.api, args.number, args.output)
+
+    print(f"Generation cache: {generation_cache.hits} hits, {generation_cache.misses} misses")
+
+    if args.hpp_output is not None:
+        paths.append(generate_hpp_header(args.gl_xml, args.api, args.number, args.hpp_output, cache_dir,
+                                         used_names, repository_loader=lambda: load_models()[1]))
+
+    if len(args.usage) > 0:
+        targets = all_targets() if args.batch else [(args.api, args.number, None)]
+        for api, number, profile in targets:
+            output_dir = target_path(args.output, api, number, profile) if args.batch else args.output
+            report_trimmed_headers(models[0][0] if len(models) > 0 else None, generation_cache, registry_hash,
+                                   generator_options, api, number, output_dir, paths, profile)
+
+    if args.depfile is not None:
+        write_depfile(args.depfile, paths, [args.gl_xml, os.path.abspath(sys.argv[0])] + generator_sources() +
+                      usage_scanner.source_paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import array
+
+
+# Vendor suffixes of the extensions shared by several implementations, preferred over the
+# suffixes of single vendors when an enum has several names for the same value.
+MULTI_VENDOR_SUFFIXES = ("ARB", "KHR", "OES", "EXT")
+
+# An enum of a group has the same value as others when it is an alias, like GL_FRAMEBUFFER_OES is
+# of GL_FRAMEBUFFER, and the C++ enum class only needs one of them. The index keeps one row per
+# enum and group, with the value parsed once, in columns, so that the enums of every group are
+# deduplicated by a single sort of the rows instead of a loop over every group.
+#
+# Among the names of a value, the one without vendor suffix is kept, then one with a multi vendor
+# suffix, then the first one declared. Values that do not parse as integers are never merged.
+
+class EnumIndex:
+    def __init__(self, repository) -> None:
+        vendors = set(MULTI_VENDOR_SUFFIXES)
+        for enum_collection in repository.enumscollections:
+            if enum_collection.vendor:
+                vendors.add(enum_collection.vendor)
+
+        self.enums = []
+        self.group_names = []
+        self.api_names = [""]
+
+        group_ids = {}
+        api_ids = {"": 0}
+
+        # one row per enum and group, enums in declaration order
+        self.enum_column = array.array("l")
+        self.group_column = array.array("l")
+        self.value_column = array.array("q")
+        self.parsed_column = array.array("b")
+        self.vendor_column = array.array("b")
+        self.api_column = array.array("l")
+
+        for enum_collection in repository.enumscollections:
+            for enum in enum_collection.enums:
+                enum_id = len(self.enums)
+                self.enums.append(enum)
+
+                value, parsed = self.__parse_value(enum.value, enum_id)
+                vendor_rank = self.__vendor_rank(enum.name, vendors)
+
+                if enum.api not in api_ids:
+                    api_ids[enum.api] = len(self.api_names)
+                    self.api_names.append(enum.api)
+
+                for group in enum.groups:
+                    if group not in group_ids:
+                        group_ids[group] = len(self.group_names)
+                        self.group_names.append(group)
+
+                    self.enum_column.append(enum_id)
+                    self.group_column.append(group_ids[group])
+                    self.value_column.append(value)
+                    self.parsed_column.append(parsed)
+                    self.vendor_column.append(vendor_rank)
+                    self.api_column.append(api_ids[enum.api])
+
+        self.__api_ids = api_ids
+        self.__group_to_enums_dicts = {}
+
+    def group_to_enums_dict(self, api=None):
+        if api not in self.__group_to_enums_dicts:
+            self.__group_to_enums_dicts[api] = self.__deduplicate(api)
+
+        return self.__group_to_enums_dicts[api]
+
+    def group_enums(self, group, api=None):
+        return self.group_to_enums_dict(api).get(group, [])
+
+    def __deduplicate(self, api):
+        # rows of the definitions of other apis are left out
+        api_id = self.__api_ids.get(api, -1)
+        api_column = self.api_column
+        rows = [row for row in range(len(api_column)) if api is None or api_column[row] == 0 or api_column[row] == api_id]
+
+        group_column = self.group_column
+        value_column = self.value_column
+        parsed_column = self.parsed_column
+        vendor_column = self.vendor_column
+        enum_column = self.enum_column
+
+        # equal values of a group end up next to each other, the preferred name first
+        rows.sort(key=lambda row: (group_column[row], parsed_column[row], value_column[row], vendor_column[row], enum_column[row]))
+
+        kept_rows = []
+        previous_key = None
+        for row in rows:
+            key = (group_column[row], parsed_column[row], value_column[row])
+
+            if key != previous_key:
+                kept_rows.append(row)
+                previous_key = key
+
+        # back to declaration order within every group
+        kept_rows.sort(key=lambda row: (group_column[row], enum_column[row]))
+
+        group_to_enums_dict = {}
+        for row in kept_rows:
+            group_name = self.group_names[group_column[row]]
+
+            if group_name not in group_to_enums_dict:
+                group_to_enums_dict[group_name] = []
+
+            group_to_enums_dict[group_name].append(self.enums[enum_column[row]])
+
+        return group_to_enums_dict
+
+    def __parse_value(self, value, enum_id):
+        try:
+            parsed_value = int(value, 0)
+        except ValueError:
+            parsed_value = None
+
+        if parsed_value is None or not -2 ** 63 <= parsed_value < 2 ** 63:
+            # a value of its own, never equal to another
+            return enum_id, 0
+
+        return parsed_value, 1
+
+    def __vendor_rank(self, name, vendors):
+        suffix = name.rsplit("_", 1)[-1]
+
+        if suffix not in vendors:
+            return 0
+
+        if suffix in MULTI_VENDOR_SUFFIXES:
+            return 1
+
+        return 2
@@ -1,9 +1,18 @@
 
+import bisect
 import xml.dom.minidom
 from xml.dom.minidom import Node
 
+from oglhpp.util import Interner
+
+
+# Version of the Repository model built by the parsers below, part of the registry cache key.
+PARSER_VERSION = 4
+
 
 class Parameter:
+    __slots__ = ("name", "type", "class_", "len", "group", "type_parts")
+
     def __init__(self, name, type, class_, len, group, type_parts):
         self.name = name
         self.type = type
@@ -47,6 +56,8 @@ class Parameter:
 
 
 class EnumCollection:
+    __slots__ = ("namespace", "enums", "group", "type", "vendor")
+
     def __init__(self, namespace, enums, group, type, vendor) -> None:
         self.namespace = namespace
         self.enums = enums
@@ -55,10 +66,14 @@ class EnumCollection:
         self.vendor = vendor
 
 class Enum:
-    def __init__(self, name, value, groups) -> None:
+    __slots__ = ("name", "value", "groups", "api")
+
+    def __init__(self, name, value, groups, api="") -> None:
         self.name = name
         self.value = value
         self.groups = groups
+        # api the definition is restricted to, empty when it applies to all of them
+        self.api = api
 
     def __repr__(self) -> str:
         return "Enum(name={}, value={})".format(self.name, self.value)
@@ -67,6 +82,8 @@ class Enum:
         return "Enum(name={}, value={}, groups={})".format(self.name, self.value, self.groups)
 
 class Command:
+    __slots__ = ("name", "return_type", "params", "namespace", "group")
+
     def __init__(self, name, return_type, params, namespace, group):
         self.name = name
         self.return_type = return_type
@@ -88,6 +105,8 @@ class Command:
         return tmpl.format(self.name, self.return_type, self.params, self.namespace, self.group)
 
 class Require:
+    __slots__ = ("enums", "commands")
+
     def __init__(self, enums, commands) -> None:
         self.enums = enums
         self.commands = commands
@@ -96,6 +115,8 @@ class Require:
         return "Require(enums={}, commands={})".format(self.enums, self.commands)
         
 class Remove:
+    __slots__ = ("profile", "enums", "commands")
+
     def __init__(self, profile) -> None:
         self.profile = profile
         self.enums = []
@@ -103,6 +124,8 @@ class Remove:
 
 
 class Feature:
+    __slots__ = ("api", "name", "number", "require_list", "remove_list")
+
     def __init__(self, api, name, number, require_list, remove_list) -> None:
         self.api = api
         self.name = name
@@ -136,6 +159,8 @@ class Repository:
             
             self.features_per_api[api].append(feature)
 
+        self.availability = AvailabilityIndex(self.features)
+
     def __create_group_to_enums_dict(self, enumscollections):
         group_to_enums_dict = {}
 
@@ -173,46 +198,152 @@ class Repository:
         
         return classdict
 
-    def consolidate(self, api, number):
-        features = self.features_per_api[api]
+    def consolidate(self, api, number, profile=None):
+        return self.availability.consolidate(api, number, profile)
 
-        consolidated_require = Require(set(), set())
 
-        # append first all feature contents
-        for feature in features:
-            if feature.number > number:
-                continue
-            
-            for require in feature.require_list:
-                for command in require.commands:
-                    consolidated_require.commands.add(command)
+def parse_version(number):
+    return tuple([int(part) for part in number.split(".")])
 
-                for enum in require.enums:
-                    consolidated_require.enums.add(enum)
-        
-        
-        # remove all deprecated commands and enumerations
+
+# Availability of every command and enumeration across the features of the registry. Each name
+# gets an integer id, and every feature stores the names it requires and removes as bitmasks,
+# accumulated in version order, so selecting an (api, version, profile) is a bisection plus an
+# AND-NOT of two integers.
+#
+# Removals apply when their profile matches the requested one. With profile=None every removal
+# applies, which is what Repository.consolidate has always done.
+
+class AvailabilityIndex:
+    def __init__(self, features) -> None:
+        self.command_ids = {}
+        self.command_names = []
+        self.enum_ids = {}
+        self.enum_names = []
+
+        self.features_per_api = {}
         for feature in features:
-            if feature.number > number:
-                continue
-            
-            for remove in feature.remove_list:
-                for command in remove.commands:
-                    consolidated_require.commands.remove(command)
+            if feature.api not in self.features_per_api:
+                self.features_per_api[feature.api] = []
+
+            self.features_per_api[feature.api].append(feature)
+
+        for api_features in self.features_per_api.values():
+            api_features.sort(key=lambda feature: parse_version(feature.number))
+
+        self.versions_per_api = {}
+        self.require_masks_per_api = {}
+        for api, api_features in self.features_per_api.items():
+            self.versions_per_api[api] = [parse_version(feature.number) for feature in api_features]
+            self.require_masks_per_api[api] = self.__accumulate(feature.require_list for feature in api_features)
+
+        self.remove_masks = {}
+
+    def __id(self, ids, names, name):
+        bit = ids.get(name)
+
+        if bit is None:
+            bit = len(names)
+            ids[name] = bit
+            names.append(name)
+
+        return bit
+
+    def __mask(self, lists):
+        command_mask = 0
+        enum_mask = 0
+
+        for list_ in lists:
+            for command in list_.commands:
+                command_mask |= 1 << self.__id(self.command_ids, self.command_names, command)
+
+            for enum in list_.enums:
+                enum_mask |= 1 << self.__id(self.enum_ids, self.enum_names, enum)
+
+        return command_mask, enum_mask
+
+    def __accumulate(self, lists_per_feature):
+        accumulated = []
+        command_mask = 0
+        enum_mask = 0
+
+        for lists in lists_per_feature:
+            feature_command_mask, feature_enum_mask = self.__mask(lists)
+            command_mask |= feature_command_mask
+            enum_mask |= feature_enum_mask
+            accumulated.append((command_mask, enum_mask))
+
+        return accumulated
+
+    def __remove_masks(self, api, profile):
+        key = (api, profile)
+
+        if key not in self.remove_masks:
+            self.remove_masks[key] = self.__accumulate(
+                [remove for remove in feature.remove_list if profile is None or remove.profile in ("", profile)]
+                for feature in self.features_per_api[api])
+
+        return self.remove_masks[key]
+
+    def __feature_index(self, api, number):
+        if api not in self.versions_per_api:
+            raise Exception(f"api {api} not in {list(self.versions_per_api)}")
+
+        return bisect.bisect_right(self.versions_per_api[api], parse_version(number)) - 1
+
+    def select(self, api, number, profile=None):
+        index = self.__feature_index(api, number)
+
+        if index < 0:
+            return 0, 0
+
+        command_mask, enum_mask = self.require_masks_per_api[api][index]
+        removed_command_mask, removed_enum_mask = self.__remove_masks(api, profile)[index]
+
+        return command_mask & ~removed_command_mask, enum_mask & ~removed_enum_mask
+
+    def names(self, mask, names):
+        bits = bin(mask)[:1:-1]
+
+        return [names[bit] for bit in range(len(bits)) if bits[bit] == "1"]
+
+    def consolidate(self, api, number, profile=None):
+        command_mask, enum_mask = self.select(api, number, profile)
+
+        return Require(
+            enums=set(self.names(enum_mask, self.enum_names)),
+            commands=set(self.names(command_mask, self.command_names)))
+
+    def versions_exposing(self, name, api, profile=None):
+        versions = []
+
+        for index, feature in enumerate(self.features_per_api.get(api, [])):
+            command_mask, enum_mask = self.select(api, feature.number, profile)
+
+            if name in self.command_ids:
+                available = command_mask >> self.command_ids[name] & 1
+            else:
+                available = name in self.enum_ids and enum_mask >> self.enum_ids[name] & 1
+
+            if available:
+                versions.append(feature.number)
+
+        return versions
 
-                for enum in remove.enums:
-                    consolidated_require.enums.remove(enum)
-        
-        return consolidated_require
-                
 class GLXMLParser:
+    def __init__(self, compact=True) -> None:
+        self.interner = Interner(enabled=compact)
+
+    def attribute(self, element, name):
+        return self.interner.string(element.getAttribute(name))
+
     def create_repository(self, tree):
         registry_el = tree.documentElement
         features = self.parse_features(registry_el)
 
         commands = []
         for commands_list in registry_el.getElementsByTagName("commands"):
-            ns = commands_list.getAttribute("namespace")
+            ns = self.attribute(commands_list, "namespace")
 
             for command_el in commands_list.getElementsByTagName("command"):
                 commands.append(self.create_command(ns, command_el))
@@ -227,21 +358,21 @@ class GLXMLParser:
         return [self.create_feature(feature_el) for feature_el in features_el]
         
     def create_remove(self, remove_el):
-        remove = Remove(profile=remove_el.getAttribute("profile"))
+        remove = Remove(profile=self.attribute(remove_el, "profile"))
 
         for enum_el in remove_el.getElementsByTagName("enum"):
-            name = enum_el.getAttribute("name")
+            name = self.attribute(enum_el, "name")
             remove.enums.append(name)
 
         for command_el in remove_el.getElementsByTagName("command"):
-            name = command_el.getAttribute("name")
+            name = self.attribute(command_el, "name")
             remove.commands.append(name)
 
         return remove
 
     def create_require(self, require_el):
-        enums = [enum_el.getAttribute("name") for enum_el in require_el.getElementsByTagName("enum")]
-        commands = [command_el.getAttribute("name") for command_el in require_el.getElementsByTagName("command")]
+        enums = [self.attribute(enum_el, "name") for enum_el in require_el.getElementsByTagName("enum")]
+        commands = [self.attribute(command_el, "name") for command_el in require_el.getElementsByTagName("command")]
 
         return Require(enums=enums, commands=commands)
 
@@ -250,9 +381,9 @@ class GLXMLParser:
         remove_list = [self.create_remove(remove_el) for remove_el in feature_el.getElementsByTagName("remove")]
 
         feature = Feature(
-            api = feature_el.getAttribute("api"),
-            name = feature_el.getAttribute("name"),
-            number =  feature_el.getAttribute("number"),
+            api = self.attribute(feature_el, "api"),
+            name = self.attribute(feature_el, "name"),
+            number =  self.attribute(feature_el, "number"),
             require_list=require_list,
             remove_list=remove_list
         )
@@ -260,10 +391,10 @@ class GLXMLParser:
         return feature
 
     def create_enumcollection(self, enums_el):
-        ns = enums_el.getAttribute("namespace")
-        group = enums_el.getAttribute("group")
-        type = enums_el.getAttribute("type")
-        vendor = enums_el.getAttribute("vendor")
+        ns = self.attribute(enums_el, "namespace")
+        group = self.attribute(enums_el, "group")
+        type = self.attribute(enums_el, "type")
+        vendor = self.attribute(enums_el, "vendor")
         enums = [self.create_enum(enum_el) for enum_el in enums_el.getElementsByTagName("enum")]
         enum_collection = EnumCollection(namespace=ns, enums=enums, group=group, type=type, vendor=vendor)
 
@@ -271,9 +402,10 @@ class GLXMLParser:
 
     def create_enum(self, enum_el):
         return Enum(
-            name = enum_el.getAttribute("name"), 
-            value = enum_el.getAttribute("value"), 
-            groups = enum_el.getAttribute("group").split(","))
+            name = self.attribute(enum_el, "name"), 
+            value = self.attribute(enum_el, "value"), 
+            groups = self.interner.sequence(self.attribute(enum_el, "group").split(",")),
+            api = self.attribute(enum_el, "api"))
 
     def create_command(self, namespace, command_el):
         name = self.extract_command_name(command_el)
@@ -306,13 +438,13 @@ class GLXMLParser:
             if node.nodeType == Node.ELEMENT_NODE and node.tagName == "ptype":
                 parts.append(node.childNodes[0].data.strip())
 
-        return parts
+        return self.interner.sequence(parts)
 
     def extract_param_group(self, param_el):
-        return param_el.getAttribute("group")
+        return self.attribute(param_el, "group")
 
     def extract_param_name(self, param):
-        return param.getElementsByTagName("name")[0].childNodes[0].data
+        return self.interner.string(param.getElementsByTagName("name")[0].childNodes[0].data)
 
     def extract_param_type(self, param):
         param_type = None
@@ -325,19 +457,19 @@ class GLXMLParser:
                     param_type = node.data.strip()
                     break
         
-        return param_type
+        return self.interner.string(param_type)
 
     def extract_param_class(self, param):
         param_class = None
 
         if param.hasAttribute("class"):
-            param_class = param.getAttribute("class")
+            param_class = self.attribute(param, "class")
 
         return param_class
 
     def extract_param_len(self, param):
         if param.hasAttribute("len"):
-            return param.getAttribute("len")
+            return self.attribute(param, "len")
         
         return None
 
@@ -352,7 +484,293 @@ class GLXMLParser:
             if node.nodeType == Node.ELEMENT_NODE and node.tagName == "ptype":
                 parts.append(node.childNodes[0].data.strip())
 
-        return " ".join(parts)
+        return self.interner.string(" ".join(parts))
 
     def extract_command_name(self, command):
-        return command.getElementsByTagName("proto")[0].getElementsByTagName("name")[0].childNodes[0].data
+        return self.interner.string(command.getElementsByTagName("proto")[0].getElementsByTagName("name")[0].childNodes[0].data)
+
+
+# Builds the same Repository as GLXMLParser, visiting every node of the document exactly once.
+# Instead of querying each subtree with getElementsByTagName, a single walk dispatches on the
+# tag of every element it finds, and each handler consumes the children of its own element.
+
+class SinglePassGLXMLParser(GLXMLParser):
+    def create_repository(self, tree):
+        features = []
+        commands = []
+        enumscollections = []
+
+        self.walk(tree.documentElement, {
+            "feature": lambda feature_el: features.append(self.create_feature(feature_el)),
+            "commands": lambda commands_el: commands.extend(self.create_commands(commands_el)),
+            "enums": lambda enums_el: enumscollections.append(self.create_enumcollection(enums_el))
+        })
+
+        return Repository(features=features, commands=commands, enumscollections=enumscollections)
+
+    def walk(self, node, handlers):
+        for child in node.childNodes:
+            if child.nodeType != Node.ELEMENT_NODE:
+                continue
+
+            handler = handlers.get(child.tagName)
+
+            if handler is None:
+                self.walk(child, handlers)
+            else:
+                handler(child)
+
+    def parse_features(self, registry_el):
+        features = []
+        self.walk(registry_el, {"feature": lambda feature_el: features.append(self.create_feature(feature_el))})
+
+        return features
+
+    def create_commands(self, commands_el):
+        ns = self.attribute(commands_el, "namespace")
+        commands = []
+        self.walk(commands_el, {"command": lambda command_el: commands.append(self.create_command(ns, command_el))})
+
+        return commands
+
+    def create_remove(self, remove_el):
+        remove = Remove(profile=self.attribute(remove_el, "profile"))
+
+        self.walk(remove_el, {
+            "enum": lambda enum_el: remove.enums.append(self.attribute(enum_el, "name")),
+            "command": lambda command_el: remove.commands.append(self.attribute(command_el, "name"))
+        })
+
+        return remove
+
+    def create_require(self, require_el):
+        enums = []
+        commands = []
+
+        self.walk(require_el, {
+            "enum": lambda enum_el: enums.append(self.attribute(enum_el, "name")),
+            "command": lambda command_el: commands.append(self.attribute(command_el, "name"))
+        })
+
+        return Require(enums=enums, commands=commands)
+
+    def create_feature(self, feature_el):
+        require_list = []
+        remove_list = []
+
+        self.walk(feature_el, {
+            "require": lambda require_el: require_list.append(self.create_require(require_el)),
+            "remove": lambda remove_el: remove_list.append(self.create_remove(remove_el))
+        })
+
+        feature = Feature(
+            api = self.attribute(feature_el, "api"),
+            name = self.attribute(feature_el, "name"),
+            number =  self.attribute(feature_el, "number"),
+            require_list=require_list,
+            remove_list=remove_list
+        )
+
+        return feature
+
+    def create_enumcollection(self, enums_el):
+        enums = []
+        self.walk(enums_el, {"enum": lambda enum_el: enums.append(self.create_enum(enum_el))})
+
+        return EnumCollection(
+            namespace=self.attribute(enums_el, "namespace"),
+            enums=enums,
+            group=self.attribute(enums_el, "group"),
+            type=self.attribute(enums_el, "type"),
+            vendor=self.attribute(enums_el, "vendor"))
+
+    def create_command(self, namespace, command_el):
+        protos = []
+        params = []
+
+        self.walk(command_el, {
+            "proto": protos.append,
+            "param": lambda param_el: params.append(self.create_parameter(param_el))
+        })
+
+        name, return_type = self.parse_proto(protos[0])
+
+        return Command(name=name, return_type=return_type, params=params, namespace=namespace, group=None)
+
+    def parse_proto(self, proto_el):
+        name = None
+        parts = []
+
+        for node in proto_el.childNodes:
+            if node.nodeType == Node.TEXT_NODE:
+                parts.append(node.data.strip())
+
+            elif node.nodeType == Node.ELEMENT_NODE:
+                if node.tagName == "ptype":
+                    parts.append(node.childNodes[0].data.strip())
+                elif node.tagName == "name" and name is None:
+                    name = node.childNodes[0].data
+
+        return self.interner.string(name), self.interner.string(" ".join(parts))
+
+    def create_parameter(self, param_el):
+        # ptype and name are direct children of param in the registry schema
+        name = None
+        ptype = None
+        first_text = None
+        type_parts = []
+
+        for node in param_el.childNodes:
+            if node.nodeType == Node.TEXT_NODE:
+                text = node.data.strip()
+                type_parts.append(text)
+
+                if first_text is None:
+                    first_text = text
+
+            elif node.nodeType == Node.ELEMENT_NODE:
+                if node.tagName == "ptype":
+                    type_parts.append(node.childNodes[0].data.strip())
+
+                    if ptype is None:
+                        ptype = node.childNodes[0].data
+
+                elif node.tagName == "name" and name is None:
+                    name = node.childNodes[0].data
+
+        return Parameter(
+            self.interner.string(name),
+            self.interner.string(ptype if ptype is not None else first_text),
+            self.extract_param_class(param_el),
+            self.extract_param_len(param_el),
+            self.extract_param_group(param_el),
+            self.interner.sequence(type_parts)
+        )
+
+
+# Builds the same Repository as GLXMLParser from ElementTree elements, as they are handed over
+# by an oglhppgen.streaming.RegistryStream, so it can share a single pass over gl.xml with other
+# consumers of the same stream.
+
+class RepositoryBuilder:
+    def __init__(self, compact=True) -> None:
+        self.interner = Interner(enabled=compact)
+        self.features = []
+        self.commands = []
+        self.enumscollections = []
+        self.namespace = None
+        self.enums = None
+
+    def repository(self):
+        return Repository(features=self.features, commands=self.commands, enumscollections=self.enumscollections)
+
+    def start_section(self, element):
+        if element.tag == "commands":
+            self.namespace = self.attribute(element, "namespace", "")
+        elif element.tag == "enums":
+            self.enums = []
+
+    def end_item(self, section, element):
+        if section.tag == "commands" and element.tag == "command":
+            self.commands.append(self.create_command(self.namespace, element))
+        elif section.tag == "enums":
+            self.enums.extend([self.create_enum(enum_el) for enum_el in element.iter("enum")])
+
+    def end_section(self, element):
+        if element.tag == "feature":
+            self.features.append(self.create_feature(element))
+        elif element.tag == "enums":
+            self.enumscollections.append(EnumCollection(
+                namespace=self.attribute(element, "namespace", ""),
+                enums=self.enums,
+                group=self.attribute(element, "group", ""),
+                type=self.attribute(element, "type", ""),
+                vendor=self.attribute(element, "vendor", "")))
+            self.enums = None
+
+    def attribute(self, element, name, default=None):
+        return self.interner.string(element.get(name, default))
+
+    def text_nodes(self, element):
+        # the equivalent of the minidom text child nodes, in document order
+        if element.text is not None:
+            yield element.text
+
+        for child in element:
+            if child.tail is not None:
+                yield child.tail
+
+    def type_parts(self, element):
+        parts = []
+
+        if element.text is not None:
+            parts.append(element.text.strip())
+
+        for child in element:
+            if child.tag == "ptype":
+                parts.append(child.text.strip())
+
+            if child.tail is not None:
+                parts.append(child.tail.strip())
+
+        return parts
+
+    def create_feature(self, feature_el):
+        require_list = [self.create_require(require_el) for require_el in feature_el.iter("require")]
+        remove_list = [self.create_remove(remove_el) for remove_el in feature_el.iter("remove")]
+
+        return Feature(
+            api = self.attribute(feature_el, "api", ""),
+            name = self.attribute(feature_el, "name", ""),
+            number = self.attribute(feature_el, "number", ""),
+            require_list=require_list,
+            remove_list=remove_list
+        )
+
+    def create_require(self, require_el):
+        enums = [self.attribute(enum_el, "name", "") for enum_el in require_el.iter("enum")]
+        commands = [self.attribute(command_el, "name", "") for command_el in require_el.iter("command")]
+
+        return Require(enums=enums, commands=commands)
+
+    def create_remove(self, remove_el):
+        remove = Remove(profile=self.attribute(remove_el, "profile", ""))
+        remove.enums.extend([self.attribute(enum_el, "name", "") for enum_el in remove_el.iter("enum")])
+        remove.commands.extend([self.attribute(command_el, "name", "") for command_el in remove_el.iter("command")])
+
+        return remove
+
+    def create_enum(self, enum_el):
+        return Enum(
+            name = self.attribute(enum_el, "name", ""),
+            value = self.attribute(enum_el, "value", ""),
+            groups = self.interner.sequence(self.attribute(enum_el, "group", "").split(",")),
+            api = self.attribute(enum_el, "api", ""))
+
+    def create_command(self, namespace, command_el):
+        proto_el = command_el.find(".//proto")
+        name = self.interner.string(next(proto_el.iter("name")).text)
+        return_type = self.interner.string(" ".join(self.type_parts(proto_el)))
+        params = [self.create_parameter(param_el) for param_el in command_el.iter("param")]
+
+        return Command(name=name, return_type=return_type, params=params, namespace=namespace, group=None)
+
+    def create_parameter(self, param_el):
+        ptype_el = next(param_el.iter("ptype"), None)
+
+        param_type = None
+        if ptype_el is not None:
+            param_type = ptype_el.text
+        else:
+            for text in self.text_nodes(param_el):
+                param_type = text.strip()
+                break
+
+        return Parameter(
+            self.interner.string(next(param_el.iter("name")).text),
+            self.interner.string(param_type),
+            self.attribute(param_el, "class"),
+            self.attribute(param_el, "len"),
+            self.attribute(param_el, "group", ""),
+            self.interner.sequence(self.type_parts(param_el))
+        )
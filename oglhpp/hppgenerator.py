@@ -1,3 +1,11 @@
+from oglhpp.enumindex import EnumIndex
+from oglhpp.statecache import StateCacheGenerator
+from oglhpp.util import split_capitalized, camel_case
+
+
+# Version of the generated C++ code, part of the generation cache key.
+GENERATOR_VERSION = 4
+
 
 class Capitalizer:
     def __init__(self) -> None:
@@ -40,16 +48,31 @@ class EnumIdentifierConverter:
 
         return 'e' + ''.join(parts)
 
+    # identifier keeping the parts of the enum name, for entries whose short one collides
+    def convert_full_enum_entry(self, constant):
+        parts = constant.replace("GL_", "").split('_')
+
+        return 'e' + ''.join(map(lambda x: self.capitalizer.capitalize(x), parts))
+
 class CodeGenerator:
-    def __init__(self, repository):
+    def __init__(self, repository, state_cache=False, api=None):
         self.__repository = repository
+        # api whose enum definitions are generated, along with those of every api
+        self.__api = api
+        self.__enum_index = None
+        # skip the calls setting state to the value it already has, see oglhpp.statecache
+        self.__state_cache = state_cache
+        self.__state_cache_generator = None
 
     def generate_consolidated_require(self, require):
         repository = self.__repository
 
         # collect groups, from commands, for enumeration generation
+        # sorted, the header does not depend on the iteration order of the sets
+        command_names = sorted(require.commands)
+
         group_set = set()
-        for command_name in require.commands:
+        for command_name in command_names:
             command = repository.commanddict[command_name]
 
             for param in command.params:
@@ -58,14 +81,23 @@ class CodeGenerator:
 
                 group_set.add(param.group)
 
-        # generate enumeration types
+        # generate enumeration types, without the aliases of the same value
+        if self.__enum_index is None:
+            self.__enum_index = EnumIndex(repository)
+
         generated_enums = []
-        for group_name in group_set:
-            generated_enums.append(self.generate_cpp_enum(group_name, repository.group_to_enums_dict[group_name]))
+        for group_name in sorted(group_set):
+            generated_enums.append(self.generate_cpp_enum(group_name, self.__enum_index.group_enums(group_name, self.__api)))
         
+        # generate the state cache, before the commands using it
+        generated_state = ""
+        if self.__state_cache:
+            self.__state_cache_generator = StateCacheGenerator(repository, require.commands)
+            generated_state = self.__state_cache_generator.generate_state_namespace()
+
         # generate command code 
         generated_commands = []
-        for command_name in require.commands:
+        for command_name in command_names:
             generated_commands.append(self.generate_cpp_command(repository.commanddict[command_name]))
 
         return """#ifndef __gl_hpp__
@@ -76,10 +108,10 @@ class CodeGenerator:
 
 namespace gl {{
 {}
-{}
+{}{}
 }}
 #endif 
-""".format("\n".join(generated_enums), "\n".join(generated_commands))
+""".format("\n".join(generated_enums), generated_state, "\n".join(generated_commands))
 
     def generate_cpp_enum(self, cpp_enum_name, enums):
         base_type = ""
@@ -95,12 +127,26 @@ namespace gl {{
 
         converter = EnumIdentifierConverter(cpp_enum_name, enums)
 
-        entries = [self.generate_cpp_enum_entry(enum, converter) for enum in enums]
+        # entries whose identifier collides with a previous one get the full name, or are left out
+        entries = []
+        identifiers = set()
+        for enum in enums:
+            identifier = converter.convert_enum_entry(enum.name)
+
+            if identifier in identifiers:
+                identifier = converter.convert_full_enum_entry(enum.name)
+
+            if identifier in identifiers:
+                continue
+
+            identifiers.add(identifier)
+            entries.append(self.generate_cpp_enum_entry(enum, identifier))
+
         return tmpl.format(cpp_enum_name, base_type, ",\n    ".join(entries))
     
-    def generate_cpp_enum_entry(self, enum, converter):
+    def generate_cpp_enum_entry(self, enum, identifier):
         tmpl = "{} = {}"
-        return tmpl.format(converter.convert_enum_entry(enum.name), enum.value)
+        return tmpl.format(identifier, enum.value)
 
     def generate_cpp_command(self, command):
         return self.generate_method(command)
@@ -147,6 +193,9 @@ namespace gl {{
 }}"""
         param_invoke_list = [self.generate_method_body_param(param) for param in command.params]
 
+        if self.__state_cache_generator is not None and self.__state_cache_generator.is_state_command(command):
+            return self.__state_cache_generator.generate_method_body(command, param_invoke_list)
+
         return tmpl.format(command.name, ", ".join(param_invoke_list))
 
     def generate_method_body_param(self, param):
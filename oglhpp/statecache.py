@@ -0,0 +1,306 @@
+# Optional state cache of the C++ wrapper. The commands of STATE_COMMANDS set a piece of state,
+# selected by the value of their key parameter when they have one. The wrapper records the last
+# value set for every key, and skips the call when it sets the same value again. The slots of a
+# state are indexed by the values of the enum group of its key parameter, in the registry.
+#
+# A call with a key outside of that group is always forwarded, and forgets the whole state, as
+# the key may alias others, like GL_FRAMEBUFFER does GL_DRAW_FRAMEBUFFER and GL_READ_FRAMEBUFFER.
+# Exclusive states keep a single slot valid for the same reason. The cache starts empty, so the
+# first call for every key is forwarded.
+
+class StateCommand:
+    def __init__(self, command_name, state_name, key=None, value=None, constant=None, per_texture_unit=False,
+                 exclusive=False, forgets=None):
+        self.command_name = command_name
+        self.state_name = state_name
+        # parameter selecting the slot, None for a state with a single slot
+        self.key = key
+        # parameter holding the value, or constant value set by the command
+        self.value = value
+        self.constant = constant
+        # the state is repeated for every texture unit, selected by glActiveTexture
+        self.per_texture_unit = per_texture_unit
+        self.exclusive = exclusive
+        # states the command changes as a side effect, forgotten when it is forwarded
+        self.forgets = [] if forgets is None else forgets
+
+
+STATE_COMMANDS = [
+    StateCommand('glActiveTexture', 'activeTexture', value='texture'),
+    StateCommand('glBindTexture', 'bindTexture', key='target', value='texture', per_texture_unit=True),
+    StateCommand('glBindBuffer', 'bindBuffer', key='target', value='buffer'),
+    StateCommand('glBindFramebuffer', 'bindFramebuffer', key='target', value='framebuffer', exclusive=True),
+    StateCommand('glBindRenderbuffer', 'bindRenderbuffer', key='target', value='renderbuffer'),
+    # the element array buffer binding belongs to the vertex array
+    StateCommand('glBindVertexArray', 'bindVertexArray', value='array', forgets=['bindBuffer']),
+    StateCommand('glUseProgram', 'useProgram', value='program'),
+    StateCommand('glEnable', 'capability', key='cap', constant='true'),
+    StateCommand('glDisable', 'capability', key='cap', constant='false'),
+]
+
+# Commands changing tracked state in ways the cache does not follow, which forget it instead.
+# Deleting an object unbinds it, and its name may be reused by the next object created.
+STATE_FORGETTING_COMMANDS = {
+    'glDeleteTextures': ['bindTexture'],
+    'glBindTextures': ['bindTexture'],
+    'glBindTextureUnit': ['bindTexture'],
+    'glDeleteBuffers': ['bindBuffer'],
+    'glBindBufferBase': ['bindBuffer'],
+    'glBindBufferRange': ['bindBuffer'],
+    'glBindBuffersBase': ['bindBuffer'],
+    'glBindBuffersRange': ['bindBuffer'],
+    'glDeleteFramebuffers': ['bindFramebuffer'],
+    'glDeleteRenderbuffers': ['bindRenderbuffer'],
+    'glDeleteVertexArrays': ['bindVertexArray', 'bindBuffer'],
+    'glDeleteProgram': ['useProgram'],
+    'glEnablei': ['capability'],
+    'glDisablei': ['capability'],
+    'glPopAttrib': ['activeTexture', 'bindTexture', 'capability'],
+}
+
+TEXTURE0 = 0x84C0
+
+
+class StateCacheGenerator:
+    def __init__(self, repository, commands):
+        self.__repository = repository
+
+        # the state commands available among commands, whose key parameter has a known group
+        self.__state_command_dict = {}
+        self.__states = []
+        self.__state_dict = {}
+
+        for state_command in STATE_COMMANDS:
+            if state_command.command_name not in commands:
+                continue
+
+            command = repository.commanddict[state_command.command_name]
+            key_values = [None]
+
+            if state_command.key is not None:
+                key_values = self.__group_values(self.__find_param(command, state_command.key).group)
+
+                if len(key_values) == 0:
+                    continue
+
+            self.__state_command_dict[command.name] = state_command
+
+            if state_command.state_name not in self.__state_dict:
+                value_type = "bool" if state_command.constant is not None else self.__find_param(command, state_command.value).type
+                key_group = None if state_command.key is None else self.__find_param(command, state_command.key).group
+
+                self.__state_dict[state_command.state_name] = (value_type, key_group, key_values, state_command.per_texture_unit)
+                self.__states.append(state_command.state_name)
+
+        self.__forgetting_command_dict = {}
+        for command_name, state_names in STATE_FORGETTING_COMMANDS.items():
+            state_names = [state_name for state_name in state_names if state_name in self.__state_dict]
+
+            if command_name in commands and len(state_names) > 0:
+                self.__forgetting_command_dict[command_name] = state_names
+
+    def is_state_command(self, command):
+        return command.name in self.__state_command_dict or command.name in self.__forgetting_command_dict
+
+    def generate_state_namespace(self):
+        key_groups = []
+        for state_name in self.__states:
+            value_type, key_group, key_values, per_texture_unit = self.__state_dict[state_name]
+
+            if key_group is not None and key_group not in key_groups:
+                key_groups.append(key_group)
+
+        slot_declarations = []
+        for state_name in self.__states:
+            value_type, key_group, key_values, per_texture_unit = self.__state_dict[state_name]
+            count = str(len(key_values))
+
+            if per_texture_unit and 'activeTexture' in self.__state_dict:
+                count = f"OGLHPP_STATE_TEXTURE_UNITS * {count}"
+
+            slot_declarations.append(f"    Slot<{value_type}> {state_name}[{count}];")
+
+        forget_calls = [f"    forget(instance.{state_name});" for state_name in self.__states]
+        if len(forget_calls) == 0:
+            forget_calls = ["    (void)instance;"]
+
+        return """namespace state {{
+
+#ifndef OGLHPP_STATE_TEXTURE_UNITS
+#define OGLHPP_STATE_TEXTURE_UNITS 32
+#endif
+
+template <typename T>
+struct Slot {{
+    bool valid;
+    T value;
+}};
+
+struct Cache {{
+{}
+    unsigned long long hits;
+    unsigned long long misses;
+}};
+
+// one cache per thread, which has at most one context current
+inline Cache &cache() {{
+    static thread_local Cache instance = Cache();
+    return instance;
+}}
+
+template <typename T, unsigned int N>
+inline void forget(Slot<T> (&slots)[N]) {{
+    for (unsigned int i = 0; i < N; i++) {{
+        slots[i].valid = false;
+    }}
+}}
+
+// forgets every cached value, to call after changing state without the wrapper, or making another context current
+inline void invalidate() {{
+    Cache &instance = cache();
+{}
+}}
+
+inline unsigned long long hits() {{
+    return cache().hits;
+}}
+
+inline unsigned long long misses() {{
+    return cache().misses;
+}}
+
+inline void resetCounters() {{
+    cache().hits = 0;
+    cache().misses = 0;
+}}
+
+// true when the slot at index already holds value, and the call can be skipped
+template <typename T, unsigned int N>
+inline bool elide(Slot<T> (&slots)[N], int index, T value, bool exclusive) {{
+    Cache &instance = cache();
+
+    if (index >= 0 && slots[index].valid && slots[index].value == value) {{
+        instance.hits++;
+        return true;
+    }}
+
+    instance.misses++;
+
+    if (exclusive || index < 0) {{
+        forget(slots);
+    }}
+
+    if (index >= 0) {{
+        slots[index].valid = true;
+        slots[index].value = value;
+    }}
+
+    return false;
+}}
+{}{}
+}}
+""".format("\n".join(slot_declarations), "\n".join(forget_calls),
+           "".join([self.__generate_key_index_function(key_group) for key_group in key_groups]),
+           self.__generate_texture_unit_function())
+
+    def generate_method_body(self, command, param_invoke_list):
+        statements = []
+
+        if command.name in self.__state_command_dict:
+            state_command = self.__state_command_dict[command.name]
+            value_type, key_group, key_values, per_texture_unit = self.__state_dict[state_command.state_name]
+
+            index = "0"
+            if state_command.key is not None:
+                key_param = self.__find_param(command, state_command.key)
+                index = f"state::{self.__key_index_function_name(key_group)}(static_cast<GLenum>({key_param.name}))"
+
+            if per_texture_unit:
+                index = f"state::textureUnitIndex({index}, {len(key_values)})"
+
+            if state_command.constant is not None:
+                value = state_command.constant
+            else:
+                value_param = self.__find_param(command, state_command.value)
+                value = f"static_cast<{value_type}>({value_param.name})"
+
+            exclusive = "true" if state_command.exclusive else "false"
+            statements.append(f"""    if (state::elide(state::cache().{state_command.state_name}, {index}, {value}, {exclusive})) {{
+        return;
+    }}
+""")
+
+            forgotten_state_names = [state_name for state_name in state_command.forgets if state_name in self.__state_dict]
+        else:
+            forgotten_state_names = self.__forgetting_command_dict[command.name]
+
+        for state_name in forgotten_state_names:
+            statements.append(f"    state::forget(state::cache().{state_name});\n")
+
+        return """ {{
+{}    return {}({});
+}}""".format("".join(statements), command.name, ", ".join(param_invoke_list))
+
+    def __find_param(self, command, name):
+        for param in command.params:
+            if param.name == name:
+                return param
+
+        raise Exception(f"parameter {name} not found in {command.name}")
+
+    def __group_values(self, group):
+        if group is None or group not in self.__repository.group_to_enums_dict:
+            return []
+
+        values = []
+        for enum in self.__repository.group_to_enums_dict[group]:
+            try:
+                value = int(enum.value, 0)
+            except ValueError:
+                continue
+
+            if value not in values:
+                values.append(value)
+
+        return values
+
+    def __key_index_function_name(self, key_group):
+        return f"indexOf{key_group}"
+
+    def __generate_key_index_function(self, key_group):
+        cases = [f"    case 0x{value:04X}: return {i};" for i, value in enumerate(self.__group_values(key_group))]
+
+        return """
+inline int {}(GLenum value) {{
+    switch (value) {{
+{}
+    default: return -1;
+    }}
+}}
+""".format(self.__key_index_function_name(key_group), "\n".join(cases))
+
+    def __generate_texture_unit_function(self):
+        if not any(per_texture_unit for value_type, key_group, key_values, per_texture_unit in self.__state_dict.values()):
+            return ""
+
+        # without glActiveTexture, there is a single texture unit
+        if 'activeTexture' not in self.__state_dict:
+            return """
+inline int textureUnitIndex(int index, int count) {
+    (void)count;
+    return index;
+}
+"""
+
+        return """
+// index in the slots of the active texture unit, -1 while it is unknown
+inline int textureUnitIndex(int index, int count) {{
+    const Slot<GLenum> &active = cache().activeTexture[0];
+
+    if (index < 0 || !active.valid || active.value < 0x{0:04X} || active.value - 0x{0:04X} >= static_cast<GLenum>(OGLHPP_STATE_TEXTURE_UNITS)) {{
+        return -1;
+    }}
+
+    return static_cast<int>(active.value - 0x{0:04X}) * count + index;
+}}
+""".format(TEXTURE0)
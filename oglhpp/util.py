@@ -1,3 +1,5 @@
+import sys
+
 
 def is_capitalized(value):
     if value == '':
@@ -46,3 +48,26 @@ def split_capitalized(value):
 def camel_case(class_name):
     return ''.join([ item.title() for item in class_name.split(' ')])
 
+
+# Deduplicates the strings and small sequences (type parts, group lists) stored in the registry
+# models. gl.xml repeats the same group names, type names and qualifiers thousands of times.
+# With enabled=False values are returned untouched, as the parsers used to store them.
+
+class Interner:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.__sequences = {}
+
+    def string(self, value):
+        if not self.enabled or value is None:
+            return value
+
+        return sys.intern(value)
+
+    def sequence(self, values):
+        if not self.enabled:
+            return values
+
+        values = tuple([self.string(value) for value in values])
+
+        return self.__sequences.setdefault(values, values)
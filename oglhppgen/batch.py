@@ -0,0 +1,139 @@
+import concurrent.futures
+import multiprocessing
+import os
+import pickle
+import time
+
+from oglhppgen.c_generator import C_Generator, AVAILABLE_API_NUMBERS, GENERATOR_VERSION, PROFILES
+
+
+# Registry shared with the worker processes. With the fork start method the workers inherit it
+# from the parent, otherwise each worker unpickles a snapshot of it once, in its initializer.
+_registry = None
+_generators = {}
+_generator_options = {}
+
+
+def _init_worker(registry_snapshot, generator_options):
+    global _registry, _generator_options
+
+    if registry_snapshot is not None:
+        _registry = pickle.loads(registry_snapshot)
+
+    _generator_options = generator_options
+
+
+def _generate_target(api, number, profile, output_path, generation_cache, registry_hash):
+    start = time.perf_counter()
+
+    # one generator per profile, reused by the following targets of the same worker
+    if profile not in _generators:
+        _generators[profile] = C_Generator(registry=_registry, **target_options(_generator_options, profile))
+
+    generator = _generators[profile]
+
+    if generation_cache is None:
+        writer = generator.write_files(api=api, number=number, output_dir=output_path)
+    else:
+        key = generation_cache.key(registry_hash, "c", GENERATOR_VERSION, (api, number),
+                                   target_options(_generator_options, profile))
+
+        with generation_cache.open_entry(key) as cache_entry:
+            writer = generator.write_files(api=api, number=number, output_dir=output_path, cache_entry=cache_entry)
+
+    return time.perf_counter() - start, writer.changed_paths, writer.unchanged_paths
+
+
+# (api, number, profile) of every target. Only gl has profiles, the profile of the others is None.
+def all_targets():
+    return [(api, number, profile) for api in AVAILABLE_API_NUMBERS for number in AVAILABLE_API_NUMBERS[api]
+            for profile in (PROFILES if api == 'gl' else [None])]
+
+
+def target_path(output_dir, api, number, profile=None):
+    if profile is None:
+        return os.path.join(output_dir, f'{api}-{number}')
+
+    return os.path.join(output_dir, f'{api}-{number}-{profile}')
+
+
+# generator_options of a target, with its profile when it has one
+def target_options(generator_options, profile):
+    if profile is None:
+        return generator_options
+
+    return {**generator_options, "profile": profile}
+
+
+class BatchResult:
+    def __init__(self, api, number, output_path, seconds, changed_paths=None, unchanged_paths=None, profile=None):
+        self.api = api
+        self.number = number
+        self.profile = profile
+        self.output_path = output_path
+        self.seconds = seconds
+        self.changed_paths = [] if changed_paths is None else changed_paths
+        self.unchanged_paths = [] if unchanged_paths is None else unchanged_paths
+
+    def __str__(self):
+        return f'BatchResult(api="{self.api}", number="{self.number}", profile="{self.profile}", ' \
+               f'output_path="{self.output_path}", seconds={self.seconds:.3f})'
+
+
+# Generates many api/version/profile targets from one parsed registry, fanning them out over a
+# process pool. Every target is written to its own directory, named after the api, the version
+# number and the profile. When a GenerationCache is given, the outputs of every target are also
+# stored in it. generator_options are the keyword arguments of the C_Generator used for every
+# target, whose profile replaces the one of the options. The workers are forked when the platform
+# can, unless another multiprocessing start_method is given.
+
+class BatchGenerator:
+    def __init__(self, registry, max_workers=None, generation_cache=None, registry_hash=None, generator_options=None,
+                 start_method=None):
+        self.__registry = registry
+        self.__generator_options = {} if generator_options is None else dict(generator_options)
+        self.__max_workers = max_workers
+        self.__generation_cache = generation_cache
+        self.__registry_hash = registry_hash
+        self.__start_method = start_method
+
+    def all_targets(self):
+        return all_targets()
+
+    def target_path(self, output_dir, api, number, profile=None):
+        return target_path(output_dir, api, number, profile)
+
+    def generate(self, output_dir, targets=None):
+        global _registry
+
+        if targets is None:
+            targets = self.all_targets()
+
+        start_method = self.__start_method
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+
+        context = multiprocessing.get_context(start_method)
+        if start_method == "fork":
+            registry_snapshot = None
+        else:
+            registry_snapshot = pickle.dumps(self.__registry, protocol=pickle.HIGHEST_PROTOCOL)
+
+        _registry = self.__registry
+
+        results = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.__max_workers, mp_context=context,
+                                                    initializer=_init_worker, initargs=(registry_snapshot, self.__generator_options)) as executor:
+            futures = []
+            for api, number, profile in targets:
+                output_path = self.target_path(output_dir, api, number, profile)
+                futures.append((api, number, profile, output_path,
+                                executor.submit(_generate_target, api, number, profile, output_path,
+                                                self.__generation_cache, self.__registry_hash)))
+
+            for api, number, profile, output_path, future in futures:
+                seconds, changed_paths, unchanged_paths = future.result()
+                results.append(BatchResult(api=api, number=number, output_path=output_path, seconds=seconds,
+                                           changed_paths=changed_paths, unchanged_paths=unchanged_paths, profile=profile))
+
+        return results
@@ -1,70 +1,367 @@
+import fnmatch
+import os
+import re
+
+from oglhppgen.model import Require, Feature, Extension
+from oglhppgen.output import OutputWriter, Tee
+from oglhppgen.perfect_hash import create_perfect_hash, FNV_OFFSET_BASIS, FNV_PRIME, MIX_MULTIPLIER_1, MIX_MULTIPLIER_2
+
+
+# Bump whenever the generated code changes, so cached generation results are discarded.
+GENERATOR_VERSION = 17
+
+AVAILABLE_API_NUMBERS = {
+    'gl': ['1.0', '1.1', '1.2', '1.3', '1.4', '1.5', '2.0', '2.1', '3.0', '3.1', '3.2', '3.3', '4.0', '4.1',
+           '4.2', '4.3', '4.4', '4.5', '4.6'],
+    'gles1': ['1.0'],
+    'gles2': ['2.0', '3.0', '3.1', '3.2'],
+    'glsc2': ['2.0'],
+}
+
+# 'eager' resolves every command when oglhpp_load_functions is called. 'lazy' points every
+# command at a generated trampoline instead, which resolves the real entry point on its first
+# call, patches the pointer and forwards the call. 'table' keeps the pointers in one array, filled
+# by a loop over a single blob of command names, and names the commands with macros. 'context'
+# keeps the pointers in a struct oglhpp_context filled by oglhpp_load_context, and names the
+# commands with macros reading the context current on the calling thread.
+LOADERS = ['eager', 'lazy', 'table', 'context']
+
+# 'core' leaves out the requires of the compatibility profile, and everything the features up to
+# the target version remove from the core profile. 'compatibility' keeps the deprecated commands.
+PROFILES = ['compatibility', 'core']
+
+# Types whose definition the header prologue already provides.
+PROLOGUE_TYPE_NAMES = ['khrplatform']
+
+TYPE_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_]\w*')
+
+# 'single' generates one include/oglhpp/gl.h. 'split' generates one header per feature, named after
+# its api and version, like gl_3_3.h, including the header of the feature before it, so that a
+# translation unit can include only the version it needs. gl.h then includes the last of them and
+# adds the extensions.
+LAYOUTS = ['single', 'split']
+
+# command_buffer adds include/oglhpp/command_buffer.h and src/command_buffer.c, with an
+# oglhpp_record_<command> function for every command that returns nothing and whose pointer
+# parameters are const arrays of a size known from their len, or strings. Recording appends the
+# command and a copy of its arrays to a contiguous buffer, on any thread, and
+# oglhpp_command_buffer_replay calls the recorded commands in order, on the thread of the context.
+COMMAND_BUFFER_LEN_PATTERN = re.compile(r'(\w+)(?:\*(\d+))?')
+
+
 class C_Generator:
-    def __init__(self, registry):
+    def __init__(self, registry, loader='eager', extensions=None, profile='compatibility', used_names=None,
+                 layout='single', command_buffer=False):
+        if loader not in LOADERS:
+            raise Exception(f"loader {loader} not in {LOADERS}")
+
+        if layout not in LAYOUTS:
+            raise Exception(f"layout {layout} not in {LAYOUTS}")
+
+        # the dispatch table of a context needs the function pointer types of every feature
+        if layout == 'split' and loader == 'context':
+            raise Exception("the split layout is not available with the context loader")
+
+        if profile not in PROFILES:
+            raise Exception(f"profile {profile} not in {PROFILES}")
+
         self.__registry = registry
+        self.__loader = loader
+        self.__extension_patterns = [] if extensions is None else list(extensions)
+        self.__profile = profile
+        self.__used_names = None if used_names is None else frozenset(used_names)
+        self.__layout = layout
+        self.__command_buffer = command_buffer
 
-        self.__available_api_numbers = {
-            'gl': ['1.0', '1.1', '1.2', '1.3', '1.4', '1.5', '2.0', '2.1', '3.0', '3.1', '3.2', '3.3', '4.0', '4.1',
-                   '4.2', '4.3', '4.4', '4.5', '4.6'],
-            'gles1': ['1.0'],
-            'gles2': ['2.0', '3.0', '3.1', '3.2'],
-            'glsc2': ['2.0'],
-        }
+        self.__available_api_numbers = AVAILABLE_API_NUMBERS
 
         # index feature list by api, and then, by version number
         self.__feature_by_api_number = self.__create_feature_by_api_number_dict(self.__registry.feature_list)
         self.__type_by_name = {}
+        self.__type_order = {}
         for value in self.__registry.types_list:
             self.__type_by_name[value.name] = value
+            self.__type_order.setdefault(value.name, len(self.__type_order))
+
+        # the types every type depends on, named by its requires attribute or by its definition, in registry order
+        self.__type_dependencies = {}
+        for type_name, type_ in self.__type_by_name.items():
+            dependency_set = set()
+
+            if type_.requires is not None:
+                dependency_set.add(type_.requires)
+
+            for identifier in TYPE_IDENTIFIER_PATTERN.findall(type_.c_definition):
+                dependency_set.add(identifier)
+
+            self.__type_dependencies[type_name] = sorted(
+                [dependency for dependency in dependency_set if dependency != type_name and dependency in self.__type_by_name],
+                key=self.__type_order.__getitem__)
 
         self.__enum_by_name = {}
+        # bitmask values are combined rather than passed as a GLenum, they have no place in oglhpp_enum_name
+        self.__bitmask_enum_name_set = set()
         for enums in self.__registry.enums_list:
             for key in enums.enum_dict:
                 self.__enum_by_name[key] = enums.enum_dict[key]
 
+                if enums.enum_group_type == 'bitmask':
+                    self.__bitmask_enum_name_set.add(key)
+
         self.__command_by_name = {}
         for value in self.__registry.command_list:
             self.__command_by_name[value.name] = value
 
-    def __generate_header(self, features, type_name_set):
-        code = ''
-        code += f'{self.__generate_header_prologue()}'
+        # the vendors of the extensions, like ARB in GL_ARB_multitexture
+        self.__vendor_set = set()
+        if self.__registry.extensions is not None:
+            for extension in self.__registry.extensions.extension_list:
+                self.__vendor_set.add(extension.name.split('_')[1])
+
+    def __generate_header(self, sections, type_name_set, command_groups, extension_list, command_section_names):
+        command_list = [command for extension_name, group_command_list in command_groups for command in group_command_list]
+        command_index = {command.name: i for i, command in enumerate(command_list)}
+
+        yield self.__generate_header_prologue('__OGLHPP_GL_H__')
+        yield self.__generate_header_platform()
+        yield self.__generate_header_extern_c()
+        yield from self.__generate_loader_declarations(command_list)
+        yield '\n'
+        yield from self.__generate_enum_name_header()
+        yield '\n'
+        yield from self.__generate_instrument_header(command_list)
+        yield '\n'
+        yield from self.__generate_extension_header(extension_list)
+        yield '\n'
+
+        yield '/* data type definitions */\n'
+        yield from self.__generate_types(type_name_set)
+        yield from self.__join_chunks('\n\n', [self.__generate_header_from_feature(section, command_index, command_section_names)
+                                                for section in sections])
+        yield from self.__generate_header_extension_loaders(command_groups)
+
+        if self.__loader == 'context':
+            yield '\n\n'
+            yield from self.__generate_context_header(command_list)
+
+        yield '\n\n'
+        yield from self.__generate_instrument_macros(command_list)
+        yield self.__generate_header_epilogue()
+
+    def __generate_feature_header_name(self, feature):
+        return f'{feature.api}_{feature.number.replace(".", "_")}.h'
+
+    def __generate_header_guard(self, header_name):
+        return f'__OGLHPP_{header_name.replace(".", "_").upper()}__'
+
+    # The header of a feature, in the split layout. The first one holds what the single gl.h
+    # starts with, the others include the header of the feature before them.
+    def __generate_feature_header(self, feature, previous_feature, type_name_set, command_index, command_section_names):
+        yield self.__generate_header_prologue(self.__generate_header_guard(self.__generate_feature_header_name(feature)))
+
+        if previous_feature is None:
+            yield self.__generate_header_platform()
+            yield self.__generate_header_extern_c()
+            yield from self.__generate_loader_declarations(list(command_index))
+            yield '\n'
+            yield from self.__generate_enum_name_header()
+            yield '\n'
+            yield from self.__generate_instrument_header(list(command_index))
+            yield '\n'
+        else:
+            yield f'#include <oglhpp/{self.__generate_feature_header_name(previous_feature)}>\n\n'
+            yield self.__generate_header_extern_c()
+
+        yield '/* data type definitions */\n'
+        yield from self.__generate_types(type_name_set)
+        yield from self.__generate_header_from_feature(feature, command_index, command_section_names)
+        yield '\n\n'
+        yield from self.__generate_instrument_macros(self.__collect_commands([feature]))
+        yield self.__generate_header_epilogue()
+
+    # gl.h in the split layout, everything that comes after the last feature.
+    def __generate_umbrella_header(self, last_feature, extension_sections, type_name_set, command_groups, extension_list, command_index,
+                                   command_section_names):
+        yield self.__generate_header_prologue('__OGLHPP_GL_H__')
+        yield f'#include <oglhpp/{self.__generate_feature_header_name(last_feature)}>\n\n'
+        yield self.__generate_header_extern_c()
+        yield from self.__generate_extension_header(extension_list)
+        yield '\n'
+
+        yield '/* data type definitions */\n'
+        yield from self.__generate_types(type_name_set)
+        yield from self.__join_chunks('\n\n', [self.__generate_header_from_feature(section, command_index, command_section_names)
+                                                for section in extension_sections])
+        yield from self.__generate_header_extension_loaders(command_groups)
+        yield '\n\n'
+        yield from self.__generate_instrument_macros(self.__collect_commands(extension_sections))
+        yield self.__generate_header_epilogue()
+
+    def __generate_header_extension_loaders(self, command_groups):
+        if len(command_groups) > 1:
+            yield '\n\n/* extension loaders */\n'
+            for extension_name, group_command_list in command_groups[1:]:
+                yield f'extern {self.__generate_loader_prototype(extension_name)};\n'
+
+    def __generate_loader_declarations(self, command_list):
+        yield '/* loader declarations */\n'
+        yield f'typedef void (*OGLHPP_PROC)(void);\n'
+        yield f'typedef OGLHPP_PROC (*OGLHPP_GETPROCADDRESS)(const char *name);\n'
+
+        if self.__loader != 'context':
+            yield f'extern {self.__generate_loader_prototype(None)};\n'
+
+        if self.__loader == 'table':
+            yield f'extern OGLHPP_PROC oglhpp_procs[{max(len(command_list), 1)}];\n'
+        elif self.__loader == 'context':
+            yield 'struct oglhpp_context;\n'
+            yield f'extern {self.__generate_loader_prototype(None)};\n'
+
+        # the pointer loaded for a generated command, or NULL, without calling getProcAddress
+        if self.__loader == 'context':
+            yield 'extern OGLHPP_PROC oglhpp_find_context_proc(const struct oglhpp_context *context, const char *name);\n'
+        else:
+            yield 'extern OGLHPP_PROC oglhpp_find_proc(const char *name);\n'
 
-        code += '/* loader declarations */\n'
-        code += f'typedef void (*OGLHPP_PROC)(void);\n'
-        code += f'typedef OGLHPP_PROC (*OGLHPP_GETPROCADDRESS)(const char *name);\n'
-        code += f'extern void oglhpp_load_functions(OGLHPP_GETPROCADDRESS getProcAddress);\n\n'
+    def __generate_source(self, sections, type_name_set, command_groups, extension_list, enum_name_list):
+        if self.__loader == 'context':
+            yield from self.__generate_context_loader_from_command_groups(command_groups)
+        else:
+            # the instrumentation shims call the commands themselves
+            yield '#define OGLHPP_NO_INSTRUMENT_MACROS\n'
+            yield '#include <oglhpp/gl.h>\n\n'
 
-        code += '/* data type definitions */\n'
-        code += f'{self.__generate_types(type_name_set)}'
-        code += '\n\n'.join([self.__generate_header_from_feature(feature) for feature in features])
-        code += f'{self.__generate_header_epilogue()}'
+            if self.__loader == 'table':
+                yield from self.__generate_table_loader_from_command_groups(command_groups)
+            else:
+                if self.__loader == 'lazy':
+                    yield 'static OGLHPP_GETPROCADDRESS oglhpp_getProcAddress;\n\n'
+
+                yield from self.__join_chunks('\n\n', [self.__generate_source_from_command_list(extension_name, group_command_list)
+                                                        for extension_name, group_command_list in command_groups])
+                yield '\n\n'
+                yield from self.__join_chunks('\n\n', [self.__generate_loader_from_command_list(extension_name, group_command_list)
+                                                        for extension_name, group_command_list in command_groups])
+
+        yield '\n\n'
+        yield from self.__generate_find_proc_source(
+            [command for extension_name, group_command_list in command_groups for command in group_command_list])
+        yield '\n'
+        yield from self.__generate_extension_source(extension_list)
+        yield '\n'
+        yield from self.__generate_enum_name_source(enum_name_list)
+        yield '\n'
+        yield from self.__generate_instrument_source(
+            [command for extension_name, group_command_list in command_groups for command in group_command_list])
+
+    def __join_chunks(self, separator, chunk_generators):
+        for i in range(len(chunk_generators)):
+            if i > 0:
+                yield separator
+
+            yield from chunk_generators[i]
+
+    # Returns, for each generated file, a generator of the chunks of text that make it up.
+    # Nothing is generated until the chunks are consumed.
+    def generate_chunks(self, api, number):
+        self.__check_api_number(api, number)
+        features = self.__filter_features(self.__collect_features(api, number))
+        extension_list = self.__collect_extensions(api)
+        extension_sections = self.__collect_extension_sections(api, features, extension_list)
+        sections = features + extension_sections
+        type_name_set = self.__collect_types(sections)
+        enum_name_list = self.__collect_enum_names(features, extension_sections)
+
+        # the commands of the features first, then the ones of every extension, each loaded by its own function
+        command_groups = [(None, self.__collect_commands(features))]
+        for extension_section in extension_sections:
+            command_groups.append((extension_section.name, self.__collect_commands([extension_section])))
+
+        # a command required again by a later section is only declared by the first one
+        command_section_names = {}
+        for section in sections:
+            for command in self.__collect_commands([section]):
+                command_section_names.setdefault(command.name, section.name)
+
+        chunks_by_filename_suffix = {}
+
+        if self.__command_buffer:
+            command_list = [command for extension_name, group_command_list in command_groups for command in group_command_list]
+            recordable_command_list = [command for command in command_list if self.__is_recordable(command)]
+
+            chunks_by_filename_suffix['include/oglhpp/command_buffer.h'] = self.__generate_command_buffer_header(
+                recordable_command_list, len(command_list) - len(recordable_command_list))
+            chunks_by_filename_suffix['src/command_buffer.c'] = self.__generate_command_buffer_source(recordable_command_list)
+
+        if self.__layout == 'single':
+            return {
+                'include/oglhpp/gl.h': self.__generate_header(sections, type_name_set, command_groups, extension_list, command_section_names),
+                'src/gl.c': self.__generate_source(sections, type_name_set, command_groups, extension_list, enum_name_list),
+                **chunks_by_filename_suffix
+            }
+
+        command_index = {}
+        for extension_name, group_command_list in command_groups:
+            for command in group_command_list:
+                command_index[command.name] = len(command_index)
+
+        # every type is defined by the first header whose commands use it
+        feature_type_name_set = set()
+        for i in range(len(features)):
+            type_name_subset = self.__collect_types([features[i]]) - feature_type_name_set
+            feature_type_name_set.update(type_name_subset)
+
+            chunks_by_filename_suffix[f'include/oglhpp/{self.__generate_feature_header_name(features[i])}'] = \
+                self.__generate_feature_header(features[i], features[i - 1] if i > 0 else None, type_name_subset, command_index,
+                                               command_section_names)
+
+        chunks_by_filename_suffix['include/oglhpp/gl.h'] = self.__generate_umbrella_header(
+            features[-1], extension_sections, type_name_set - feature_type_name_set, command_groups, extension_list, command_index,
+            command_section_names)
+        chunks_by_filename_suffix['src/gl.c'] = self.__generate_source(sections, type_name_set, command_groups, extension_list, enum_name_list)
+
+        return chunks_by_filename_suffix
 
-        return code
+    def generate(self, api, number):
+        return {filename_suffix: ''.join(chunks) for filename_suffix, chunks in self.generate_chunks(api, number).items()}
 
-    def __generate_source(self, features, type_name_set):
-        code = '#include <oglhpp/gl.h>\n\n'
-        code += '\n\n'.join([self.__generate_source_from_feature(feature) for feature in features])
+    # Streams every generated file into the sink returned by open_sink(filename_suffix), which
+    # must be usable as a context manager, like a file object.
+    def write(self, api, number, open_sink):
+        for filename_suffix, chunks in self.generate_chunks(api, number).items():
+            with open_sink(filename_suffix) as sink:
+                for chunk in chunks:
+                    sink.write(chunk)
 
-        return code
+    # Writes every generated file under output_dir, leaving files whose contents did not change untouched.
+    # With a cache_entry from GenerationCache.open_entry, the files are also written into it as they are generated.
+    def write_files(self, api, number, output_dir, writer=None, cache_entry=None):
+        if writer is None:
+            writer = OutputWriter()
 
-    def generate(self, api, number):
-        self.__check_api_number(api, number)
-        features = self.__collect_features(api, number)
-        type_name_set = self.__collect_types(features)
+        def open_sink(filename_suffix):
+            output_file = writer.open(os.path.join(output_dir, filename_suffix))
 
-        return {
-            'include/oglhpp/gl.h': self.__generate_header(features, type_name_set),
-            'src/gl.c': self.__generate_source(features, type_name_set)
-        }
+            if cache_entry is None:
+                return output_file
 
-    def __generate_header_prologue(self):
-        return """
+            return Tee([output_file, cache_entry.open(filename_suffix)])
+
+        self.write(api, number, open_sink)
+
+        return writer
+
+    def __generate_header_prologue(self, guard):
+        return f"""
 #pragma once 
 
-#ifndef __OGLHPP_GL_H__
-#define __OGLHPP_GL_H__
+#ifndef {guard}
+#define {guard}
+
+"""
 
-#include <KHR/khrplatform.h>
+    def __generate_header_platform(self):
+        return """#include <KHR/khrplatform.h>
 
 #if defined(__gl_h_) || defined(__GL_H__)
   #error please include this header instead
@@ -81,7 +378,10 @@ class C_Generator:
   #define GLCALLCONV
 #endif
 
-#if defined(__cplusplus)
+"""
+
+    def __generate_header_extern_c(self):
+        return """#if defined(__cplusplus)
 extern "C" {
 #endif
 
@@ -96,79 +396,944 @@ extern "C" {
 #endif
 """
 
+    # Returns the closure of the types named by the requires of the features and used by their
+    # commands, over the type dependencies.
     def __collect_types(self, features):
-        # collect data type definitions from the commands
-        type_name_set = set()
+        pending_type_names = []
 
         for feature in features:
             for require in feature.require_list:
+                pending_type_names.extend([type_ref.name for type_ref in require.type_list])
+
                 for command_ref in require.command_list:
                     command = self.__command_by_name[command_ref.name]
 
+                    if command.return_type is not None:
+                        pending_type_names.append(command.return_type.name)
+
                     for param in command.params:
                         if param.data_type is not None:
-                            type_name_set.add(param.data_type)
+                            pending_type_names.append(param.data_type)
+
+        type_name_set = set()
+        while len(pending_type_names) > 0:
+            type_name = pending_type_names.pop()
+
+            if type_name in type_name_set or type_name not in self.__type_by_name or type_name in PROLOGUE_TYPE_NAMES:
+                continue
+
+            type_name_set.add(type_name)
+            pending_type_names.extend(self.__type_dependencies[type_name])
 
         return type_name_set
 
-    def __generate_types(self, type_name_set):
-        code = ''
+    # oglhpp_enum_name maps every enum value of the generated features and extensions back to one of
+    # its names. When names share a value, it prefers names required by a feature to names required
+    # by an extension only, then names without a vendor suffix, like the _EXT of GL_FRAMEBUFFER_EXT,
+    # and then the name required first.
+    #
+    # Returns the (value, name) of every enum of the sections that fits a GLenum, one name per
+    # value, sorted by value.
+    def __collect_enum_names(self, features, extension_sections):
+        name_by_value = {}
+        rank_by_value = {}
+
+        sections = features + extension_sections
+        order = 0
+        for i in range(len(sections)):
+            for require in sections[i].require_list:
+                for enum_ref in require.enum_list:
+                    order += 1
+
+                    if enum_ref.name in self.__bitmask_enum_name_set:
+                        continue
+
+                    try:
+                        value = int(self.__enum_by_name[enum_ref.name].value, 0)
+                    except ValueError:
+                        continue
+
+                    if value < 0 or value > 0xFFFFFFFF:
+                        continue
+
+                    rank = (i >= len(features), self.__has_vendor_suffix(enum_ref.name), order)
+                    if value not in rank_by_value or rank < rank_by_value[value]:
+                        rank_by_value[value] = rank
+                        name_by_value[value] = enum_ref.name
+
+        return sorted(name_by_value.items())
+
+    def __has_vendor_suffix(self, enum_name):
+        return enum_name.rsplit('_', 1)[-1] in self.__vendor_set
+
+    def __collect_commands(self, features):
+        command_list = []
+        command_name_set = set()
+
+        for feature in features:
+            for require in feature.require_list:
+                for command_ref in require.command_list:
+                    if command_ref.name not in command_name_set:
+                        command_name_set.add(command_ref.name)
+                        command_list.append(self.__command_by_name[command_ref.name])
+
+        return command_list
+
+    def __collect_extensions(self, api):
+        if self.__registry.extensions is None:
+            return []
+
+        return [extension for extension in self.__registry.extensions.extension_list if api in extension.supported]
+
+    # Extensions are selected with a list of fnmatch patterns on their names, e.g. 'GL_ARB_*'. Every
+    # selected extension gets its own definitions section and its own loader function, so only the
+    # extensions that are enabled cost lookups.
+    #
+    # Returns one Extension per selected extension, with a single require holding what it adds to
+    # the features and to the extensions before it, for the requires that apply to the api.
+    def __collect_extension_sections(self, api, features, extension_list):
+        type_name_set = set()
+        enum_name_set = set()
+        command_name_set = set()
+
+        for feature in features:
+            for require in feature.require_list:
+                type_name_set.update([type_ref.name for type_ref in require.type_list])
+                enum_name_set.update([enum_ref.name for enum_ref in require.enum_list])
+                command_name_set.update([command_ref.name for command_ref in require.command_list])
+
+        extension_sections = []
+        for extension in extension_list:
+            if not any(fnmatch.fnmatchcase(extension.name, pattern) for pattern in self.__extension_patterns):
+                continue
+
+            type_list = []
+            enum_list = []
+            command_list = []
+
+            for require in extension.require_list:
+                if require.api is not None and require.api != api:
+                    continue
+
+                if require.profile is not None and require.profile != self.__profile:
+                    continue
+
+                for type_ref in require.type_list:
+                    if type_ref.name not in type_name_set:
+                        type_name_set.add(type_ref.name)
+                        type_list.append(type_ref)
+
+                for enum_ref in require.enum_list:
+                    if enum_ref.name not in enum_name_set and self.__is_used(enum_ref.name):
+                        enum_name_set.add(enum_ref.name)
+                        enum_list.append(enum_ref)
+
+                for command_ref in require.command_list:
+                    if command_ref.name not in command_name_set and self.__is_used(command_ref.name):
+                        command_name_set.add(command_ref.name)
+                        command_list.append(command_ref)
+
+            extension_sections.append(Extension(
+                name=extension.name,
+                supported=extension.supported,
+                require_list=[Require(type_list=type_list, enum_list=enum_list, command_list=command_list, api=api)]))
 
-        for type_name in type_name_set:
+        return extension_sections
+
+    def __generate_types(self, type_name_set):
+        for type_name in self.__sort_types(type_name_set):
             type_ = self.__type_by_name[type_name]
-            code += f'{self.__generate_type(type_)}\n'
+            yield f'{self.__generate_type(type_)}\n'
 
-        return code
+    # Orders the types so that each comes after the types it depends on, and otherwise in registry
+    # order. Dependencies outside of type_name_set are assumed to be defined already.
+    def __sort_types(self, type_name_set):
+        sorted_type_names = []
+        visited_type_name_set = set()
 
-    def __generate_header_from_feature(self, feature):
-        code = f'/* {feature.name} definitions */\n'
+        for type_name in sorted(type_name_set, key=self.__type_order.__getitem__):
+            self.__visit_type(type_name, type_name_set, visited_type_name_set, sorted_type_names)
 
-        for require in feature.require_list:
-            for type_ref in require.type_list:
-                type_ = self.__type_by_name[type_ref.name]
-                code += f'{self.__generate_type(type_)}\n'
+        return sorted_type_names
+
+    def __visit_type(self, type_name, type_name_set, visited_type_name_set, sorted_type_names):
+        if type_name in visited_type_name_set:
+            return
+
+        visited_type_name_set.add(type_name)
 
+        for dependency in self.__type_dependencies[type_name]:
+            if dependency in type_name_set:
+                self.__visit_type(dependency, type_name_set, visited_type_name_set, sorted_type_names)
+
+        sorted_type_names.append(type_name)
+
+    def __generate_header_from_feature(self, feature, command_index, command_section_names):
+        yield f'/* {feature.name} definitions */\n'
+
+        # the types of the feature are defined along with all the others, before it
+        for require in feature.require_list:
             for enum_ref in require.enum_list:
                 enum = self.__enum_by_name[enum_ref.name]
-                code += f'{self.__generate_enum(enum)}\n'
+                yield f'{self.__generate_enum(enum)}\n'
 
             for command_ref in require.command_list:
+                if command_section_names[command_ref.name] != feature.name:
+                    continue
+
                 command = self.__command_by_name[command_ref.name]
-                code += f'{self.__generate_command_ptr_typedef(command)}\n'
-                code += f'{self.__generate_command_ptr_variable(command, extern=True)}\n'
-                code += '\n'
+                yield f'{self.__generate_command_ptr_typedef(command)}\n'
 
-        return code
+                if self.__loader == 'table':
+                    yield f'{self.__generate_command_ptr_macro(command, command_index[command.name])}\n'
+                elif self.__loader != 'context':
+                    yield f'{self.__generate_command_ptr_variable(command, extern=True)}\n'
 
-    def __generate_source_from_feature(self, feature):
-        command_list = []
+                yield '\n'
 
-        code = f'/* {feature.name} function pointer variables */\n'
+    def __generate_source_from_command_list(self, extension_name, command_list):
+        yield f'/* {"core" if extension_name is None else extension_name} function pointer variables */\n'
 
-        for require in feature.require_list:
-            for command_ref in require.command_list:
-                command = self.__command_by_name[command_ref.name]
-                code += f'{self.__generate_command_ptr_variable(command, extern=False)}\n'
+        for command in command_list:
+            if self.__loader == 'lazy':
+                yield f'{self.__generate_command_trampoline(command)}\n'
+                yield f'{self.__generate_command_ptr_variable(command, initializer=self.__generate_command_trampoline_name(command.name))}\n'
+            else:
+                yield f'{self.__generate_command_ptr_variable(command, extern=False)}\n'
+
+    def __generate_loader_name(self, extension_name):
+        if self.__loader == 'context':
+            return 'oglhpp_load_context' if extension_name is None else f'oglhpp_load_context_{extension_name}'
 
-                command_list.append(command)
+        return 'oglhpp_load_functions' if extension_name is None else f'oglhpp_load_{extension_name}'
 
-        code += f'\n{self.__generate_loader_from_command_list(command_list)}'
+    def __generate_loader_prototype(self, extension_name):
+        name = self.__generate_loader_name(extension_name)
 
-        return code
+        if self.__loader == 'context':
+            return f'void {name}(struct oglhpp_context *context, OGLHPP_GETPROCADDRESS getProcAddress)'
 
-    def __generate_loader_from_command_list(self, command_list):
-        code = "void oglhpp_load_functions(OGLHPP_GETPROCADDRESS getProcAddress) {\n"
+        return f'void {name}(OGLHPP_GETPROCADDRESS getProcAddress)'
+
+    def __generate_loader_from_command_list(self, extension_name, command_list):
+        yield f'{self.__generate_loader_prototype(extension_name)} {{\n'
+
+        if self.__loader == 'lazy':
+            # nothing is resolved here, every command goes back to its trampoline so that loading
+            # again, for another context, resolves the entry points again
+            yield '    oglhpp_getProcAddress = getProcAddress;\n'
+        elif len(command_list) == 0:
+            # an extension adding enums only
+            yield '    (void)getProcAddress;\n'
 
         for command in command_list:
             command_name = command.name
             command_ptr_variable_type = self.__generate_command_ptr_name(command.name)
             command_ptr_variable_name = self.__generate_command_ptr_variable_name(command.name)
 
-            code += f'    {command_ptr_variable_name} = ({command_ptr_variable_type})getProcAddress("{command_name}");\n'
+            if self.__loader == 'lazy':
+                yield f'    {command_ptr_variable_name} = {self.__generate_command_trampoline_name(command_name)};\n'
+            else:
+                yield f'    {command_ptr_variable_name} = ({command_ptr_variable_type})getProcAddress("{command_name}");\n'
+
+        yield '}'
+
+    def __generate_table_loader_from_command_groups(self, command_groups):
+        command_list = [command for extension_name, group_command_list in command_groups for command in group_command_list]
+        count = max(len(command_list), 1)
+
+        yield f'OGLHPP_PROC oglhpp_procs[{count}];\n\n'
+        yield from self.__generate_name_blob('oglhpp_proc_names', 'oglhpp_proc_name_offsets',
+                                             [command.name for command in command_list])
+
+        # every group of commands is a contiguous range of the table
+        start = 0
+        for i, (extension_name, group_command_list) in enumerate(command_groups):
+            end = start + len(group_command_list)
+
+            if i > 0:
+                yield '\n\n'
+
+            yield f'{self.__generate_loader_prototype(extension_name)} {{\n'
+            yield '    unsigned int i;\n\n'
+            yield f'    for (i = {start}; i < {end}; i++) {{\n'
+            yield '        oglhpp_procs[i] = getProcAddress(oglhpp_proc_names + oglhpp_proc_name_offsets[i]);\n'
+            yield '    }\n'
+            yield '}'
+
+            start = end
+
+    def __generate_context_header(self, command_list):
+        yield '/* dispatch table, one per context */\n'
+        yield 'struct oglhpp_context {\n'
+        for command in command_list:
+            yield f'    {self.__generate_command_ptr_name(command.name)} {command.name};\n'
+        yield '};\n\n'
+
+        # Commands are called through the context made current on the calling thread, so call sites
+        # stay the same. OGLHPP_NO_CURRENT_CONTEXT leaves the thread local pointer out, where thread
+        # local storage is not available, and OGLHPP_NO_CONTEXT_MACROS leaves the macros out, to
+        # call through a context explicitly.
+        yield '#if !defined(OGLHPP_NO_CURRENT_CONTEXT)\n'
+        yield '#if defined(_MSC_VER)\n'
+        yield '  #define OGLHPP_THREAD_LOCAL __declspec(thread)\n'
+        yield '#elif defined(__GNUC__) || defined(__clang__)\n'
+        yield '  #define OGLHPP_THREAD_LOCAL __thread\n'
+        yield '#elif defined(__cplusplus)\n'
+        yield '  #define OGLHPP_THREAD_LOCAL thread_local\n'
+        yield '#else\n'
+        yield '  #define OGLHPP_THREAD_LOCAL _Thread_local\n'
+        yield '#endif\n\n'
+        yield 'extern OGLHPP_THREAD_LOCAL struct oglhpp_context *oglhpp_current_context;\n'
+        yield 'extern void oglhpp_make_current(struct oglhpp_context *context);\n'
+        yield 'extern void oglhpp_load_functions(OGLHPP_GETPROCADDRESS getProcAddress);\n'
+        yield 'extern OGLHPP_PROC oglhpp_find_proc(const char *name);\n\n'
+        yield '#if !defined(OGLHPP_NO_CONTEXT_MACROS)\n'
+        for command in command_list:
+            yield f'#define {command.name} (oglhpp_current_context->{command.name})\n'
+        yield '#endif\n'
+        yield '#endif\n'
+
+    def __generate_context_loader_from_command_groups(self, command_groups):
+        # the members of the dispatch table would be replaced by the context macros otherwise
+        yield '#define OGLHPP_NO_CONTEXT_MACROS\n'
+        yield '#define OGLHPP_NO_INSTRUMENT_MACROS\n'
+        yield '#include <oglhpp/gl.h>\n\n'
+
+        for extension_name, command_list in command_groups:
+            yield f'{self.__generate_loader_prototype(extension_name)} {{\n'
+            if len(command_list) == 0:
+                yield '    (void)context;\n'
+                yield '    (void)getProcAddress;\n'
+            for command in command_list:
+                command_ptr_variable_type = self.__generate_command_ptr_name(command.name)
+                yield f'    context->{command.name} = ({command_ptr_variable_type})getProcAddress("{command.name}");\n'
+            yield '}\n\n'
+
+        yield '#if !defined(OGLHPP_NO_CURRENT_CONTEXT)\n'
+        yield 'OGLHPP_THREAD_LOCAL struct oglhpp_context *oglhpp_current_context;\n\n'
+        yield 'static struct oglhpp_context oglhpp_default_context;\n\n'
+        yield 'void oglhpp_make_current(struct oglhpp_context *context) {\n'
+        yield '    oglhpp_current_context = context;\n'
+        yield '}\n\n'
+        yield '/* loads the default context and makes it current on the calling thread */\n'
+        yield 'void oglhpp_load_functions(OGLHPP_GETPROCADDRESS getProcAddress) {\n'
+        yield '    oglhpp_load_context(&oglhpp_default_context, getProcAddress);\n'
+        yield '    oglhpp_make_current(&oglhpp_default_context);\n'
+        yield '}\n'
+        yield '#endif'
+
+    def __generate_name_blob(self, names_variable_name, offsets_variable_name, names):
+        # every name is terminated by its own \\0, offsets index the start of each name in the blob
+        offsets = []
+        blob_size = 0
+        for name in names:
+            offsets.append(blob_size)
+            blob_size += len(name) + 1
+
+        yield f'static const char {names_variable_name}[] =\n'
+        for name in names:
+            yield f'    "{name}\\0"\n'
+        yield '    "";\n\n'
+
+        yield f'static const {self.__generate_index_type(blob_size)} {offsets_variable_name}[{max(len(names), 1)}] = {{\n'
+        yield from self.__generate_array_values(offsets)
+        yield '};\n\n'
+
+    def __generate_index_type(self, max_value):
+        return 'unsigned short' if max_value <= 0xFFFF else 'unsigned int'
+
+    def __generate_array_values(self, values):
+        for i in range(0, len(values), 16):
+            yield f'    {", ".join([str(value) for value in values[i:i + 16]])},\n'
+
+    def __generate_extension_enum_name(self, extension_name):
+        if extension_name.startswith('GL_'):
+            extension_name = extension_name[len('GL_'):]
+
+        return f'OGLHPP_EXT_{extension_name}'
+
+    def __generate_extension_header(self, extension_list):
+        yield '/* extension declarations */\n'
+        yield 'enum oglhpp_extension {\n'
+        for extension in extension_list:
+            yield f'    {self.__generate_extension_enum_name(extension.name)},\n'
+        yield '    OGLHPP_EXTENSION_COUNT\n'
+        yield '};\n\n'
+
+        yield '/* one bit per extension supported by the context current when oglhpp_load_extensions was called */\n'
+        yield 'extern unsigned int oglhpp_extension_bits[OGLHPP_EXTENSION_COUNT / 32 + 1];\n'
+        yield 'extern void oglhpp_load_extensions(OGLHPP_GETPROCADDRESS getProcAddress);\n'
+        yield '#define oglhpp_has_extension(extension) ((oglhpp_extension_bits[(extension) / 32] >> ((extension) % 32)) & 1u)\n'
+
+    # The displacement and slot tables of a perfect hash, and the hash function they are built for.
+    def __generate_perfect_hash(self, prefix, perfect_hash):
+        yield f'static const khronos_uint32_t {prefix}_displacements[{perfect_hash.bucket_count}] = {{\n'
+        yield from self.__generate_array_values(perfect_hash.displacements)
+        yield '};\n\n'
+
+        yield f'static const {self.__generate_index_type(len(perfect_hash.names))} {prefix}_slots[{len(perfect_hash.names)}] = {{\n'
+        yield from self.__generate_array_values(perfect_hash.slots)
+        yield '};\n\n'
+
+        yield f'static khronos_uint32_t {prefix}_hash(const char *name, size_t length) {{\n'
+        yield f'    khronos_uint32_t hash = {FNV_OFFSET_BASIS}u;\n'
+        yield '    size_t i;\n\n'
+        yield '    for (i = 0; i < length; i++) {\n'
+        yield f'        hash = (hash ^ (unsigned char)name[i]) * {FNV_PRIME}u;\n'
+        yield '    }\n\n'
+        yield '    return hash;\n'
+        yield '}\n\n'
+
+        yield f'static khronos_uint32_t {prefix}_mix(khronos_uint32_t hash) {{\n'
+        yield '    hash ^= hash >> 16;\n'
+        yield f'    hash *= 0x{MIX_MULTIPLIER_1:08X}u;\n'
+        yield '    hash ^= hash >> 13;\n'
+        yield f'    hash *= 0x{MIX_MULTIPLIER_2:08X}u;\n'
+        yield '    hash ^= hash >> 16;\n\n'
+        yield '    return hash;\n'
+        yield '}\n\n'
+
+    # oglhpp_find_proc maps the name of a generated command to the pointer loaded for it, without
+    # calling getProcAddress, by a perfect hash over the command names.
+    def __generate_find_proc_source(self, command_list):
+        names = [command.name for command in command_list]
+
+        yield '/* command lookup */\n'
+        yield '#include <string.h>\n\n'
+
+        if len(names) > 0:
+            # the table loader has the name blob already
+            if self.__loader != 'table':
+                yield from self.__generate_name_blob('oglhpp_proc_names', 'oglhpp_proc_name_offsets', names)
+
+            perfect_hash = create_perfect_hash(names)
+            yield from self.__generate_perfect_hash('oglhpp_proc', perfect_hash)
+
+            yield 'static int oglhpp_find_proc_index(const char *name) {\n'
+            yield '    khronos_uint32_t hash = oglhpp_proc_hash(name, strlen(name));\n'
+            yield f'    khronos_uint32_t displacement = oglhpp_proc_displacements[oglhpp_proc_mix(hash) % {perfect_hash.bucket_count}];\n'
+            yield f'    unsigned int index = oglhpp_proc_slots[oglhpp_proc_mix(hash ^ displacement) % {len(names)}];\n\n'
+            yield '    if (strcmp(oglhpp_proc_names + oglhpp_proc_name_offsets[index], name) != 0) {\n'
+            yield '        return -1;\n'
+            yield '    }\n\n'
+            yield '    return (int)index;\n'
+            yield '}\n\n'
+
+        if self.__loader == 'context':
+            yield 'OGLHPP_PROC oglhpp_find_context_proc(const struct oglhpp_context *context, const char *name) {\n'
+        else:
+            yield 'OGLHPP_PROC oglhpp_find_proc(const char *name) {\n'
+
+        if len(names) == 0:
+            if self.__loader == 'context':
+                yield '    (void)context;\n'
+            yield '    (void)name;\n'
+            yield '    return NULL;\n'
+        elif self.__loader == 'table':
+            yield '    int index = oglhpp_find_proc_index(name);\n\n'
+            yield '    return index >= 0 ? oglhpp_procs[index] : NULL;\n'
+        else:
+            yield '    switch (oglhpp_find_proc_index(name)) {\n'
+            for i, command in enumerate(command_list):
+                pointer = f'context->{command.name}' if self.__loader == 'context' else self.__generate_command_ptr_variable_name(command.name)
+                yield f'    case {i}: return (OGLHPP_PROC){pointer};\n'
+            yield '    default: return NULL;\n'
+            yield '    }\n'
+        yield '}\n'
+
+        if self.__loader == 'context':
+            yield '\n'
+            yield '#if !defined(OGLHPP_NO_CURRENT_CONTEXT)\n'
+            yield 'OGLHPP_PROC oglhpp_find_proc(const char *name) {\n'
+            yield '    return oglhpp_current_context != NULL ? oglhpp_find_context_proc(oglhpp_current_context, name) : NULL;\n'
+            yield '}\n'
+            yield '#endif\n'
+
+    def __generate_extension_source(self, extension_list):
+        names = [extension.name for extension in extension_list]
+
+        yield '/* extension lookup */\n'
+        yield '#include <string.h>\n\n'
+        yield 'unsigned int oglhpp_extension_bits[OGLHPP_EXTENSION_COUNT / 32 + 1];\n\n'
+
+        if len(names) > 0:
+            perfect_hash = create_perfect_hash(names)
+
+            # maps extension names to their enum value, which is also their index in the name blob
+            yield from self.__generate_name_blob('oglhpp_extension_names', 'oglhpp_extension_name_offsets', names)
+
+            yield from self.__generate_perfect_hash('oglhpp_extension', perfect_hash)
+
+        yield 'static void oglhpp_set_extension(const char *name, size_t length) {\n'
+        if len(names) > 0:
+            yield '    khronos_uint32_t hash = oglhpp_extension_hash(name, length);\n'
+            yield f'    khronos_uint32_t displacement = oglhpp_extension_displacements[oglhpp_extension_mix(hash) % {perfect_hash.bucket_count}];\n'
+            yield f'    unsigned int extension = oglhpp_extension_slots[oglhpp_extension_mix(hash ^ displacement) % {len(names)}];\n'
+            yield '    const char *candidate = oglhpp_extension_names + oglhpp_extension_name_offsets[extension];\n\n'
+            yield "    if (strncmp(candidate, name, length) == 0 && candidate[length] == '\\0') {\n"
+            yield '        oglhpp_extension_bits[extension / 32] |= 1u << (extension % 32);\n'
+            yield '    }\n'
+        else:
+            yield '    (void)name;\n'
+            yield '    (void)length;\n'
+        yield '}\n\n'
+
+        # GL_EXTENSIONS and GL_NUM_EXTENSIONS, which the target api may not define
+        yield 'typedef void (GLCALLCONV *OGLHPP_GETINTEGERVPROC)(unsigned int pname, int *data);\n'
+        yield 'typedef const unsigned char *(GLCALLCONV *OGLHPP_GETSTRINGPROC)(unsigned int name);\n'
+        yield 'typedef const unsigned char *(GLCALLCONV *OGLHPP_GETSTRINGIPROC)(unsigned int name, unsigned int index);\n\n'
+        yield 'void oglhpp_load_extensions(OGLHPP_GETPROCADDRESS getProcAddress) {\n'
+        yield '    OGLHPP_GETINTEGERVPROC getIntegerv = (OGLHPP_GETINTEGERVPROC)getProcAddress("glGetIntegerv");\n'
+        yield '    OGLHPP_GETSTRINGPROC getString = (OGLHPP_GETSTRINGPROC)getProcAddress("glGetString");\n'
+        yield '    OGLHPP_GETSTRINGIPROC getStringi = (OGLHPP_GETSTRINGIPROC)getProcAddress("glGetStringi");\n'
+        yield '    int count = 0;\n'
+        yield '    int i;\n\n'
+        yield '    memset(oglhpp_extension_bits, 0, sizeof(oglhpp_extension_bits));\n\n'
+        yield '    /* one name at a time where glGetStringi is available, the space separated list otherwise */\n'
+        yield '    if (getIntegerv != NULL && getStringi != NULL) {\n'
+        yield '        getIntegerv(0x821D, &count);\n'
+        yield '    }\n\n'
+        yield '    if (count > 0) {\n'
+        yield '        for (i = 0; i < count; i++) {\n'
+        yield '            const char *name = (const char *)getStringi(0x1F03, (unsigned int)i);\n\n'
+        yield '            if (name != NULL) {\n'
+        yield '                oglhpp_set_extension(name, strlen(name));\n'
+        yield '            }\n'
+        yield '        }\n'
+        yield '    } else if (getString != NULL) {\n'
+        yield '        const char *name = (const char *)getString(0x1F03);\n\n'
+        yield "        while (name != NULL && *name != '\\0') {\n"
+        yield "            size_t length = strcspn(name, \" \");\n\n"
+        yield '            if (length > 0) {\n'
+        yield '                oglhpp_set_extension(name, length);\n'
+        yield '            }\n\n'
+        yield "            name += length;\n"
+        yield "            while (*name == ' ') {\n"
+        yield '                name++;\n'
+        yield '            }\n'
+        yield '        }\n'
+        yield '    }\n'
+        yield '}\n'
+
+    def __generate_enum_name_header(self):
+        yield '/* enum names, define OGLHPP_NO_ENUM_NAMES to leave out their table */\n'
+        yield '#ifndef OGLHPP_NO_ENUM_NAMES\n'
+        yield '/* the name of a GLenum value, or NULL when it is not one of the generated enums */\n'
+        yield 'extern const char *oglhpp_enum_name(unsigned int value);\n'
+        yield '#endif\n'
+
+    def __generate_enum_name_source(self, enum_name_list):
+        yield '/* enum names */\n'
+        yield '#ifndef OGLHPP_NO_ENUM_NAMES\n'
+
+        if len(enum_name_list) > 0:
+            # sorted by value, for a binary search, with the name of every value at the same index
+            yield f'static const khronos_uint32_t oglhpp_enum_values[{len(enum_name_list)}] = {{\n'
+            yield from self.__generate_array_values([f'0x{value:X}u' for value, name in enum_name_list])
+            yield '};\n\n'
+
+            yield from self.__generate_name_blob('oglhpp_enum_names', 'oglhpp_enum_name_offsets',
+                                                 [name for value, name in enum_name_list])
+
+        yield 'const char *oglhpp_enum_name(unsigned int value) {\n'
+        if len(enum_name_list) > 0:
+            yield '    size_t low = 0;\n'
+            yield f'    size_t high = {len(enum_name_list)};\n\n'
+            yield '    while (low < high) {\n'
+            yield '        size_t middle = low + (high - low) / 2;\n\n'
+            yield '        if (oglhpp_enum_values[middle] < value) {\n'
+            yield '            low = middle + 1;\n'
+            yield '        } else {\n'
+            yield '            high = middle;\n'
+            yield '        }\n'
+            yield '    }\n\n'
+            yield f'    if (low < {len(enum_name_list)} && oglhpp_enum_values[low] == value) {{\n'
+            yield '        return oglhpp_enum_names + oglhpp_enum_name_offsets[low];\n'
+            yield '    }\n\n'
+        else:
+            yield '    (void)value;\n'
+        yield '    return NULL;\n'
+        yield '}\n'
+        yield '#endif\n'
+
+    # Defining OGLHPP_INSTRUMENT, in gl.c and in every translation unit including gl.h, routes every
+    # command through a generated shim, which counts its calls and calls the hooks set with
+    # oglhpp_set_instrument_hooks before and after it. Commands are identified by their index in the
+    # generated order, which oglhpp_command_name maps back to their name. Without OGLHPP_INSTRUMENT,
+    # none of it is compiled.
+    def __generate_instrument_condition(self):
+        # the shims of the context loader call through the context current on the calling thread
+        if self.__loader == 'context':
+            return 'defined(OGLHPP_INSTRUMENT) && !defined(OGLHPP_NO_CURRENT_CONTEXT)'
+
+        return 'defined(OGLHPP_INSTRUMENT)'
+
+    def __generate_instrument_header(self, command_list):
+        yield '/* instrumentation, define OGLHPP_INSTRUMENT everywhere gl.h is included to count and hook every command call */\n'
+        yield f'#if {self.__generate_instrument_condition()}\n'
+        yield f'#define OGLHPP_COMMAND_COUNT {len(command_list)}\n'
+        yield 'typedef void (*OGLHPP_INSTRUMENT_HOOK)(unsigned int command);\n'
+        yield '/* hooks are called before and after every command, NULL disables them */\n'
+        yield 'extern void oglhpp_set_instrument_hooks(OGLHPP_INSTRUMENT_HOOK before, OGLHPP_INSTRUMENT_HOOK after);\n'
+        yield 'extern khronos_uint64_t oglhpp_call_count(unsigned int command);\n'
+        yield 'extern const char *oglhpp_command_name(unsigned int command);\n'
+        yield 'extern void oglhpp_stats_reset(void);\n'
+        yield '/* prints the name and call count of every command called since the last reset to stderr */\n'
+        yield 'extern void oglhpp_stats_dump(void);\n'
+        yield '#endif\n'
+
+    def __generate_instrument_macros(self, command_list):
+        yield f'#if {self.__generate_instrument_condition()}\n'
+        for command in command_list:
+            return_type_str = self.__generate_command_return_type(command.return_type)
+            params_str = ', '.join([self.__generate_command_param(param) for param in command.params])
+            name = self.__generate_command_instrument_name(command.name)
+
+            yield f'GLAPI {return_type_str} GLCALLCONV {name}({params_str if params_str != "" else "void"});\n'
+
+        yield '\n#if !defined(OGLHPP_NO_INSTRUMENT_MACROS)\n'
+        for command in command_list:
+            yield f'#undef {command.name}\n'
+            yield f'#define {command.name} {self.__generate_command_instrument_name(command.name)}\n'
+        yield '#endif\n'
+        yield '#endif\n'
+
+    def __generate_instrument_source(self, command_list):
+        yield '/* instrumentation */\n'
+        yield f'#if {self.__generate_instrument_condition()}\n'
+        yield '#include <stdio.h>\n\n'
+        yield '#if defined(_MSC_VER)\n'
+        yield '  #include <intrin.h>\n'
+        yield '  #define OGLHPP_ATOMIC_INCREMENT(counter) _InterlockedIncrement64((volatile __int64 *)&(counter))\n'
+        yield '#elif defined(__GNUC__) || defined(__clang__)\n'
+        yield '  #define OGLHPP_ATOMIC_INCREMENT(counter) __atomic_fetch_add(&(counter), 1, __ATOMIC_RELAXED)\n'
+        yield '#else\n'
+        yield '  #define OGLHPP_ATOMIC_INCREMENT(counter) ((counter)++)\n'
+        yield '#endif\n\n'
+
+        yield f'static khronos_uint64_t oglhpp_call_counts[{max(len(command_list), 1)}];\n'
+        yield 'static OGLHPP_INSTRUMENT_HOOK oglhpp_before_hook;\n'
+        yield 'static OGLHPP_INSTRUMENT_HOOK oglhpp_after_hook;\n\n'
+        yield from self.__generate_name_blob('oglhpp_command_names', 'oglhpp_command_name_offsets',
+                                             [command.name for command in command_list])
+
+        yield 'void oglhpp_set_instrument_hooks(OGLHPP_INSTRUMENT_HOOK before, OGLHPP_INSTRUMENT_HOOK after) {\n'
+        yield '    oglhpp_before_hook = before;\n'
+        yield '    oglhpp_after_hook = after;\n'
+        yield '}\n\n'
+        yield 'khronos_uint64_t oglhpp_call_count(unsigned int command) {\n'
+        yield '    return command < OGLHPP_COMMAND_COUNT ? oglhpp_call_counts[command] : 0;\n'
+        yield '}\n\n'
+        yield 'const char *oglhpp_command_name(unsigned int command) {\n'
+        yield '    return command < OGLHPP_COMMAND_COUNT ? oglhpp_command_names + oglhpp_command_name_offsets[command] : NULL;\n'
+        yield '}\n\n'
+        yield 'void oglhpp_stats_reset(void) {\n'
+        yield '    memset(oglhpp_call_counts, 0, sizeof(oglhpp_call_counts));\n'
+        yield '}\n\n'
+        yield 'void oglhpp_stats_dump(void) {\n'
+        yield '    unsigned int i;\n\n'
+        yield '    for (i = 0; i < OGLHPP_COMMAND_COUNT; i++) {\n'
+        yield '        if (oglhpp_call_counts[i] > 0) {\n'
+        yield '            fprintf(stderr, "%s %llu\\n", oglhpp_command_name(i), (unsigned long long)oglhpp_call_counts[i]);\n'
+        yield '        }\n'
+        yield '    }\n'
+        yield '}\n\n'
+
+        yield 'static void oglhpp_enter_command(unsigned int command) {\n'
+        yield '    OGLHPP_ATOMIC_INCREMENT(oglhpp_call_counts[command]);\n\n'
+        yield '    if (oglhpp_before_hook != NULL) {\n'
+        yield '        oglhpp_before_hook(command);\n'
+        yield '    }\n'
+        yield '}\n\n'
+        yield 'static void oglhpp_leave_command(unsigned int command) {\n'
+        yield '    if (oglhpp_after_hook != NULL) {\n'
+        yield '        oglhpp_after_hook(command);\n'
+        yield '    }\n'
+        yield '}\n'
+
+        for i, command in enumerate(command_list):
+            yield '\n'
+            yield f'{self.__generate_command_instrument_shim(command, i)}\n'
+
+        yield '#endif\n'
+
+    def __generate_command_instrument_name(self, command_name):
+        return f'oglhpp_instrumented_{command_name}'
+
+    def __generate_command_instrument_shim(self, command, index):
+        return_type_str = self.__generate_command_return_type(command.return_type)
+        params_str = ', '.join([self.__generate_command_param(param) for param in command.params])
+        args_str = ', '.join([param.name for param in command.params])
+        name = self.__generate_command_instrument_name(command.name)
+
+        # the dispatch table is not named by macros in gl.c
+        call_str = f'oglhpp_current_context->{command.name}' if self.__loader == 'context' else command.name
+
+        if self.__is_void_return_type(command.return_type):
+            return (f'{return_type_str} GLCALLCONV {name}({params_str if params_str != "" else "void"}) {{\n'
+                    f'    oglhpp_enter_command({index});\n'
+                    f'    {call_str}({args_str});\n'
+                    f'    oglhpp_leave_command({index});\n'
+                    f'}}')
+
+        return (f'{return_type_str} GLCALLCONV {name}({params_str if params_str != "" else "void"}) {{\n'
+                f'    {return_type_str} result;\n\n'
+                f'    oglhpp_enter_command({index});\n'
+                f'    result = {call_str}({args_str});\n'
+                f'    oglhpp_leave_command({index});\n\n'
+                f'    return result;\n'
+                f'}}')
+
+    def __is_recordable(self, command):
+        if not self.__is_void_return_type(command.return_type):
+            return False
+
+        # a len marks an array, even where the parser saw no pointer
+        return all((param.pointer_indirection == 0 and param.len is None) or
+                   self.__generate_record_array_size(command, param) is not None
+                   for param in command.params)
+
+    # Returns the size in bytes of the array a pointer parameter points to, as a C expression, or
+    # None when it is not known.
+    def __generate_record_array_size(self, command, param):
+        if param.pointer_indirection != 1 or not param.is_const:
+            return None
+
+        element_size = '1' if param.is_void else f'sizeof({param.data_type})'
+
+        if param.len is None:
+            if param.data_type == 'GLchar' and not param.is_void:
+                return f'strlen({param.name}) + 1'
+
+            return None
+
+        match = COMMAND_BUFFER_LEN_PATTERN.fullmatch(param.len)
+        if match is None:
+            return None
+
+        count, factor = match.groups()
+        if factor is not None:
+            element_size = f'{factor} * {element_size}'
+
+        if count.isdigit():
+            return f'{count} * {element_size}'
+
+        count_params = [count_param for count_param in command.params if count_param.name == count]
+        if len(count_params) == 0 or count_params[0].pointer_indirection != 0:
+            return None
+
+        return f'oglhpp_array_size((double){count}, {element_size})'
+
+    def __generate_record_name(self, command_name):
+        return f'oglhpp_record_{command_name}'
+
+    def __generate_record_prototype(self, command):
+        params_str = ''.join([f', {self.__generate_command_param(param)}' for param in command.params])
+
+        return f'void {self.__generate_record_name(command.name)}(struct oglhpp_command_buffer *command_buffer{params_str})'
+
+    def __generate_command_buffer_header(self, command_list, unrecordable_count):
+        yield self.__generate_header_prologue('__OGLHPP_COMMAND_BUFFER_H__')
+        yield '#include <oglhpp/gl.h>\n'
+        yield '#include <stddef.h>\n\n'
+        yield self.__generate_header_extern_c()
+
+        yield '/* commands recorded in a contiguous arena, used by one thread at a time, failed is set when growing it fails */\n'
+        yield 'struct oglhpp_command_buffer {\n'
+        yield '    unsigned char *data;\n'
+        yield '    size_t size;\n'
+        yield '    size_t capacity;\n'
+        yield '    int failed;\n'
+        yield '};\n\n'
+        yield 'extern void oglhpp_command_buffer_init(struct oglhpp_command_buffer *command_buffer);\n'
+        yield '/* forgets the recorded commands, and keeps the arena for the next ones */\n'
+        yield 'extern void oglhpp_command_buffer_reset(struct oglhpp_command_buffer *command_buffer);\n'
+        yield 'extern void oglhpp_command_buffer_free(struct oglhpp_command_buffer *command_buffer);\n'
+        yield '/* calls the recorded commands in order, on the thread of the context */\n'
+        yield 'extern void oglhpp_command_buffer_replay(const struct oglhpp_command_buffer *command_buffer);\n\n'
+
+        yield f'/* record functions, {unrecordable_count} commands returning a value or taking arrays of unknown size have none */\n'
+        for command in command_list:
+            yield f'extern {self.__generate_record_prototype(command)};\n'
+
+        yield self.__generate_header_epilogue()
+
+    def __generate_command_buffer_source(self, command_list):
+        yield '#include <oglhpp/command_buffer.h>\n'
+        yield '#include <stdlib.h>\n'
+        yield '#include <string.h>\n\n'
+
+        # every record starts with its header, and at an offset aligned for any of its members
+        yield 'struct oglhpp_command_header {\n'
+        yield '    unsigned int op;\n'
+        yield '    unsigned int size;\n'
+        yield '};\n\n'
+        yield '#define OGLHPP_COMMAND_ALIGN(size) (((size) + 7) & ~(size_t)7)\n\n'
+
+        yield 'enum oglhpp_op {\n'
+        for command in command_list:
+            yield f'    OGLHPP_OP_{command.name},\n'
+        yield '    OGLHPP_OP_COUNT\n'
+        yield '};\n\n'
+
+        # arrays are copied after the members of the record, which hold their offset in it, or 0 for NULL
+        for command in command_list:
+            yield f'struct oglhpp_record_{command.name} {{\n'
+            yield '    struct oglhpp_command_header header;\n'
+            for param in command.params:
+                if param.pointer_indirection == 0:
+                    yield f'    {param.data_type} {param.name};\n'
+                else:
+                    yield f'    size_t {param.name};\n'
+            yield '};\n\n'
+
+        yield 'void oglhpp_command_buffer_init(struct oglhpp_command_buffer *command_buffer) {\n'
+        yield '    memset(command_buffer, 0, sizeof(*command_buffer));\n'
+        yield '}\n\n'
+        yield 'void oglhpp_command_buffer_reset(struct oglhpp_command_buffer *command_buffer) {\n'
+        yield '    command_buffer->size = 0;\n'
+        yield '    command_buffer->failed = 0;\n'
+        yield '}\n\n'
+        yield 'void oglhpp_command_buffer_free(struct oglhpp_command_buffer *command_buffer) {\n'
+        yield '    free(command_buffer->data);\n'
+        yield '    oglhpp_command_buffer_init(command_buffer);\n'
+        yield '}\n\n'
+
+        yield 'static void *oglhpp_command_buffer_push(struct oglhpp_command_buffer *command_buffer, unsigned int op, size_t size) {\n'
+        yield '    struct oglhpp_command_header *header;\n\n'
+        yield '    size = OGLHPP_COMMAND_ALIGN(size);\n\n'
+        yield '    if (command_buffer->failed || size > 0xFFFFFFFFu) {\n'
+        yield '        command_buffer->failed = 1;\n'
+        yield '        return NULL;\n'
+        yield '    }\n\n'
+        yield '    if (command_buffer->capacity - command_buffer->size < size) {\n'
+        yield '        size_t capacity = command_buffer->capacity > 0 ? command_buffer->capacity : 4096;\n'
+        yield '        unsigned char *data;\n\n'
+        yield '        while (capacity - command_buffer->size < size) {\n'
+        yield '            capacity *= 2;\n'
+        yield '        }\n\n'
+        yield '        data = (unsigned char *)realloc(command_buffer->data, capacity);\n'
+        yield '        if (data == NULL) {\n'
+        yield '            command_buffer->failed = 1;\n'
+        yield '            return NULL;\n'
+        yield '        }\n\n'
+        yield '        command_buffer->data = data;\n'
+        yield '        command_buffer->capacity = capacity;\n'
+        yield '    }\n\n'
+        yield '    header = (struct oglhpp_command_header *)(command_buffer->data + command_buffer->size);\n'
+        yield '    header->op = op;\n'
+        yield '    header->size = (unsigned int)size;\n'
+        yield '    command_buffer->size += size;\n\n'
+        yield '    return header;\n'
+        yield '}\n\n'
+
+        # the array helpers, unused when no recorded command takes an array
+        if any(param.pointer_indirection != 0 for command in command_list for param in command.params):
+            yield '/* the size of count elements, 0 for negative counts, huge ones fail the push */\n'
+            yield 'static size_t oglhpp_array_size(double count, size_t element_size) {\n'
+            yield '    if (count <= 0) {\n'
+            yield '        return 0;\n'
+            yield '    }\n\n'
+            yield '    return count * element_size < 0xFFFFFFFFu ? (size_t)count * element_size : 0xFFFFFFFFu;\n'
+            yield '}\n\n'
+
+            yield 'static size_t oglhpp_record_array(void *record, size_t *offset, const void *data, size_t size) {\n'
+            yield '    size_t data_offset = *offset;\n\n'
+            yield '    if (data == NULL) {\n'
+            yield '        return 0;\n'
+            yield '    }\n\n'
+            yield '    memcpy((unsigned char *)record + data_offset, data, size);\n'
+            yield '    *offset += OGLHPP_COMMAND_ALIGN(size);\n\n'
+            yield '    return data_offset;\n'
+            yield '}\n\n'
+
+            yield 'static const void *oglhpp_replay_array(const void *record, size_t offset) {\n'
+            yield '    return offset != 0 ? (const unsigned char *)record + offset : NULL;\n'
+            yield '}\n\n'
+
+        yield from self.__join_chunks('\n', [self.__generate_record_function(command) for command in command_list])
+        yield from self.__generate_replay_function(command_list)
+
+    def __generate_replay_function(self, command_list):
+        yield '\n'
+        yield 'void oglhpp_command_buffer_replay(const struct oglhpp_command_buffer *command_buffer) {\n'
+        yield '    size_t offset = 0;\n\n'
+        yield '    while (offset < command_buffer->size) {\n'
+        yield '        const void *record = command_buffer->data + offset;\n'
+        yield '        const struct oglhpp_command_header *header = (const struct oglhpp_command_header *)record;\n\n'
+        yield '        switch (header->op) {\n'
+        for command in command_list:
+            args = []
+            for param in command.params:
+                if param.pointer_indirection == 0:
+                    args.append(f'((const struct oglhpp_record_{command.name} *)record)->{param.name}')
+                else:
+                    param_type = f'const {"void" if param.is_void else param.data_type} *'
+                    args.append(f'({param_type})oglhpp_replay_array(record, ((const struct oglhpp_record_{command.name} *)record)->{param.name})')
+
+            yield f'        case OGLHPP_OP_{command.name}:\n'
+            yield f'            {self.__generate_command_ptr_variable_name(command.name)}({", ".join(args)});\n'
+            yield '            break;\n'
+        yield '        }\n\n'
+        yield '        offset += header->size;\n'
+        yield '    }\n'
+        yield '}\n'
+
+    def __generate_record_function(self, command):
+        record_type = f'struct oglhpp_record_{command.name}'
+        array_params = [param for param in command.params if param.pointer_indirection != 0]
+
+        yield f'{self.__generate_record_prototype(command)} {{\n'
+        yield f'    {record_type} *command_record;\n'
+        if len(array_params) > 0:
+            yield f'    size_t array_offset = OGLHPP_COMMAND_ALIGN(sizeof({record_type}));\n'
+            for param in array_params:
+                yield f'    size_t {param.name}_size = {param.name} != NULL ? {self.__generate_record_array_size(command, param)} : 0;\n'
+        yield '\n'
+
+        size_str = ' + '.join([f'OGLHPP_COMMAND_ALIGN(sizeof({record_type}))'] +
+                              [f'OGLHPP_COMMAND_ALIGN({param.name}_size)' for param in array_params])
+        yield f'    command_record = ({record_type} *)oglhpp_command_buffer_push(command_buffer, OGLHPP_OP_{command.name}, {size_str});\n'
+        yield '    if (command_record == NULL) {\n'
+        yield '        return;\n'
+        yield '    }\n'
+
+        if len(command.params) > 0:
+            yield '\n'
+        for param in command.params:
+            if param.pointer_indirection == 0:
+                yield f'    command_record->{param.name} = {param.name};\n'
+            else:
+                yield f'    command_record->{param.name} = oglhpp_record_array(command_record, &array_offset, {param.name}, {param.name}_size);\n'
+        yield '}\n'
+
+    def __generate_command_ptr_macro(self, command, index):
+        type_name = self.__generate_command_ptr_name(command.name)
+        variable_name = self.__generate_command_ptr_variable_name(command.name)
+
+        return f'#define {variable_name} (({type_name})oglhpp_procs[{index}])'
 
-        code += '}'
+    def __generate_command_trampoline_name(self, command_name):
+        return f'oglhpp_lazy_{command_name}'
 
-        return code
+    def __generate_command_trampoline(self, command):
+        return_type_str = self.__generate_command_return_type(command.return_type)
+        params_str = ', '.join([self.__generate_command_param(param) for param in command.params])
+        args_str = ', '.join([param.name for param in command.params])
+        name = self.__generate_command_trampoline_name(command.name)
+        command_ptr_variable_type = self.__generate_command_ptr_name(command.name)
+        command_ptr_variable_name = self.__generate_command_ptr_variable_name(command.name)
+
+        return_str = '' if self.__is_void_return_type(command.return_type) else 'return '
+
+        return (f'static {return_type_str} GLCALLCONV {name}({params_str if params_str != "" else "void"}) {{\n'
+                f'    {command_ptr_variable_name} = ({command_ptr_variable_type})oglhpp_getProcAddress("{command.name}");\n'
+                f'    {return_str}{command_ptr_variable_name}({args_str});\n'
+                f'}}')
+
+    def __is_void_return_type(self, return_type):
+        return return_type.name == 'void' and not return_type.is_pointer
 
     def __generate_type(self, type):
         return type.c_definition
@@ -189,13 +1354,14 @@ extern "C" {
     def __generate_command_ptr_variable_name(self, command_name):
         return f'{command_name}'
 
-    def __generate_command_ptr_variable(self, command, extern = False):
+    def __generate_command_ptr_variable(self, command, extern = False, initializer = None):
         type_name = self.__generate_command_ptr_name(command.name)
         variable_name = self.__generate_command_ptr_variable_name(command.name)
 
         extern_str = 'extern ' if extern else ''
+        initializer_str = f' = {initializer}' if initializer is not None else ''
 
-        return f'{extern_str}{type_name} {variable_name};'
+        return f'{extern_str}{type_name} {variable_name}{initializer_str};'
 
     def __generate_command_prototype(self, command):
         return_type_str = self.__generate_command_return_type(command.return_type)
@@ -212,6 +1378,49 @@ extern "C" {
         else:
             return f'{"const " if param.is_const else ""}{param.data_type}{"*"*param.pointer_indirection} {param.name}'
 
+    # used_names, as found by oglhppgen.usage.UsageScanner, trims the features and extensions down to
+    # the commands and enums it contains, with the types they need.
+    def __is_used(self, name):
+        return self.__used_names is None or name in self.__used_names
+
+    # Returns copies of the features holding only the requires of the profile, without what the
+    # features remove from it, and without the unused commands and enums.
+    def __filter_features(self, features):
+        removed_type_name_set = set()
+        removed_enum_name_set = set()
+        removed_command_name_set = set()
+
+        for feature in features:
+            for remove in feature.remove_list:
+                if remove.profile not in ('', self.__profile):
+                    continue
+
+                removed_type_name_set.update([type_ref.name for type_ref in remove.type_list])
+                removed_enum_name_set.update([enum_ref.name for enum_ref in remove.enum_list])
+                removed_command_name_set.update([command_ref.name for command_ref in remove.command_list])
+
+        profile_features = []
+        for feature in features:
+            require_list = []
+
+            for require in feature.require_list:
+                if require.profile is not None and require.profile != self.__profile:
+                    continue
+
+                require_list.append(Require(
+                    type_list=[type_ref for type_ref in require.type_list if type_ref.name not in removed_type_name_set],
+                    enum_list=[enum_ref for enum_ref in require.enum_list
+                               if enum_ref.name not in removed_enum_name_set and self.__is_used(enum_ref.name)],
+                    command_list=[command_ref for command_ref in require.command_list
+                                  if command_ref.name not in removed_command_name_set and self.__is_used(command_ref.name)],
+                    api=require.api,
+                    profile=require.profile))
+
+            profile_features.append(Feature(api=feature.api, name=feature.name, number=feature.number,
+                                            require_list=require_list, remove_list=feature.remove_list))
+
+        return profile_features
+
     def __collect_features(self, api, number):
         features = []
         feature_by_number = self.__feature_by_api_number[api]
@@ -0,0 +1,32 @@
+from oglhpp.glregistry import RepositoryBuilder
+from oglhppgen.streaming import RegistryStream, RegistryBuilder
+
+
+# Parses gl.xml once and derives both models from the same stream of elements: the
+# oglhppgen.model.Registry used by C_Generator and the oglhpp.glregistry.Repository used by
+# hppgenerator.CodeGenerator. Each element is handed to both builders and freed right after.
+
+class RegistryFrontend:
+    def __init__(self, compact=True):
+        self.compact = compact
+
+    def parse(self, source):
+        registry_builder = RegistryBuilder(compact=self.compact)
+        repository_builder = RepositoryBuilder(compact=self.compact)
+
+        RegistryStream(source).run([registry_builder, repository_builder])
+
+        return registry_builder.registry(), repository_builder.repository()
+
+
+# The Repository alone, in a single streaming pass, without the minidom tree of GLXMLParser.
+
+class StreamingRepositoryFactory:
+    def __init__(self, compact=True):
+        self.compact = compact
+
+    def create_repository(self, source):
+        builder = RepositoryBuilder(compact=self.compact)
+        RegistryStream(source).run([builder])
+
+        return builder.repository()
@@ -0,0 +1,180 @@
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+
+from oglhppgen.output import generator_sources
+from oglhppgen.registry_cache import hash_file
+
+
+# Content addressed cache of finished generator outputs. An entry maps the relative output file
+# names of one target to their contents, and is keyed by the hash of the registry file, the
+# generator and its version, the target selection and the generator options, so a hit needs
+# neither the registry nor the generator. The key also covers the sources of the generator
+# packages, parser versions included, so editing the generator invalidates the entries even
+# when nobody bumps a version.
+#
+# An entry is written while the outputs are generated, one output after the other, so that they
+# never have to be held whole: see open_entry. It holds the UTF-8 contents of its outputs back to
+# back, followed by a pickled index of their names and sizes, and the offset of that index.
+#
+# Entries are touched on every hit, and the least recently used ones are evicted once the cache
+# grows beyond max_bytes.
+
+ENTRY_TRAILER = struct.Struct("<Q")
+
+
+class CacheEntryFile:
+    def __init__(self, entry, filename_suffix):
+        self.__entry = entry
+        self.filename_suffix = filename_suffix
+        self.size = 0
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.size += len(data)
+        self.__entry.file.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__entry.index.append((self.filename_suffix, self.size))
+        return False
+
+
+# An entry being written, stored under its key when the with block exits without exception. Its
+# outputs must be written one at a time.
+class CacheEntry:
+    def __init__(self, cache, entry_path):
+        self.__cache = cache
+        self.__entry_path = entry_path
+        self.index = []
+
+        os.makedirs(cache.cache_dir, exist_ok=True)
+
+        fd, self.__temp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb", buffering=1 << 16)
+
+    def open(self, filename_suffix):
+        return CacheEntryFile(self, filename_suffix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.file.close()
+            os.remove(self.__temp_path)
+            return False
+
+        try:
+            index_offset = self.file.tell()
+            pickle.dump(self.index, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.file.write(ENTRY_TRAILER.pack(index_offset))
+            self.file.close()
+
+            os.replace(self.__temp_path, self.__entry_path)
+        except BaseException:
+            self.file.close()
+            os.remove(self.__temp_path)
+            raise
+
+        self.__cache.evict()
+        return False
+
+
+class GenerationCache:
+    def __init__(self, cache_dir, max_bytes=64 << 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.__sources_hash = None
+
+    def key(self, registry_hash, generator, generator_version, target, options=None):
+        options = {} if options is None else options
+        description = repr((registry_hash, self.sources_hash(), generator, generator_version, tuple(target),
+                            sorted(options.items())))
+
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    # hashed once per cache, the generator does not change while it runs
+    def sources_hash(self):
+        if self.__sources_hash is None:
+            digest = hashlib.sha256()
+
+            for source_path in generator_sources():
+                package_path = os.path.join(os.path.basename(os.path.dirname(source_path)), os.path.basename(source_path))
+                digest.update(f"{package_path}:{hash_file(source_path)}\n".encode())
+
+            self.__sources_hash = digest.hexdigest()
+
+        return self.__sources_hash
+
+    def __entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.entry")
+
+    def lookup(self, key):
+        entry_path = self.__entry_path(key)
+
+        try:
+            with open(entry_path, "rb") as file:
+                data = file.read()
+
+            index_offset, = ENTRY_TRAILER.unpack(data[-ENTRY_TRAILER.size:])
+            index = pickle.loads(data[index_offset:-ENTRY_TRAILER.size])
+
+            outputs = {}
+            offset = 0
+            for filename_suffix, size in index:
+                outputs[filename_suffix] = data[offset:offset + size].decode("utf-8")
+                offset += size
+
+            os.utime(entry_path)
+        except (OSError, EOFError, ValueError, TypeError, struct.error, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return outputs
+
+    def open_entry(self, key):
+        return CacheEntry(self, self.__entry_path(key))
+
+    def store(self, key, outputs):
+        with self.open_entry(key) as entry:
+            for filename_suffix, text in outputs.items():
+                with entry.open(filename_suffix) as file:
+                    file.write(text)
+
+    def evict(self):
+        entries = []
+        total_size = 0
+
+        for entry_name in os.listdir(self.cache_dir):
+            if not entry_name.endswith(".entry"):
+                continue
+
+            entry_path = os.path.join(self.cache_dir, entry_name)
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        entries.sort()
+
+        for mtime, size, entry_path in entries:
+            if total_size <= self.max_bytes:
+                break
+
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+            total_size -= size
@@ -1,5 +1,12 @@
 from xml.dom.minidom import Node
 
+from oglhpp.util import Interner
+
+
+# Bump whenever the model classes or the way they are built from gl.xml change,
+# so cached registries built by older versions are discarded.
+PARSER_VERSION = 4
+
 
 # Type is used here to denote:
 # 1. Header requirements (khrplatform.h)
@@ -10,6 +17,8 @@ from xml.dom.minidom import Node
 #
 
 class Type:
+    __slots__ = ("name", "c_definition", "requires", "comment")
+
     def __init__(self, name, c_definition, requires=None, comment=None):
         self.name = name
         self.c_definition = c_definition
@@ -21,6 +30,8 @@ class Type:
 
 
 class Enum:
+    __slots__ = ("value", "name", "group", "alias", "comment")
+
     def __init__(self, value, name, group=None, alias=None, comment=None):
         self.value = value
         self.name = name
@@ -33,6 +44,8 @@ class Enum:
 
 
 class Enums:
+    __slots__ = ("namespace", "group", "enum_group_type", "enum_dict", "start", "end", "vendor", "comment")
+
     def __init__(self, namespace, group, enums_type, enum_dict, start=None, end=None, vendor=None, comment=None):
         self.namespace = namespace
         self.group = None if group == '' else group
@@ -48,6 +61,8 @@ class Enums:
 
 
 class TypeDecl:
+    __slots__ = ("name", "is_pointer", "is_const")
+
     def __init__(self, name, is_pointer=False, is_const=False):
         self.name = name
         self.is_pointer = is_pointer
@@ -58,6 +73,8 @@ class TypeDecl:
 
 
 class Command:
+    __slots__ = ("name", "return_type", "params")
+
     def __init__(self):
         self.name = None
         self.return_type = None
@@ -71,6 +88,8 @@ class Command:
 
 
 class CommandParam:
+    __slots__ = ("group", "data_type", "pointer_indirection", "name", "len", "is_const", "is_void")
+
     def __init__(self, group, data_type, pointer_indirection, name, len, is_const, is_void):
         self.group = group if group != "" else None
         self.data_type = data_type
@@ -88,6 +107,8 @@ class CommandParam:
 
 
 class TypeRef:
+    __slots__ = ("name", "comment")
+
     def __init__(self, name, comment):
         self.name = name
         self.comment = None if comment == "" else comment
@@ -97,6 +118,8 @@ class TypeRef:
 
 
 class EnumRef:
+    __slots__ = ("name", "comment")
+
     def __init__(self, name, comment):
         self.name = name
         self.comment = None if comment == "" else comment
@@ -106,6 +129,8 @@ class EnumRef:
 
 
 class CommandRef:
+    __slots__ = ("name", "comment")
+
     def __init__(self, name, comment):
         self.name = name
         self.comment = None if comment == "" else comment
@@ -115,13 +140,19 @@ class CommandRef:
 
 
 class Require:
-    def __init__(self, type_list, enum_list, command_list):
+    __slots__ = ("type_list", "enum_list", "command_list", "api", "profile")
+
+    def __init__(self, type_list, enum_list, command_list, api=None, profile=None):
         self.type_list = type_list
         self.enum_list = enum_list
         self.command_list = command_list
+        self.api = None if api == '' else api
+        self.profile = None if profile == '' else profile
 
 
 class Remove:
+    __slots__ = ("profile", "comment", "type_list", "enum_list", "command_list")
+
     def __init__(self, profile, comment, type_list, enum_list, command_list) -> None:
         self.profile = profile
         self.comment = comment
@@ -130,6 +161,8 @@ class Remove:
         self.command_list = command_list
 
 class Feature:
+    __slots__ = ("api", "name", "number", "require_list", "remove_list")
+
     def __init__(self, api, name, number, require_list=None, remove_list=None):
         self.api = api
         self.name = name
@@ -145,6 +178,8 @@ class Feature:
 
 
 class Extension:
+    __slots__ = ("name", "supported", "require_list")
+
     def __init__(self, name, supported, require_list):
         self.name = name
         self.supported = supported
@@ -158,6 +193,8 @@ class Extension:
 
 
 class Extensions:
+    __slots__ = ("extension_list",)
+
     def __init__(self, extension_list):
         self.extension_list = extension_list
 
@@ -179,6 +216,9 @@ class Registry:
 
 
 class RegistryFactory:
+    def __init__(self, compact=True):
+        self.__interner = Interner(enabled=compact)
+
     def create_registry(self, root_node):
         return Registry(
             types_list=self.__extract_type_definitions(root_node),
@@ -205,18 +245,18 @@ class RegistryFactory:
             self.__display(child, level + 1)
 
     def __try_create_type_with_name_attrib(self, type_node):
-        name = type_node.getAttribute("name")
+        name = self.__interner.string(type_node.getAttribute("name"))
 
         if name == '':
             return None
 
-        requires = type_node.getAttribute("requires")
+        requires = self.__interner.string(type_node.getAttribute("requires"))
         if requires == '':
             requires = None
 
         c_definition = self.__create_c_definition(type_node)
 
-        comment = type_node.getAttribute("comment")
+        comment = self.__interner.string(type_node.getAttribute("comment"))
         if comment == '':
             comment = None
 
@@ -227,18 +267,18 @@ class RegistryFactory:
 
         for child in type_node.childNodes:
             if child.nodeType == Node.ELEMENT_NODE and child.tagName == "name":
-                name = child.firstChild.data.strip()
+                name = self.__interner.string(child.firstChild.data.strip())
 
         if name is None:
             return None
 
-        requires = type_node.getAttribute("requires")
+        requires = self.__interner.string(type_node.getAttribute("requires"))
         if requires == '':
             requires = None
 
         c_definition = self.__create_c_definition(type_node)
 
-        comment = type_node.getAttribute("comment")
+        comment = self.__interner.string(type_node.getAttribute("comment"))
         if comment == '':
             comment = None
 
@@ -326,21 +366,25 @@ class RegistryFactory:
                 enum = self.__create_enum(node)
                 enums_dict[enum.name] = enum
 
+        intern = self.__interner.string
+
         return Enums(
-            namespace=enums_node.getAttribute("namespace"),
-            group=enums_node.getAttribute("group"),
-            enums_type=enums_node.getAttribute("type"),
+            namespace=intern(enums_node.getAttribute("namespace")),
+            group=intern(enums_node.getAttribute("group")),
+            enums_type=intern(enums_node.getAttribute("type")),
             enum_dict=enums_dict,
             start=enums_node.getAttribute("start"),
             end=enums_node.getAttribute("end"),
-            vendor=enums_node.getAttribute("vendor"),
+            vendor=intern(enums_node.getAttribute("vendor")),
             comment=enums_node.getAttribute("comment"))
 
     def __create_enum(self, enum_node):
+        intern = self.__interner.string
+
         return Enum(
-            value=enum_node.getAttribute("value"),
-            name=enum_node.getAttribute("name"),
-            group=enum_node.getAttribute("group"))
+            value=intern(enum_node.getAttribute("value")),
+            name=intern(enum_node.getAttribute("name")),
+            group=intern(enum_node.getAttribute("group")))
 
     def __extract_commands_definitions(self, root):
         if root.nodeType != Node.ELEMENT_NODE:
@@ -381,20 +425,21 @@ class RegistryFactory:
         return command
 
     def __create_command_param(self, command_param_node):
-        group = command_param_node.getAttribute("group")
+        intern = self.__interner.string
+        group = intern(command_param_node.getAttribute("group"))
         ptype = None
         name = None
         pointer_indirection = 0
-        len = command_param_node.getAttribute("len")
+        len = intern(command_param_node.getAttribute("len"))
         is_const = False
         is_void = False
 
         for child in command_param_node.childNodes:
             if child.nodeType == Node.ELEMENT_NODE:
                 if child.tagName == "ptype":
-                    ptype = child.firstChild.data.strip()
+                    ptype = intern(child.firstChild.data.strip())
                 elif child.tagName == "name":
-                    name = child.firstChild.data.strip()
+                    name = intern(child.firstChild.data.strip())
 
             if child.nodeType == Node.TEXT_NODE:
                 values = child.nodeValue.strip().split(" ")
@@ -419,7 +464,7 @@ class RegistryFactory:
                 if child.tagName == "ptype":
                     type_is_ptype = True
                 elif child.tagName == "name":
-                    command.name = child.firstChild.data.strip()
+                    command.name = self.__interner.string(child.firstChild.data.strip())
 
         if type_is_ptype:
             is_pointer = False
@@ -429,7 +474,7 @@ class RegistryFactory:
             for child in command_proto_node.childNodes:
                 if child.nodeType == Node.ELEMENT_NODE:
                     if child.tagName == "ptype":
-                        type_name = child.firstChild.data.strip()
+                        type_name = self.__interner.string(child.firstChild.data.strip())
 
                 elif child.nodeType == Node.TEXT_NODE:
                     value = child.nodeValue.strip()
@@ -446,7 +491,7 @@ class RegistryFactory:
                     if type_name == "":
                         continue
 
-                    command.return_type = TypeDecl(name=type_name)
+                    command.return_type = TypeDecl(name=self.__interner.string(type_name))
                     break
 
     def __extract_feature_definitions(self, root):
@@ -465,7 +510,7 @@ class RegistryFactory:
         return feature_list
 
     def __create_feature(self, feature_node):
-        api = feature_node.getAttribute("api")
+        api = self.__interner.string(feature_node.getAttribute("api"))
         name = feature_node.getAttribute("name")
         number = feature_node.getAttribute("number")
         require_list = []
@@ -494,21 +539,23 @@ class RegistryFactory:
                 continue
 
             if child.tagName == "type":
-                type_ref = TypeRef(name=child.getAttribute("name"), comment=child.getAttribute("comment"))
+                type_ref = TypeRef(name=self.__interner.string(child.getAttribute("name")), comment=self.__interner.string(child.getAttribute("comment")))
                 type_list.append(type_ref)
                 continue
 
             elif child.tagName == "enum":
-                enum_ref = EnumRef(name=child.getAttribute("name"), comment=child.getAttribute("comment"))
+                enum_ref = EnumRef(name=self.__interner.string(child.getAttribute("name")), comment=self.__interner.string(child.getAttribute("comment")))
                 enum_list.append(enum_ref)
                 continue
 
             elif child.tagName == "command":
-                command_ref = CommandRef(name=child.getAttribute("name"), comment=child.getAttribute("comment"))
+                command_ref = CommandRef(name=self.__interner.string(child.getAttribute("name")), comment=self.__interner.string(child.getAttribute("comment")))
                 command_list.append(command_ref)
                 continue
 
-        return Require(type_list=type_list, enum_list=enum_list, command_list=command_list)
+        return Require(type_list=type_list, enum_list=enum_list, command_list=command_list,
+                       api=self.__interner.string(require_node.getAttribute("api")),
+                       profile=self.__interner.string(require_node.getAttribute("profile")))
 
     def __create_remove(self, remove_node):
         type_list = []
@@ -520,22 +567,22 @@ class RegistryFactory:
                 continue
 
             if child.tagName == "type":
-                type_ref = TypeRef(name=child.getAttribute("name"), comment=child.getAttribute("comment"))
+                type_ref = TypeRef(name=self.__interner.string(child.getAttribute("name")), comment=self.__interner.string(child.getAttribute("comment")))
                 type_list.append(type_ref)
                 continue
 
             elif child.tagName == "enum":
-                enum_ref = EnumRef(name=child.getAttribute("name"), comment=child.getAttribute("comment"))
+                enum_ref = EnumRef(name=self.__interner.string(child.getAttribute("name")), comment=self.__interner.string(child.getAttribute("comment")))
                 enum_list.append(enum_ref)
                 continue
 
             elif child.tagName == "command":
-                command_ref = CommandRef(name=child.getAttribute("name"), comment=child.getAttribute("comment"))
+                command_ref = CommandRef(name=self.__interner.string(child.getAttribute("name")), comment=self.__interner.string(child.getAttribute("comment")))
                 command_list.append(command_ref)
                 continue
 
-        profile = remove_node.getAttribute("profile")
-        comment = remove_node.getAttribute("comment")
+        profile = self.__interner.string(remove_node.getAttribute("profile"))
+        comment = self.__interner.string(remove_node.getAttribute("comment"))
 
         return Remove(profile=profile, comment=comment, type_list=type_list, enum_list=enum_list, command_list=command_list)
 
@@ -569,7 +616,7 @@ class RegistryFactory:
 
     def __create_extension(self, extension_node):
         name = extension_node.getAttribute("name")
-        supported = extension_node.getAttribute("supported").split('|')
+        supported = self.__interner.sequence(extension_node.getAttribute("supported").split('|'))
         require_list = []
 
         for child in extension_node.childNodes:
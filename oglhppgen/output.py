@@ -0,0 +1,131 @@
+import hashlib
+import os
+import stat
+import tempfile
+
+from oglhppgen.registry_cache import hash_file
+
+
+# Generated files are only replaced when their contents change, so their modification times (and
+# everything that depends on them) stay untouched when a rerun of the generator produces the same
+# code. The new contents are streamed to a temporary file next to the target while being hashed,
+# and the hash is then compared against the one of the existing file.
+#
+# With Ninja, rules running the generator should set "restat = 1", so skipped writes also prune the
+# dependents of the outputs from the build.
+
+def current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+
+    return umask
+
+
+class OutputFile:
+    def __init__(self, writer, path):
+        self.__writer = writer
+        self.path = path
+        self.__digest = hashlib.sha256()
+
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        fd, self.__temp_path = tempfile.mkstemp(dir=directory if directory != "" else ".", suffix=".tmp")
+        self.__file = os.fdopen(fd, "wb", buffering=1 << 16)
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.__digest.update(data)
+        self.__file.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__file.close()
+
+        if exc_type is not None:
+            os.remove(self.__temp_path)
+            return False
+
+        if os.path.exists(self.path) and hash_file(self.path) == self.__digest.hexdigest():
+            os.remove(self.__temp_path)
+            self.__writer.unchanged_paths.append(self.path)
+        else:
+            # mkstemp creates the file readable by its owner only, the target keeps the mode it had,
+            # or gets the one open() would have given it
+            if os.path.exists(self.path):
+                os.chmod(self.__temp_path, stat.S_IMODE(os.stat(self.path).st_mode))
+            else:
+                os.chmod(self.__temp_path, 0o666 & ~current_umask())
+
+            os.replace(self.__temp_path, self.path)
+            self.__writer.changed_paths.append(self.path)
+
+        return False
+
+
+# Writes the same text to several sinks, like an output file and its generation cache entry.
+class Tee:
+    def __init__(self, sinks):
+        self.__sinks = sinks
+
+    def write(self, text):
+        for sink in self.__sinks:
+            sink.write(text)
+
+    def __enter__(self):
+        for sink in self.__sinks:
+            sink.__enter__()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for sink in reversed(self.__sinks):
+            sink.__exit__(exc_type, exc_value, traceback)
+
+        return False
+
+
+class OutputWriter:
+    def __init__(self):
+        self.changed_paths = []
+        self.unchanged_paths = []
+
+    def open(self, path):
+        return OutputFile(self, path)
+
+    def write(self, path, text):
+        with self.open(path) as file:
+            file.write(text)
+
+    def paths(self):
+        return self.changed_paths + self.unchanged_paths
+
+
+def generator_sources():
+    # every module of the generator packages, the outputs must be regenerated when any of them changes
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sources = []
+
+    for package in ["oglhpp", "oglhppgen"]:
+        package_dir = os.path.join(root, package)
+
+        for filename in sorted(os.listdir(package_dir)):
+            if filename.endswith(".py"):
+                sources.append(os.path.join(package_dir, filename))
+
+    return sources
+
+
+def escape_depfile_path(path):
+    return path.replace("\\", "/").replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+
+def write_depfile(depfile_path, targets, dependencies):
+    # Make syntax, also understood by Ninja ("deps = gcc")
+    targets_str = " ".join([escape_depfile_path(target) for target in targets])
+    dependencies_str = " \\\n  ".join([escape_depfile_path(dependency) for dependency in dependencies])
+
+    OutputWriter().write(depfile_path, f"{targets_str}: \\\n  {dependencies_str}\n")
@@ -0,0 +1,109 @@
+# Minimal perfect hashing of a fixed set of names, by hash and displace. Every name is first
+# hashed into a bucket, then the buckets, largest first, each get the smallest displacement
+# seed that sends all of their names into free slots. A lookup costs two hashes and one
+# comparison against the name stored in its slot, which rejects names outside of the set.
+#
+# Every name is hashed once, by a 32 bit FNV-1a over its bytes. Its bucket is mix of that hash,
+# and its slot mix of that hash XORed with the displacement of the bucket. FNV-1a alone would
+# not do as a seeded hash: its multiplications never carry high bits down, so the low bits of
+# the slot would ignore most of the seed. mix is the murmur3 finalizer, whose every output bit
+# depends on every input bit. Generated C code computes the same slots as the functions below.
+
+FNV_OFFSET_BASIS = 2166136261
+FNV_PRIME = 16777619
+
+MIX_MULTIPLIER_1 = 0x85EBCA6B
+MIX_MULTIPLIER_2 = 0xC2B2AE35
+
+MAX_DISPLACEMENT = 1 << 20
+
+
+def fnv1a(data):
+    hash_ = FNV_OFFSET_BASIS
+
+    for byte in data:
+        hash_ = ((hash_ ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+
+    return hash_
+
+
+def mix(hash_):
+    hash_ ^= hash_ >> 16
+    hash_ = (hash_ * MIX_MULTIPLIER_1) & 0xFFFFFFFF
+    hash_ ^= hash_ >> 13
+    hash_ = (hash_ * MIX_MULTIPLIER_2) & 0xFFFFFFFF
+    hash_ ^= hash_ >> 16
+
+    return hash_
+
+
+class PerfectHash:
+    def __init__(self, names, bucket_count, displacements, slots):
+        self.names = names
+        self.bucket_count = bucket_count
+        self.displacements = displacements
+        # index in names of the name stored in every slot
+        self.slots = slots
+
+    def lookup(self, name):
+        if len(self.names) == 0:
+            return None
+
+        hash_ = fnv1a(name.encode())
+        displacement = self.displacements[mix(hash_) % self.bucket_count]
+        index = self.slots[mix(hash_ ^ displacement) % len(self.slots)]
+
+        if self.names[index] != name:
+            return None
+
+        return index
+
+    # Raises when a name of the set does not find its own slot, or two names share one.
+    def check(self):
+        if sorted(self.slots) != list(range(len(self.names))):
+            raise Exception("slots of the perfect hash are not a permutation of the names")
+
+        for i in range(len(self.names)):
+            if self.lookup(self.names[i]) != i:
+                raise Exception(f"{self.names[i]} does not find its slot in the perfect hash")
+
+
+def create_perfect_hash(names, keys_per_bucket=2):
+    if len(set(names)) != len(names):
+        raise Exception("names of a perfect hash must be unique")
+
+    slot_count = len(names)
+    bucket_count = max(1, (slot_count + keys_per_bucket - 1) // keys_per_bucket)
+    hashes = [fnv1a(name.encode()) for name in names]
+
+    buckets = [[] for i in range(bucket_count)]
+    for i in range(len(hashes)):
+        buckets[mix(hashes[i]) % bucket_count].append(i)
+
+    displacements = [0] * bucket_count
+    slots = [None] * slot_count
+
+    for bucket_index in sorted(range(bucket_count), key=lambda b: (-len(buckets[b]), b)):
+        bucket = buckets[bucket_index]
+        if len(bucket) == 0:
+            continue
+
+        displacement = 1
+        while True:
+            positions = [mix(hashes[i] ^ displacement) % slot_count for i in bucket]
+
+            if len(set(positions)) == len(positions) and all(slots[position] is None for position in positions):
+                break
+
+            displacement += 1
+            if displacement > MAX_DISPLACEMENT:
+                raise Exception(f"no displacement found for bucket {bucket_index} of the perfect hash")
+
+        displacements[bucket_index] = displacement
+        for i, position in zip(bucket, positions):
+            slots[position] = i
+
+    perfect_hash = PerfectHash(names=list(names), bucket_count=bucket_count, displacements=displacements, slots=slots)
+    perfect_hash.check()
+
+    return perfect_hash
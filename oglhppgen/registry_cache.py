@@ -0,0 +1,128 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from oglhpp import glregistry
+from oglhppgen import model
+from oglhppgen.frontend import RegistryFrontend, StreamingRepositoryFactory
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+# Keeps the parsed models of a registry file on disk, one pickle per (model, source file),
+# keyed by the SHA-256 of the XML contents and the version of the parser that built it.
+# Entries built from an older version of the same source file are evicted on a miss.
+
+class RegistryCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def load_registry(self, gl_xml_file_path, registry_factory=None):
+        if registry_factory is None:
+            registry_factory = StreamingRegistryFactory()
+
+        return self.__load("registry", model.PARSER_VERSION, gl_xml_file_path,
+                           lambda: registry_factory.create_registry(gl_xml_file_path))
+
+    def load_repository(self, gl_xml_file_path, repository_factory=None):
+        if repository_factory is None:
+            repository_factory = StreamingRepositoryFactory()
+
+        return self.__load("repository", glregistry.PARSER_VERSION, gl_xml_file_path,
+                           lambda: repository_factory.create_repository(gl_xml_file_path))
+
+    # Both models, built from a single parse when neither one is cached.
+    def load_models(self, gl_xml_file_path, frontend=None):
+        if frontend is None:
+            frontend = RegistryFrontend()
+
+        file_hash = hash_file(gl_xml_file_path)
+        registry = self.__lookup("registry", model.PARSER_VERSION, gl_xml_file_path, file_hash)
+        repository = self.__lookup("repository", glregistry.PARSER_VERSION, gl_xml_file_path, file_hash)
+
+        if registry is not None and repository is not None:
+            return registry, repository
+
+        if registry is None and repository is None:
+            registry, repository = frontend.parse(gl_xml_file_path)
+            self.__store_entry("registry", model.PARSER_VERSION, gl_xml_file_path, file_hash, registry)
+            self.__store_entry("repository", glregistry.PARSER_VERSION, gl_xml_file_path, file_hash, repository)
+        elif registry is None:
+            registry = StreamingRegistryFactory(compact=frontend.compact).create_registry(gl_xml_file_path)
+            self.__store_entry("registry", model.PARSER_VERSION, gl_xml_file_path, file_hash, registry)
+        else:
+            repository = StreamingRepositoryFactory(compact=frontend.compact).create_repository(gl_xml_file_path)
+            self.__store_entry("repository", glregistry.PARSER_VERSION, gl_xml_file_path, file_hash, repository)
+
+        return registry, repository
+
+    def __entry_prefix(self, kind, gl_xml_file_path):
+        source_hash = hashlib.sha256(os.path.abspath(gl_xml_file_path).encode()).hexdigest()
+        return f"{kind}-{source_hash[:16]}-"
+
+    def __entry_path(self, kind, parser_version, gl_xml_file_path, file_hash):
+        entry_name = f"{self.__entry_prefix(kind, gl_xml_file_path)}{file_hash}-v{parser_version}.pickle"
+        return os.path.join(self.cache_dir, entry_name)
+
+    def __load(self, kind, parser_version, gl_xml_file_path, build):
+        file_hash = hash_file(gl_xml_file_path)
+        value = self.__lookup(kind, parser_version, gl_xml_file_path, file_hash)
+
+        if value is None:
+            value = build()
+            self.__store_entry(kind, parser_version, gl_xml_file_path, file_hash, value)
+
+        return value
+
+    # Returns the cached model, or None after counting a miss.
+    def __lookup(self, kind, parser_version, gl_xml_file_path, file_hash):
+        entry_path = self.__entry_path(kind, parser_version, gl_xml_file_path, file_hash)
+
+        if os.path.exists(entry_path):
+            try:
+                with open(entry_path, "rb") as file:
+                    value = pickle.load(file)
+
+                self.hits += 1
+                return value
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+                # unreadable or incompatible entry, rebuilt by the caller
+                pass
+
+        self.misses += 1
+        return None
+
+    def __store_entry(self, kind, parser_version, gl_xml_file_path, file_hash, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.__evict(self.__entry_prefix(kind, gl_xml_file_path))
+        self.__store(self.__entry_path(kind, parser_version, gl_xml_file_path, file_hash), value)
+
+    def __evict(self, prefix):
+        for entry_name in os.listdir(self.cache_dir):
+            if entry_name.startswith(prefix) and entry_name.endswith(".pickle"):
+                os.remove(os.path.join(self.cache_dir, entry_name))
+
+    def __store(self, entry_path, value):
+        # write to a temporary file first, so concurrent generator runs never see partial entries
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temp_path, entry_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
@@ -0,0 +1,330 @@
+import xml.etree.ElementTree as ElementTree
+
+from oglhpp.util import Interner
+
+from oglhppgen.model import Type, Enum, Enums, TypeDecl, Command, CommandParam, TypeRef, EnumRef, CommandRef, \
+    Require, Remove, Feature, Extension, Extensions, Registry
+
+
+# Streams gl.xml through ElementTree.iterparse and hands every top level item (type, enum,
+# command, extension) to its consumers as soon as its end tag is seen. Features are small and
+# are handed over whole. Consumed elements are detached from the partial tree right away, so
+# the whole document is never held in memory at once.
+#
+# Consumers implement start_section(element), end_item(section, element) and end_section(element),
+# where sections are the children of the registry root and items are the children of a section.
+
+class RegistryStream:
+    def __init__(self, source):
+        self.source = source
+
+    def run(self, consumers):
+        element_stack = []
+
+        for event, element in ElementTree.iterparse(self.source, events=("start", "end")):
+            if event == "start":
+                if len(element_stack) == 0 and element.tag != "registry":
+                    raise Exception("expected registry node tag as root")
+
+                if len(element_stack) == 1:
+                    for consumer in consumers:
+                        consumer.start_section(element)
+
+                element_stack.append(element)
+                continue
+
+            element_stack.pop()
+            depth = len(element_stack)
+
+            if depth == 2:
+                section = element_stack[-1]
+
+                if section.tag == "feature":
+                    continue
+
+                for consumer in consumers:
+                    consumer.end_item(section, element)
+
+                self.__release(section, element)
+
+            elif depth == 1:
+                for consumer in consumers:
+                    consumer.end_section(element)
+
+                self.__release(element_stack[-1], element)
+
+    def __release(self, parent, element):
+        # the element just closed is always the last child appended to its parent
+        element.clear()
+        del parent[-1]
+
+
+class StreamingRegistryFactory:
+    def __init__(self, compact=True):
+        self.compact = compact
+
+    def create_registry(self, source):
+        builder = RegistryBuilder(compact=self.compact)
+        RegistryStream(source).run([builder])
+
+        return builder.registry()
+
+
+# Builds the same Registry as RegistryFactory, from the elements of a RegistryStream.
+
+class RegistryBuilder:
+    def __init__(self, compact=True):
+        self.__interner = Interner(enabled=compact)
+        self.__types_lists = []
+        self.__enums_list = []
+        self.__command_list = []
+        self.__feature_list = []
+        self.__extension_lists = []
+        self.__enum_dict = None
+
+    def registry(self):
+        if len(self.__types_lists) == 0:
+            raise Exception('types node not found in registry root node.')
+
+        extensions = None
+        if len(self.__extension_lists) > 0:
+            extensions = Extensions(extension_list=self.__extension_lists[0])
+
+        return Registry(
+            types_list=self.__types_lists[0],
+            enums_list=self.__enums_list,
+            command_list=self.__command_list,
+            feature_list=self.__feature_list,
+            extensions=extensions)
+
+    def start_section(self, element):
+        if element.tag == "types":
+            self.__types_lists.append([])
+        elif element.tag == "enums":
+            self.__enum_dict = {}
+        elif element.tag == "extensions":
+            self.__extension_lists.append([])
+
+    def end_item(self, section, element):
+        if section.tag == "types":
+            type_ = self.__create_type(element)
+
+            if type_ is not None:
+                self.__types_lists[-1].append(type_)
+            else:
+                print("Warning: couldn't extract current type. Dumping child nodes:")
+                for child in element:
+                    print("    ", child)
+
+        elif section.tag == "enums" and element.tag == "enum":
+            enum = self.__create_enum(element)
+            self.__enum_dict[enum.name] = enum
+
+        elif section.tag == "commands" and element.tag == "command":
+            self.__command_list.append(self.__create_command(element))
+
+        elif section.tag == "extensions" and element.tag == "extension":
+            self.__extension_lists[-1].append(self.__create_extension(element))
+
+    def end_section(self, element):
+        if element.tag == "enums":
+            self.__enums_list.append(self.__create_enums(element, self.__enum_dict))
+            self.__enum_dict = None
+        elif element.tag == "feature":
+            self.__feature_list.append(self.__create_feature(element))
+
+    def __attribute(self, element, name):
+        return self.__interner.string(element.get(name, ""))
+
+    def __text_nodes(self, element):
+        # the equivalent of the minidom text child nodes, in document order
+        if element.text is not None:
+            yield element.text
+
+        for child in element:
+            if child.tail is not None:
+                yield child.tail
+
+    def __create_type(self, type_element):
+        name = None
+
+        for child in type_element:
+            if child.tag == "name":
+                name = self.__interner.string(child.text.strip())
+
+        if name is None:
+            name = self.__attribute(type_element, "name")
+
+            if name == '':
+                return None
+
+        requires = self.__attribute(type_element, "requires")
+        if requires == '':
+            requires = None
+
+        comment = self.__attribute(type_element, "comment")
+        if comment == '':
+            comment = None
+
+        c_definition = ''.join(type_element.itertext())
+
+        return Type(name=name, c_definition=c_definition, requires=requires, comment=comment)
+
+    def __create_enums(self, enums_element, enum_dict):
+        return Enums(
+            namespace=self.__attribute(enums_element, "namespace"),
+            group=self.__attribute(enums_element, "group"),
+            enums_type=self.__attribute(enums_element, "type"),
+            enum_dict=enum_dict,
+            start=self.__attribute(enums_element, "start"),
+            end=self.__attribute(enums_element, "end"),
+            vendor=self.__attribute(enums_element, "vendor"),
+            comment=self.__attribute(enums_element, "comment"))
+
+    def __create_enum(self, enum_element):
+        return Enum(
+            value=self.__attribute(enum_element, "value"),
+            name=self.__attribute(enum_element, "name"),
+            group=self.__attribute(enum_element, "group"))
+
+    def __create_command(self, command_element):
+        command = Command()
+
+        params = []
+
+        for child in command_element:
+            if child.tag == "proto":
+                self.__fill_command_from_proto_element(command, child)
+            elif child.tag == "param":
+                params.append(self.__create_command_param(child))
+
+        command.params = params
+
+        return command
+
+    def __create_command_param(self, param_element):
+        ptype = None
+        name = None
+        pointer_indirection = 0
+        is_const = False
+        is_void = False
+
+        for child in param_element:
+            if child.tag == "ptype":
+                ptype = self.__interner.string(child.text.strip())
+            elif child.tag == "name":
+                name = self.__interner.string(child.text.strip())
+
+        for text in self.__text_nodes(param_element):
+            for value in text.strip().split(" "):
+                if value == "*":
+                    pointer_indirection += 1
+                elif value == "**":
+                    pointer_indirection += 2
+                elif value == "const":
+                    is_const = True
+                elif value == "void":
+                    is_void = True
+
+        return CommandParam(
+            group=self.__attribute(param_element, "group"),
+            data_type=ptype,
+            name=name,
+            pointer_indirection=pointer_indirection,
+            len=self.__attribute(param_element, "len"),
+            is_const=is_const,
+            is_void=is_void)
+
+    def __fill_command_from_proto_element(self, command, proto_element):
+        type_name = None
+
+        for child in proto_element:
+            if child.tag == "ptype":
+                type_name = self.__interner.string(child.text.strip())
+            elif child.tag == "name":
+                command.name = self.__interner.string(child.text.strip())
+
+        if type_name is not None:
+            is_pointer = False
+            is_const = False
+
+            for text in self.__text_nodes(proto_element):
+                value = text.strip()
+                if value == "const":
+                    is_const = True
+                elif value == "*":
+                    is_pointer = True
+
+            command.return_type = TypeDecl(name=type_name, is_pointer=is_pointer, is_const=is_const)
+        else:
+            for text in self.__text_nodes(proto_element):
+                type_name = text.strip()
+                if type_name == "":
+                    continue
+
+                command.return_type = TypeDecl(name=self.__interner.string(type_name))
+                break
+
+    def __create_feature(self, feature_element):
+        require_list = []
+        remove_list = []
+
+        for child in feature_element:
+            if child.tag == "require":
+                require_list.append(self.__create_require(child))
+            elif child.tag == "remove":
+                remove_list.append(self.__create_remove(child))
+
+        return Feature(
+            api=self.__attribute(feature_element, "api"),
+            name=self.__attribute(feature_element, "name"),
+            number=self.__attribute(feature_element, "number"),
+            require_list=require_list,
+            remove_list=remove_list)
+
+    def __create_ref_lists(self, element):
+        type_list = []
+        enum_list = []
+        command_list = []
+
+        for child in element:
+            name = self.__attribute(child, "name")
+            comment = self.__attribute(child, "comment")
+
+            if child.tag == "type":
+                type_list.append(TypeRef(name=name, comment=comment))
+            elif child.tag == "enum":
+                enum_list.append(EnumRef(name=name, comment=comment))
+            elif child.tag == "command":
+                command_list.append(CommandRef(name=name, comment=comment))
+
+        return type_list, enum_list, command_list
+
+    def __create_require(self, require_element):
+        type_list, enum_list, command_list = self.__create_ref_lists(require_element)
+
+        return Require(type_list=type_list, enum_list=enum_list, command_list=command_list,
+                       api=self.__attribute(require_element, "api"),
+                       profile=self.__attribute(require_element, "profile"))
+
+    def __create_remove(self, remove_element):
+        type_list, enum_list, command_list = self.__create_ref_lists(remove_element)
+
+        return Remove(
+            profile=self.__attribute(remove_element, "profile"),
+            comment=self.__attribute(remove_element, "comment"),
+            type_list=type_list,
+            enum_list=enum_list,
+            command_list=command_list)
+
+    def __create_extension(self, extension_element):
+        require_list = []
+
+        for child in extension_element:
+            if child.tag == "require":
+                require_list.append(self.__create_require(child))
+
+        return Extension(
+            name=self.__attribute(extension_element, "name"),
+            supported=self.__interner.sequence(self.__attribute(extension_element, "supported").split('|')),
+            require_list=require_list)
@@ -0,0 +1,128 @@
+import concurrent.futures
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+
+
+SOURCE_FILE_EXTENSIONS = (".c", ".cc", ".cpp", ".cxx", ".h", ".hh", ".hpp", ".hxx", ".inl", ".m", ".mm")
+
+# C identifiers of commands and enums, and the commands of the C++ wrapper, called as gl::name
+IDENTIFIER_PATTERN = re.compile(rb"\b(?:(gl[A-Z]\w*|GL_\w+)|gl::([a-z]\w*))\b")
+
+# below this many files to scan, starting worker processes costs more than it saves
+MIN_PARALLEL_FILES = 64
+
+
+def scan_file(file_path):
+    with open(file_path, "rb") as file:
+        source = file.read()
+
+    names = set()
+    for c_name, cpp_name in IDENTIFIER_PATTERN.findall(source):
+        if c_name:
+            names.add(c_name.decode())
+        else:
+            # the C++ wrapper drops the gl prefix and lowercases the first letter of the command
+            names.add(f"gl{cpp_name[:1].decode().upper()}{cpp_name[1:].decode()}")
+
+    return frozenset(names)
+
+
+# Collects the GL command and enum names used by the C and C++ sources under a list of
+# directories. Files are scanned in parallel, and the names found in every file are cached on
+# disk, keyed by its modification time and size, so that only the files changed since the last
+# scan of the same directories are read again.
+
+class UsageScanner:
+    def __init__(self, cache_dir=None, max_workers=None):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        # source files read by the last scan, either from the cache or from disk
+        self.source_paths = []
+
+    def scan(self, source_dirs, exclude_dirs=None):
+        exclude_dirs = [os.path.abspath(exclude_dir) for exclude_dir in (exclude_dirs or [])]
+        cache = self.__load_cache(source_dirs)
+
+        names_by_path = {}
+        missing_paths = []
+        for file_path, mtime_ns, size in self.__list_source_files(source_dirs, exclude_dirs):
+            entry = cache.get(file_path)
+
+            if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+                self.hits += 1
+                names_by_path[file_path] = entry
+            else:
+                self.misses += 1
+                missing_paths.append((file_path, mtime_ns, size))
+
+        if len(missing_paths) < MIN_PARALLEL_FILES:
+            scanned_names = [scan_file(file_path) for file_path, mtime_ns, size in missing_paths]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                scanned_names = list(executor.map(scan_file, [file_path for file_path, mtime_ns, size in missing_paths],
+                                                  chunksize=32))
+
+        for (file_path, mtime_ns, size), names in zip(missing_paths, scanned_names):
+            names_by_path[file_path] = (mtime_ns, size, names)
+
+        # entries of deleted files are dropped as well
+        if len(missing_paths) > 0 or len(names_by_path) != len(cache):
+            self.__store_cache(source_dirs, names_by_path)
+
+        used_names = set()
+        for mtime_ns, size, names in names_by_path.values():
+            used_names.update(names)
+
+        self.source_paths = sorted(names_by_path)
+
+        return used_names
+
+    def __list_source_files(self, source_dirs, exclude_dirs):
+        for source_dir in source_dirs:
+            for dir_path, dir_names, file_names in os.walk(os.path.abspath(source_dir)):
+                dir_names[:] = sorted([dir_name for dir_name in dir_names
+                                       if os.path.join(dir_path, dir_name) not in exclude_dirs])
+
+                for file_name in sorted(file_names):
+                    if not file_name.endswith(SOURCE_FILE_EXTENSIONS):
+                        continue
+
+                    file_path = os.path.join(dir_path, file_name)
+                    stat = os.stat(file_path)
+
+                    yield file_path, stat.st_mtime_ns, stat.st_size
+
+    def __cache_path(self, source_dirs):
+        description = repr(sorted([os.path.abspath(source_dir) for source_dir in source_dirs]))
+        return os.path.join(self.cache_dir, f"usage-{hashlib.sha256(description.encode()).hexdigest()[:16]}.pickle")
+
+    def __load_cache(self, source_dirs):
+        if self.cache_dir is None:
+            return {}
+
+        try:
+            with open(self.__cache_path(source_dirs), "rb") as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+
+    def __store_cache(self, source_dirs, names_by_path):
+        if self.cache_dir is None:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(names_by_path, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temp_path, self.__cache_path(source_dirs))
+        except BaseException:
+            os.remove(temp_path)
+            raise
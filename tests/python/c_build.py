@@ -0,0 +1,34 @@
+import os
+import os.path
+import shutil
+import subprocess
+
+import pytest
+
+CC = os.environ.get("CC", "cc")
+
+KHRPLATFORM_INCLUDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test-dynamicLoading",
+                                       "include", "KHR")
+
+requires_cc = pytest.mark.skipif(shutil.which(CC) is None, reason=f"no C compiler {CC}")
+
+
+# Builds the C sources generated into output_dir along with a driver, every warning being an
+# error, and returns the exit status of the driver, its number of failed checks.
+def build_and_run(output_dir, driver_source, flags=()):
+    khrplatform_dir = os.path.join(output_dir, "include", "KHR")
+    if not os.path.exists(khrplatform_dir):
+        shutil.copytree(KHRPLATFORM_INCLUDE_DIR, khrplatform_dir)
+
+    driver_path = os.path.join(output_dir, "driver.c")
+    with open(driver_path, "w") as file:
+        file.write(driver_source)
+
+    source_dir = os.path.join(output_dir, "src")
+    source_paths = [os.path.join(source_dir, filename) for filename in sorted(os.listdir(source_dir))]
+    executable_path = os.path.join(output_dir, "driver")
+    subprocess.run([CC, "-std=c99", "-pedantic", "-Wall", "-Wextra", "-Werror", *flags,
+                    "-I", os.path.join(output_dir, "include"), *source_paths, driver_path, "-o", executable_path],
+                   check=True)
+
+    return subprocess.run([executable_path]).returncode
@@ -0,0 +1,14 @@
+import os.path
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+# small synthetic registry, see data/make_gl_xml.py
+GL_XML_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gl.xml")
+
+
+@pytest.fixture(scope="session")
+def gl_xml_file_path():
+    return GL_XML_FILE_PATH
@@ -0,0 +1,182 @@
+import os.path
+
+# Writes gl.xml next to this script, the small synthetic registry the python tests run on. It has
+# the parts of the real registry the generators handle: groups and vendor aliases of enums, enums
+# restricted to one api, types with dependencies, commands of several versions, profiles with
+# removals, other apis and extensions.
+
+versions = ['1.0','1.1','1.2','1.3','1.4','1.5','2.0','2.1','3.0','3.1','3.2','3.3','4.0','4.1','4.2','4.3','4.4','4.5','4.6']
+out = []
+w = out.append
+w('<?xml version="1.0" encoding="UTF-8"?>')
+w('<registry>')
+w('    <comment>synthetic</comment>')
+w('    <types>')
+w('        <type name="khrplatform">#include &lt;KHR/khrplatform.h&gt;</type>')
+w('        <type>typedef unsigned int <name>GLenum</name>;</type>')
+w('        <type requires="khrplatform">typedef khronos_float_t <name>GLfloat</name>;</type>')
+w('        <type>typedef int <name>GLint</name>;</type>')
+w('        <type>typedef int <name>GLsizei</name>;</type>')
+w('        <type>typedef unsigned char <name>GLboolean</name>;</type>')
+w('        <type>typedef unsigned int <name>GLbitfield</name>;</type>')
+w('        <type>typedef void <name>GLvoid</name>;</type>')
+w('        <type requires="khrplatform">typedef khronos_uint8_t <name>GLubyte</name>;</type>')
+w('        <type>typedef unsigned int <name>GLuint</name>;</type>')
+w('        <type>typedef char <name>GLchar</name>;</type>')
+w('        <type requires="khrplatform">typedef khronos_intptr_t <name>GLintptr</name>;</type>')
+w('        <type requires="khrplatform">typedef khronos_ssize_t <name>GLsizeiptr</name>;</type>')
+w('        <type>typedef double <name>GLdouble</name>;</type>')
+w('        <type comment="Not an actual GL type">typedef double <name>GLclampd</name>;</type>')
+w('        <type>typedef struct __GLsync *<name>GLsync</name>;</type>')
+w('        <type requires="khrplatform">typedef khronos_uint64_t <name>GLuint64</name>;</type>')
+w('        <type>typedef void (<apientry/> *<name>GLDEBUGPROC</name>)(GLenum source,GLenum type,GLuint id,GLenum severity,GLsizei length,const GLchar *message,const void *userParam);</type>')
+w('    </types>')
+w('    <enums namespace="GL" group="AttribMask" type="bitmask">')
+w('        <enum value="0x00000100" name="GL_DEPTH_BUFFER_BIT" group="ClearBufferMask,AttribMask"/>')
+w('        <enum value="0x00004000" name="GL_COLOR_BUFFER_BIT" group="ClearBufferMask,AttribMask"/>')
+w('    </enums>')
+w('    <enums namespace="GL" start="0x0000" end="0x7FFF" vendor="ARB" comment="Mostly OpenGL 1.0/1.1 enum assignments.">')
+w('        <enum value="0" name="GL_FALSE" group="Boolean"/>')
+w('        <enum value="1" name="GL_TRUE" group="Boolean"/>')
+w('        <enum value="0" name="GL_NO_ERROR" group="ErrorCode"/>')
+w('        <enum value="0" name="GL_POINTS" group="PrimitiveType"/>')
+w('        <enum value="0x0004" name="GL_TRIANGLES" group="PrimitiveType"/>')
+w('        <enum value="0x0500" name="GL_INVALID_ENUM" group="ErrorCode"/>')
+w('        <enum value="0x0B71" name="GL_DEPTH_TEST" group="EnableCap,GetPName"/>')
+w('        <enum value="0x0BE2" name="GL_BLEND" group="EnableCap,GetPName"/>')
+w('        <unused start="0x0C00" end="0x0C0F"/>')
+w('        <enum value="0x0DE1" name="GL_TEXTURE_2D" group="TextureTarget,EnableCap"/>')
+w('        <enum value="0x1401" name="GL_UNSIGNED_BYTE" group="DrawElementsType"/>')
+w('        <enum value="0x1406" name="GL_FLOAT"/>')
+w('        <enum value="0x1F00" name="GL_VENDOR" group="StringName"/>')
+w('        <enum value="0x1F03" name="GL_EXTENSIONS" group="StringName"/>')
+w('        <enum value="0x8892" name="GL_ARRAY_BUFFER" group="BufferTargetARB"/>')
+w('        <enum value="0x8892" name="GL_ARRAY_BUFFER_ARB" group="BufferTargetARB"/>')
+w('        <enum value="0x8D40" name="GL_FRAMEBUFFER" group="FramebufferTarget"/>')
+w('        <enum value="0x8D40" name="GL_FRAMEBUFFER_EXT" group="FramebufferTarget"/>')
+w('        <enum value="0x8D40" name="GL_FRAMEBUFFER_OES" group="FramebufferTarget"/>')
+w('        <enum value="0x821D" name="GL_NUM_EXTENSIONS" group="GetPName"/>')
+w('        <enum value="0x84C0" name="GL_TEXTURE0" group="TextureUnit"/>')
+w('        <enum value="0x0B00" name="GL_CURRENT_BIT_COMPAT"/>')
+w('        <enum value="0xFFFFFFFF" name="GL_INVALID_INDEX" type="u"/>')
+w('        <enum value="0xFFFFFFFFFFFFFFFF" name="GL_TIMEOUT_IGNORED" type="ull"/>')
+w('        <enum value="0x8259" name="GL_ACTIVE_PROGRAM_EXT" api="gles2" group="SynthGroup0"/>')
+w('        <enum value="0x8B8D" name="GL_ACTIVE_PROGRAM_EXT" api="gl" group="SynthGroup0"/>')
+for i in range(40):
+    w(f'        <enum value="0x{0x9000+i:04X}" name="GL_SYNTH_{i}" group="SynthGroup{i%7}"/>')
+    if i % 5 == 0:
+        w(f'        <enum value="0x{0x9000+i:04X}" name="GL_SYNTH_{i}_EXT" group="SynthGroup{i%7}"/>')
+w('    </enums>')
+w('    <commands namespace="GL">')
+def cmd(proto, *params):
+    w('        <command>')
+    w(f'            <proto>{proto}</proto>')
+    for p in params:
+        w(f'            <param{p}</param>')
+    w('        </command>')
+cmd('void <name>glClear</name>', ' group="ClearBufferMask"><ptype>GLbitfield</ptype> <name>mask</name>')
+cmd('void <name>glClearColor</name>', '><ptype>GLfloat</ptype> <name>red</name>', '><ptype>GLfloat</ptype> <name>green</name>', '><ptype>GLfloat</ptype> <name>blue</name>', '><ptype>GLfloat</ptype> <name>alpha</name>')
+cmd('void <name>glEnable</name>', ' group="EnableCap"><ptype>GLenum</ptype> <name>cap</name>')
+cmd('void <name>glDisable</name>', ' group="EnableCap"><ptype>GLenum</ptype> <name>cap</name>')
+cmd('<ptype>GLenum</ptype> <name>glGetError</name>')
+cmd('const <ptype>GLubyte</ptype> *<name>glGetString</name>', ' group="StringName"><ptype>GLenum</ptype> <name>name</name>')
+cmd('void <name>glGetIntegerv</name>', ' group="GetPName"><ptype>GLenum</ptype> <name>pname</name>', ' len="COMPSIZE(pname)"><ptype>GLint</ptype> *<name>data</name>')
+cmd('void <name>glBegin</name>', ' group="PrimitiveType"><ptype>GLenum</ptype> <name>mode</name>')
+cmd('void <name>glEnd</name>')
+cmd('void <name>glVertex3f</name>', '><ptype>GLfloat</ptype> <name>x</name>', '><ptype>GLfloat</ptype> <name>y</name>', '><ptype>GLfloat</ptype> <name>z</name>')
+cmd('void <name>glVertex3fv</name>', ' len="3">const <ptype>GLfloat</ptype> *<name>v</name>')
+cmd('void <name>glClearDepth</name>', '><ptype>GLdouble</ptype> <name>depth</name>')
+cmd('void <name>glDepthRange</name>', '><ptype>GLclampd</ptype> <name>n</name>', '><ptype>GLclampd</ptype> <name>f</name>')
+cmd('void <name>glBindTexture</name>', ' group="TextureTarget"><ptype>GLenum</ptype> <name>target</name>', ' class="texture"><ptype>GLuint</ptype> <name>texture</name>')
+cmd('void <name>glGenTextures</name>', '><ptype>GLsizei</ptype> <name>n</name>', ' class="texture" len="n"><ptype>GLuint</ptype> *<name>textures</name>')
+cmd('void <name>glDeleteTextures</name>', '><ptype>GLsizei</ptype> <name>n</name>', ' class="texture" len="n">const <ptype>GLuint</ptype> *<name>textures</name>')
+cmd('void <name>glDrawElements</name>', ' group="PrimitiveType"><ptype>GLenum</ptype> <name>mode</name>', '><ptype>GLsizei</ptype> <name>count</name>', ' group="DrawElementsType"><ptype>GLenum</ptype> <name>type</name>', ' len="COMPSIZE(count,type)">const void *<name>indices</name>')
+cmd('void <name>glActiveTexture</name>', ' group="TextureUnit"><ptype>GLenum</ptype> <name>texture</name>')
+cmd('void <name>glBindBuffer</name>', ' group="BufferTargetARB"><ptype>GLenum</ptype> <name>target</name>', ' class="buffer"><ptype>GLuint</ptype> <name>buffer</name>')
+cmd('void <name>glBufferData</name>', ' group="BufferTargetARB"><ptype>GLenum</ptype> <name>target</name>', '><ptype>GLsizeiptr</ptype> <name>size</name>', ' len="size">const void *<name>data</name>', '><ptype>GLenum</ptype> <name>usage</name>')
+cmd('void <name>glUseProgram</name>', ' class="program"><ptype>GLuint</ptype> <name>program</name>')
+cmd('void <name>glUniform4fv</name>', '><ptype>GLint</ptype> <name>location</name>', '><ptype>GLsizei</ptype> <name>count</name>', ' len="count*4">const <ptype>GLfloat</ptype> *<name>value</name>')
+cmd('void <name>glShaderSource</name>', ' class="shader"><ptype>GLuint</ptype> <name>shader</name>', '><ptype>GLsizei</ptype> <name>count</name>', ' len="count">const <ptype>GLchar</ptype> *const*<name>string</name>', ' len="count">const <ptype>GLint</ptype> *<name>length</name>')
+cmd('const <ptype>GLubyte</ptype> *<name>glGetStringi</name>', ' group="StringName"><ptype>GLenum</ptype> <name>name</name>', '><ptype>GLuint</ptype> <name>index</name>')
+cmd('void <name>glBindFramebuffer</name>', ' group="FramebufferTarget"><ptype>GLenum</ptype> <name>target</name>', ' class="framebuffer"><ptype>GLuint</ptype> <name>framebuffer</name>')
+cmd('void <name>glBindVertexArray</name>', ' class="vertex array"><ptype>GLuint</ptype> <name>array</name>')
+cmd('<ptype>GLsync</ptype> <name>glFenceSync</name>', '><ptype>GLenum</ptype> <name>condition</name>', '><ptype>GLbitfield</ptype> <name>flags</name>')
+cmd('void <name>glDebugMessageCallback</name>', '><ptype>GLDEBUGPROC</ptype> <name>callback</name>', '>const void *<name>userParam</name>')
+cmd('void <name>glGetBufferPointerv</name>', '><ptype>GLenum</ptype> <name>target</name>', '><ptype>GLenum</ptype> <name>pname</name>', ' len="1">void **<name>params</name>')
+cmd('void <name>glBindFramebufferEXT</name>', ' group="FramebufferTarget"><ptype>GLenum</ptype> <name>target</name>', '><ptype>GLuint</ptype> <name>framebuffer</name>')
+cmd('void <name>glGetUint64vEXT</name>', '><ptype>GLenum</ptype> <name>pname</name>', '><ptype>GLuint64</ptype> *<name>data</name>')
+for i in range(60):
+    cmd(f'void <name>glSynth{i}</name>', f' group="SynthGroup{i%7}"><ptype>GLenum</ptype> <name>target</name>', ' len="count">const <ptype>GLfloat</ptype> *<name>v</name>', '><ptype>GLsizei</ptype> <name>count</name>')
+w('    </commands>')
+base = {'1.0': ['glClear','glClearColor','glEnable','glDisable','glGetError','glGetString','glGetIntegerv','glBegin','glEnd','glVertex3f','glVertex3fv','glClearDepth','glDepthRange'],
+        '1.1': ['glBindTexture','glGenTextures','glDeleteTextures','glDrawElements'],
+        '1.3': ['glActiveTexture'], '1.5': ['glBindBuffer','glBufferData'], '2.0': ['glUseProgram','glUniform4fv','glShaderSource'],
+        '3.0': ['glGetStringi','glBindFramebuffer','glBindVertexArray'], '3.2': ['glFenceSync'], '4.3': ['glDebugMessageCallback'], '1.5b': ['glGetBufferPointerv']}
+enums_by = {'1.0': ['GL_DEPTH_BUFFER_BIT','GL_COLOR_BUFFER_BIT','GL_FALSE','GL_TRUE','GL_NO_ERROR','GL_POINTS','GL_TRIANGLES','GL_INVALID_ENUM','GL_DEPTH_TEST','GL_BLEND','GL_TEXTURE_2D','GL_UNSIGNED_BYTE','GL_FLOAT','GL_VENDOR','GL_EXTENSIONS','GL_CURRENT_BIT_COMPAT'],
+            '1.3': ['GL_TEXTURE0'], '1.5': ['GL_ARRAY_BUFFER'], '3.0': ['GL_FRAMEBUFFER','GL_NUM_EXTENSIONS'], '3.1': ['GL_INVALID_INDEX'], '3.2': ['GL_TIMEOUT_IGNORED']}
+for vi, v in enumerate(versions):
+    name = 'GL_VERSION_' + v.replace('.', '_')
+    w(f'    <feature api="gl" name="{name}" number="{v}">')
+    w('        <require>')
+    if v == '1.0':
+        w('            <type name="GLclampd" comment="Not an actual GL type"/>')
+    for c in base.get(v, []):
+        w(f'            <command name="{c}"/>')
+    if v == '1.5':
+        w('            <command name="glGetBufferPointerv"/>')
+    for e in enums_by.get(v, []):
+        w(f'            <enum name="{e}"/>')
+    for i in range(vi * 3, vi * 3 + 3):
+        w(f'            <command name="glSynth{i}"/>')
+        w(f'            <enum name="GL_SYNTH_{i % 40}"/>') if i < 40 else None
+    w('        </require>')
+    if v == '3.0':
+        w('        <require comment="compat only" profile="compatibility">')
+        w('            <enum name="GL_SYNTH_5_EXT"/>')
+        w('        </require>')
+    if v == '3.2':
+        w('        <remove profile="core" comment="Compatibility-only GL 1.0 features removed from GL 3.2">')
+        w('            <command name="glBegin"/>')
+        w('            <command name="glEnd"/>')
+        w('            <command name="glVertex3f"/>')
+        w('            <command name="glVertex3fv"/>')
+        w('            <enum name="GL_CURRENT_BIT_COMPAT"/>')
+        w('        </remove>')
+    w('    </feature>')
+for v in ['2.0', '3.0', '3.1', '3.2']:
+    w(f'    <feature api="gles2" name="GL_ES_VERSION_{v.replace(".", "_")}" number="{v}">')
+    w('        <require>')
+    if v == '2.0':
+        for c in ['glClear','glClearColor','glEnable','glDisable','glGetError','glGetString','glBindTexture','glActiveTexture','glBindBuffer','glBufferData','glUseProgram']:
+            w(f'            <command name="{c}"/>')
+        for e in ['GL_COLOR_BUFFER_BIT','GL_FALSE','GL_TRUE','GL_TEXTURE_2D','GL_ARRAY_BUFFER','GL_FRAMEBUFFER']:
+            w(f'            <enum name="{e}"/>')
+    w('        </require>')
+    w('    </feature>')
+w('    <feature api="gles1" name="GL_VERSION_ES_CM_1_0" number="1.0"><require><command name="glClear"/><enum name="GL_FALSE"/></require></feature>')
+w('    <feature api="glsc2" name="GL_SC_VERSION_2_0" number="2.0"><require><command name="glClear"/><enum name="GL_TRUE"/></require></feature>')
+w('    <extensions>')
+w('        <extension name="GL_EXT_framebuffer_object" supported="gl">')
+w('            <require>')
+w('                <enum name="GL_FRAMEBUFFER_EXT"/>')
+w('                <command name="glBindFramebufferEXT"/>')
+w('            </require>')
+w('        </extension>')
+w('        <extension name="GL_ARB_vertex_buffer_object" supported="gl|glcore">')
+w('            <require>')
+w('                <enum name="GL_ARRAY_BUFFER_ARB"/>')
+w('                <command name="glBindBuffer"/>')
+w('            </require>')
+w('        </extension>')
+w('        <extension name="GL_OES_framebuffer_object" supported="gles1">')
+w('            <require><enum name="GL_FRAMEBUFFER_OES"/></require>')
+w('        </extension>')
+w('        <extension name="GL_EXT_timer_query" supported="gl">')
+w('            <require><type name="GLuint64"/><command name="glGetUint64vEXT"/></require>')
+w('            <require api="gles2"><enum name="GL_SYNTH_3"/></require>')
+w('        </extension>')
+for i in range(12):
+    w(f'        <extension name="GL_SYNTH_extension_{i}" supported="{"gl|glcore" if i % 3 else "gles2"}"><require><enum name="GL_SYNTH_{i}"/></require></extension>')
+w('    </extensions>')
+w('</registry>')
+open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gl.xml'), 'w').write('\n'.join(out) + '\n')
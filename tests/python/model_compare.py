@@ -0,0 +1,41 @@
+# Compares two models attribute by attribute, slotted or not, and names the first difference.
+
+def attributes(value):
+    attribute_dict = {}
+
+    if hasattr(value, "__dict__"):
+        attribute_dict.update(vars(value))
+
+    for cls in type(value).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(value, name):
+                attribute_dict[name] = getattr(value, name)
+
+    return attribute_dict
+
+
+def assert_same(a, b, path="root"):
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        assert len(a) == len(b), f"{path}: length {len(a)} != {len(b)}"
+
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_same(x, y, f"{path}[{i}]")
+    elif isinstance(a, dict):
+        assert list(a) == list(b), f"{path}: keys differ"
+
+        for key in a:
+            assert_same(a[key], b[key], f"{path}[{key!r}]")
+    elif isinstance(a, set):
+        assert a == b, path
+    else:
+        assert type(a) == type(b), f"{path}: {type(a)} != {type(b)}"
+
+        if hasattr(a, "__dict__") or hasattr(type(a), "__slots__"):
+            a_attributes = attributes(a)
+            b_attributes = attributes(b)
+            assert set(a_attributes) == set(b_attributes), f"{path}: attributes {set(a_attributes) ^ set(b_attributes)}"
+
+            for name in a_attributes:
+                assert_same(a_attributes[name], b_attributes[name], f"{path}.{name}")
+        else:
+            assert a == b, f"{path}: {a!r} != {b!r}"
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+
+import pytest
+
+from oglhppgen.batch import BatchGenerator, all_targets, target_path
+from oglhppgen.c_generator import C_Generator, GENERATOR_VERSION
+from oglhppgen.generation_cache import GenerationCache
+from oglhppgen.streaming import StreamingRegistryFactory
+
+
+def test_all_targets():
+    targets = all_targets()
+
+    assert ("gl", "3.3", "core") in targets
+    assert ("gl", "3.3", "compatibility") in targets
+    assert ("gles2", "3.2", None) in targets
+    assert not any(api != "gl" and profile is not None for api, number, profile in targets)
+    assert len(targets) == len(set(targets))
+
+    assert target_path("output", "gl", "3.3", "core") == os.path.join("output", "gl-3.3-core")
+    assert target_path("output", "gles2", "3.2") == os.path.join("output", "gles2-3.2")
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_batch_generator(gl_xml_file_path, tmp_path, start_method):
+    if start_method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"the {start_method} start method is not available")
+
+    registry = StreamingRegistryFactory().create_registry(gl_xml_file_path)
+    generation_cache = GenerationCache(str(tmp_path / "generated"))
+    generator_options = {"loader": "lazy", "profile": "compatibility"}
+    targets = [("gl", "3.3", "core"), ("gl", "3.3", "compatibility"), ("gles2", "3.0", None)]
+
+    batch_generator = BatchGenerator(registry, max_workers=2, generation_cache=generation_cache, registry_hash="registry",
+                                     generator_options=generator_options, start_method=start_method)
+    output_dir = str(tmp_path / "output")
+    results = batch_generator.generate(output_dir, targets=targets)
+
+    assert [(result.api, result.number, result.profile) for result in results] == targets
+
+    for result in results:
+        assert result.output_path == target_path(output_dir, result.api, result.number, result.profile)
+
+        # the profile of the target replaces the one of the options
+        profile = "compatibility" if result.profile is None else result.profile
+        outputs = C_Generator(registry, loader="lazy", profile=profile).generate(result.api, result.number)
+
+        assert sorted(result.changed_paths) == sorted([os.path.join(result.output_path, filename_suffix)
+                                                       for filename_suffix in outputs])
+        for filename_suffix, text in outputs.items():
+            with open(os.path.join(result.output_path, filename_suffix)) as file:
+                assert file.read() == text
+
+        key = generation_cache.key("registry", "c", GENERATOR_VERSION, (result.api, result.number),
+                                   {"loader": "lazy", "profile": profile})
+        assert generation_cache.lookup(key) == outputs
+
+    # the core profile leaves out what 3.2 removes
+    with open(os.path.join(target_path(output_dir, "gl", "3.3", "core"), "include", "oglhpp", "gl.h")) as file:
+        assert "glBegin" not in file.read()
+    with open(os.path.join(target_path(output_dir, "gl", "3.3", "compatibility"), "include", "oglhpp", "gl.h")) as file:
+        assert "glBegin" in file.read()
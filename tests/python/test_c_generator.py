@@ -0,0 +1,556 @@
+import pytest
+
+from oglhppgen.c_generator import C_Generator, LAYOUTS, LOADERS, PROFILES
+from oglhppgen.streaming import StreamingRegistryFactory
+
+from c_build import build_and_run, requires_cc
+
+# Loads the generated commands with a getProcAddress counting the lookups of glClear, then again
+# with another one, and calls glClear directly and through a command buffer. The lazy loader,
+# when LAZY is defined, only looks commands up on their first call. Returns the number of failed checks.
+DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#include <oglhpp/command_buffer.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+#if defined(LAZY)
+#define LOOKUPS_AT_LOAD 0
+#else
+#define LOOKUPS_AT_LOAD 1
+#endif
+
+static int clear_lookups;
+static int clear_calls[2];
+static GLbitfield clear_mask;
+
+static void stub_command(void) {
+}
+
+static void GLCALLCONV stub_clear(GLbitfield mask) {
+    clear_calls[0]++;
+    clear_mask = mask;
+}
+
+static void GLCALLCONV other_stub_clear(GLbitfield mask) {
+    clear_calls[1]++;
+    clear_mask = mask;
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    if (strcmp(name, "glClear") == 0) {
+        clear_lookups++;
+        return (OGLHPP_PROC)stub_clear;
+    }
+
+    return stub_command;
+}
+
+static OGLHPP_PROC other_stub_get_proc_address(const char *name) {
+    if (strcmp(name, "glClear") == 0) {
+        clear_lookups++;
+        return (OGLHPP_PROC)other_stub_clear;
+    }
+
+    return stub_command;
+}
+
+int main(void) {
+    int failures = 0;
+    struct oglhpp_command_buffer command_buffer;
+
+    oglhpp_load_functions(stub_get_proc_address);
+    CHECK(clear_lookups == LOOKUPS_AT_LOAD);
+
+    glClear(0x4000);
+    glClear(0x0100);
+    CHECK(clear_lookups == 1);
+    CHECK(clear_calls[0] == 2 && clear_mask == 0x0100);
+    CHECK(oglhpp_find_proc("glClear") == (OGLHPP_PROC)stub_clear);
+#if defined(LAZY)
+    /* the trampoline of a command not called yet */
+    CHECK(oglhpp_find_proc("glBegin") != NULL && oglhpp_find_proc("glBegin") != stub_command);
+#else
+    CHECK(oglhpp_find_proc("glBegin") == stub_command);
+#endif
+
+    /* loading again looks the commands up again, in the other getProcAddress */
+    oglhpp_load_functions(other_stub_get_proc_address);
+    CHECK(clear_lookups == 1 + LOOKUPS_AT_LOAD);
+
+    oglhpp_command_buffer_init(&command_buffer);
+    oglhpp_record_glClear(&command_buffer, 0x0400);
+    oglhpp_command_buffer_replay(&command_buffer);
+    oglhpp_command_buffer_free(&command_buffer);
+    CHECK(clear_lookups == 2);
+    CHECK(clear_calls[0] == 2 && clear_calls[1] == 1 && clear_mask == 0x0400);
+    CHECK(oglhpp_find_proc("glClear") == (OGLHPP_PROC)other_stub_clear);
+
+    return failures;
+}
+"""
+
+# Checks the commands and enums the core profile removes in 3.2, which are left out when REMOVED
+# is defined and loaded otherwise. Returns the number of failed checks.
+PROFILE_DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#include <stdio.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static void stub_command(void) {
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    (void)name;
+    return stub_command;
+}
+
+int main(void) {
+    int failures = 0;
+
+    oglhpp_load_functions(stub_get_proc_address);
+
+    CHECK(oglhpp_find_proc("glClear") != NULL);
+
+#if defined(REMOVED)
+    CHECK(oglhpp_find_proc("glBegin") == NULL);
+    CHECK(oglhpp_find_proc("glVertex3fv") == NULL);
+#if defined(GL_CURRENT_BIT_COMPAT)
+    CHECK(!"GL_CURRENT_BIT_COMPAT is defined");
+#endif
+#else
+    CHECK(oglhpp_find_proc("glBegin") != NULL);
+    CHECK(oglhpp_find_proc("glVertex3fv") != NULL);
+    CHECK(GL_CURRENT_BIT_COMPAT == 0x0B00);
+#endif
+
+    return failures;
+}
+"""
+
+# Detects the extensions of a stub context, listed by glGetString, or one at a time by glGetStringi
+# when STRINGI is defined, then of another context listing fewer. Returns the number of failed checks.
+EXTENSIONS_DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static const char *extension_list = "GL_EXT_timer_query  GL_SYNTH_extension_1 GL_NOT_an_extension ";
+static const char *extension_names[] = {"GL_EXT_timer_query", "GL_SYNTH_extension_1", "GL_NOT_an_extension"};
+static int extension_count = 3;
+
+static const GLubyte *GLCALLCONV stub_get_string(GLenum name) {
+    return name == 0x1F03 ? (const GLubyte *)extension_list : NULL;
+}
+
+static const GLubyte *GLCALLCONV stub_get_stringi(GLenum name, GLuint index) {
+    return name == 0x1F03 && (int)index < extension_count ? (const GLubyte *)extension_names[index] : NULL;
+}
+
+static void GLCALLCONV stub_get_integerv(GLenum pname, GLint *data) {
+    if (pname == 0x821D) {
+        *data = extension_count;
+    }
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    if (strcmp(name, "glGetString") == 0) {
+        return (OGLHPP_PROC)stub_get_string;
+    }
+
+#if defined(STRINGI)
+    if (strcmp(name, "glGetStringi") == 0) {
+        return (OGLHPP_PROC)stub_get_stringi;
+    }
+
+    if (strcmp(name, "glGetIntegerv") == 0) {
+        return (OGLHPP_PROC)stub_get_integerv;
+    }
+#else
+    (void)stub_get_stringi;
+    (void)stub_get_integerv;
+#endif
+
+    return NULL;
+}
+
+int main(void) {
+    int failures = 0;
+
+    CHECK(!oglhpp_has_extension(OGLHPP_EXT_EXT_timer_query));
+
+    oglhpp_load_extensions(stub_get_proc_address);
+    CHECK(oglhpp_has_extension(OGLHPP_EXT_EXT_timer_query));
+    CHECK(oglhpp_has_extension(OGLHPP_EXT_SYNTH_extension_1));
+    CHECK(!oglhpp_has_extension(OGLHPP_EXT_SYNTH_extension_10));
+    CHECK(!oglhpp_has_extension(OGLHPP_EXT_SYNTH_extension_2));
+    CHECK(!oglhpp_has_extension(OGLHPP_EXT_ARB_vertex_buffer_object));
+
+    /* the extensions of the previous context are forgotten */
+    extension_list = "GL_SYNTH_extension_10";
+    extension_names[0] = "GL_SYNTH_extension_10";
+    extension_count = 1;
+
+    oglhpp_load_extensions(stub_get_proc_address);
+    CHECK(oglhpp_has_extension(OGLHPP_EXT_SYNTH_extension_10));
+    CHECK(!oglhpp_has_extension(OGLHPP_EXT_SYNTH_extension_1));
+    CHECK(!oglhpp_has_extension(OGLHPP_EXT_EXT_timer_query));
+
+    return failures;
+}
+"""
+
+# Looks up the names of values at both ends of the sorted table, of values with several names,
+# and of values without any. Returns the number of failed checks.
+ENUM_NAME_DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+#define CHECK_NAME(value, name) CHECK(oglhpp_enum_name(value) != NULL && strcmp(oglhpp_enum_name(value), name) == 0)
+
+int main(void) {
+    int failures = 0;
+
+    CHECK_NAME(0x0, "GL_FALSE");
+    CHECK_NAME(0x1, "GL_TRUE");
+    CHECK_NAME(0x0B71, "GL_DEPTH_TEST");
+    CHECK_NAME(0x1F03, "GL_EXTENSIONS");
+    CHECK_NAME(0xFFFFFFFFu, "GL_INVALID_INDEX");
+
+    /* the name without vendor suffix, from a version rather than an extension */
+    CHECK_NAME(0x8892, "GL_ARRAY_BUFFER");
+    CHECK_NAME(0x8D40, "GL_FRAMEBUFFER");
+    CHECK_NAME(0x9000, "GL_SYNTH_0");
+    CHECK_NAME(0x9027, "GL_SYNTH_39");
+
+    CHECK(oglhpp_enum_name(0x2) == NULL);
+    CHECK(oglhpp_enum_name(0x8FFF) == NULL);
+    CHECK(oglhpp_enum_name(0x9028) == NULL);
+    CHECK(oglhpp_enum_name(0x12345) == NULL);
+    CHECK(oglhpp_enum_name(0xFFFFFFFEu) == NULL);
+
+#if defined(CORE)
+    CHECK(oglhpp_enum_name(0x0B00) == NULL);
+#else
+    CHECK_NAME(0x0B00, "GL_CURRENT_BIT_COMPAT");
+#endif
+
+    return failures;
+}
+"""
+
+# Calls stub commands through the instrumentation shims, and checks the hooks and call counts they
+# maintain, or that none of it is declared without OGLHPP_INSTRUMENT. Returns the number of failed checks.
+INSTRUMENT_DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static char events[64];
+
+static void record(char event) {
+    size_t length = strlen(events);
+
+    if (length < sizeof(events) - 1) {
+        events[length] = event;
+    }
+}
+
+static void GLCALLCONV stub_clear(GLbitfield mask) {
+    (void)mask;
+    record('c');
+}
+
+static GLenum GLCALLCONV stub_get_error(void) {
+    record('e');
+    return 0x0500;
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    if (strcmp(name, "glClear") == 0) {
+        return (OGLHPP_PROC)stub_clear;
+    }
+
+    if (strcmp(name, "glGetError") == 0) {
+        return (OGLHPP_PROC)stub_get_error;
+    }
+
+    return NULL;
+}
+
+#if defined(OGLHPP_INSTRUMENT)
+static unsigned int clear_command;
+
+static void before_hook(unsigned int command) {
+    record(command == clear_command ? 'C' : 'B');
+}
+
+static void after_hook(unsigned int command) {
+    record(command == clear_command ? 'c' : 'a');
+}
+#endif
+
+int main(void) {
+    int failures = 0;
+
+    oglhpp_load_functions(stub_get_proc_address);
+
+#if defined(OGLHPP_INSTRUMENT)
+    {
+        unsigned int get_error_command = OGLHPP_COMMAND_COUNT;
+        unsigned int i;
+
+        /* commands are numbered in generated order */
+        CHECK(strcmp(oglhpp_command_name(0), "glClear") == 0);
+        CHECK(oglhpp_command_name(OGLHPP_COMMAND_COUNT) == NULL);
+        CHECK(oglhpp_call_count(OGLHPP_COMMAND_COUNT) == 0);
+
+        for (i = 0; i < OGLHPP_COMMAND_COUNT; i++) {
+            if (strcmp(oglhpp_command_name(i), "glGetError") == 0) {
+                get_error_command = i;
+            }
+        }
+        CHECK(get_error_command < OGLHPP_COMMAND_COUNT);
+
+        oglhpp_set_instrument_hooks(before_hook, after_hook);
+        glClear(0x4000);
+        CHECK(glGetError() == 0x0500);
+        glClear(0x4000);
+        CHECK(strcmp(events, "CccBeaCcc") == 0);
+
+        CHECK(oglhpp_call_count(clear_command) == 2);
+        CHECK(oglhpp_call_count(get_error_command) == 1);
+        for (i = 0; i < OGLHPP_COMMAND_COUNT; i++) {
+            if (i != clear_command && i != get_error_command) {
+                CHECK(oglhpp_call_count(i) == 0);
+            }
+        }
+
+        /* calls are still counted without hooks */
+        oglhpp_set_instrument_hooks(NULL, NULL);
+        glClear(0x4000);
+        CHECK(strcmp(events, "CccBeaCccc") == 0);
+        CHECK(oglhpp_call_count(clear_command) == 3);
+
+        oglhpp_stats_reset();
+        CHECK(oglhpp_call_count(clear_command) == 0);
+        CHECK(oglhpp_call_count(get_error_command) == 0);
+        oglhpp_stats_dump();
+    }
+#else
+#if defined(OGLHPP_COMMAND_COUNT)
+    CHECK(!"OGLHPP_COMMAND_COUNT is defined");
+#endif
+    glClear(0x4000);
+    CHECK(glGetError() == 0x0500);
+    CHECK(strcmp(events, "ce") == 0);
+#endif
+
+    return failures;
+}
+"""
+
+# Loads two contexts with getProcAddresses returning different stubs, and checks that calls go to
+# the context current on the calling thread, or to the one named when NO_CURRENT_CONTEXT is
+# defined. Returns the number of failed checks.
+CONTEXT_DRIVER_SOURCE = """
+#define _POSIX_C_SOURCE 200112L
+#include <oglhpp/gl.h>
+#include <pthread.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static int clear_calls[2];
+
+static void stub_command(void) {
+}
+
+static void GLCALLCONV first_stub_clear(GLbitfield mask) {
+    (void)mask;
+    clear_calls[0]++;
+}
+
+static void GLCALLCONV second_stub_clear(GLbitfield mask) {
+    (void)mask;
+    clear_calls[1]++;
+}
+
+static OGLHPP_PROC first_stub_get_proc_address(const char *name) {
+    return strcmp(name, "glClear") == 0 ? (OGLHPP_PROC)first_stub_clear : stub_command;
+}
+
+static OGLHPP_PROC second_stub_get_proc_address(const char *name) {
+    return strcmp(name, "glClear") == 0 ? (OGLHPP_PROC)second_stub_clear : stub_command;
+}
+
+static struct oglhpp_context first_context;
+static struct oglhpp_context second_context;
+
+#if !defined(OGLHPP_NO_CURRENT_CONTEXT)
+static void *render(void *context) {
+    oglhpp_make_current((struct oglhpp_context *)context);
+    glClear(0x4000);
+    return oglhpp_current_context;
+}
+#endif
+
+int main(void) {
+    int failures = 0;
+
+    oglhpp_load_context(&first_context, first_stub_get_proc_address);
+    oglhpp_load_context(&second_context, second_stub_get_proc_address);
+
+    CHECK(oglhpp_find_context_proc(&first_context, "glClear") == (OGLHPP_PROC)first_stub_clear);
+    CHECK(oglhpp_find_context_proc(&second_context, "glClear") == (OGLHPP_PROC)second_stub_clear);
+    CHECK(oglhpp_find_context_proc(&second_context, "glBegin") == stub_command);
+    CHECK(oglhpp_find_context_proc(&second_context, "glNotACommand") == NULL);
+
+#if defined(OGLHPP_NO_CURRENT_CONTEXT)
+    first_context.glClear(0x4000);
+    second_context.glClear(0x4000);
+    second_context.glClear(0x4000);
+    CHECK(clear_calls[0] == 1 && clear_calls[1] == 2);
+#else
+    {
+        pthread_t thread;
+        void *thread_context = NULL;
+
+        oglhpp_make_current(&first_context);
+        glClear(0x4000);
+        CHECK(clear_calls[0] == 1 && clear_calls[1] == 0);
+        CHECK(oglhpp_find_proc("glClear") == (OGLHPP_PROC)first_stub_clear);
+
+        oglhpp_make_current(&second_context);
+        glClear(0x4000);
+        CHECK(clear_calls[0] == 1 && clear_calls[1] == 1);
+        CHECK(oglhpp_find_proc("glClear") == (OGLHPP_PROC)second_stub_clear);
+
+        /* the context made current on another thread is not current on this one */
+        oglhpp_make_current(&first_context);
+        CHECK(pthread_create(&thread, NULL, render, &second_context) == 0);
+        CHECK(pthread_join(thread, &thread_context) == 0);
+        CHECK(thread_context == &second_context);
+        CHECK(clear_calls[0] == 1 && clear_calls[1] == 2);
+
+        glClear(0x4000);
+        CHECK(oglhpp_current_context == &first_context);
+        CHECK(clear_calls[0] == 2 && clear_calls[1] == 2);
+    }
+#endif
+
+    return failures;
+}
+"""
+
+
+@pytest.fixture(scope="module")
+def registry(gl_xml_file_path):
+    return StreamingRegistryFactory().create_registry(gl_xml_file_path)
+
+
+@requires_cc
+@pytest.mark.parametrize("loader", LOADERS)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_loaders(registry, tmp_path, loader, layout):
+    if loader == "context" and layout == "split":
+        pytest.skip("the split layout is not available with the context loader")
+
+    output_dir = str(tmp_path)
+    C_Generator(registry, loader=loader, extensions=["GL_*"], layout=layout,
+                command_buffer=True).write_files("gl", "4.6", output_dir)
+
+    assert build_and_run(output_dir, DRIVER_SOURCE, ["-DLAZY"] if loader == "lazy" else []) == 0
+
+
+# The commands a later feature requires again, like glGetPointerv in 1.1 and 4.3, are only
+# declared and defined once.
+@requires_cc
+@pytest.mark.parametrize("loader", LOADERS)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_commands_required_again_are_defined_once(gl_xml_file_path, tmp_path, loader, layout):
+    if loader == "context" and layout == "split":
+        pytest.skip("the split layout is not available with the context loader")
+
+    with open(gl_xml_file_path) as file:
+        xml = file.read()
+
+    xml_file_path = str(tmp_path / "gl.xml")
+    with open(xml_file_path, "w") as file:
+        file.write(xml.replace('<command name="glDebugMessageCallback"/>',
+                               '<command name="glDebugMessageCallback"/>\n'
+                               '            <command name="glGetString"/>\n'
+                               '            <command name="glClear"/>'))
+
+    output_dir = str(tmp_path / "output")
+    registry = StreamingRegistryFactory().create_registry(xml_file_path)
+    C_Generator(registry, loader=loader, extensions=["GL_*"], layout=layout,
+                command_buffer=True).write_files("gl", "4.6", output_dir)
+
+    assert build_and_run(output_dir, DRIVER_SOURCE, ["-DLAZY"] if loader == "lazy" else []) == 0
+
+
+@requires_cc
+@pytest.mark.parametrize("loader", LOADERS)
+@pytest.mark.parametrize("query", ["glGetString", "glGetStringi"])
+def test_extensions_are_detected(registry, tmp_path, loader, query):
+    output_dir = str(tmp_path)
+    C_Generator(registry, loader=loader, extensions=["GL_*"]).write_files("gl", "4.6", output_dir)
+
+    assert build_and_run(output_dir, EXTENSIONS_DRIVER_SOURCE, ["-DSTRINGI"] if query == "glGetStringi" else []) == 0
+
+
+@requires_cc
+@pytest.mark.parametrize("profile", PROFILES)
+def test_enum_names(registry, tmp_path, profile):
+    output_dir = str(tmp_path)
+    C_Generator(registry, extensions=["GL_*"], profile=profile).write_files("gl", "4.6", output_dir)
+
+    assert build_and_run(output_dir, ENUM_NAME_DRIVER_SOURCE, ["-DCORE"] if profile == "core" else []) == 0
+
+
+# The core profile only leaves out what 3.2 removes, from 3.2 on.
+@requires_cc
+@pytest.mark.parametrize("loader", LOADERS)
+@pytest.mark.parametrize("profile", PROFILES)
+@pytest.mark.parametrize("number", ["3.1", "4.6"])
+def test_profile_removals(registry, tmp_path, loader, profile, number):
+    output_dir = str(tmp_path)
+    C_Generator(registry, loader=loader, profile=profile).write_files("gl", number, output_dir)
+    defines = ["-DREMOVED"] if profile == "core" and number != "3.1" else []
+
+    assert build_and_run(output_dir, PROFILE_DRIVER_SOURCE, defines) == 0
+
+
+@requires_cc
+@pytest.mark.parametrize("loader", LOADERS)
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("instrument", [False, True])
+def test_instrumentation(registry, tmp_path, loader, layout, instrument):
+    if loader == "context" and layout == "split":
+        pytest.skip("the split layout is not available with the context loader")
+
+    output_dir = str(tmp_path)
+    C_Generator(registry, loader=loader, extensions=["GL_*"], layout=layout).write_files("gl", "4.6", output_dir)
+
+    assert build_and_run(output_dir, INSTRUMENT_DRIVER_SOURCE, ["-DOGLHPP_INSTRUMENT"] if instrument else []) == 0
+
+
+@requires_cc
+@pytest.mark.parametrize("current_context", [True, False])
+def test_contexts(registry, tmp_path, current_context):
+    output_dir = str(tmp_path)
+    C_Generator(registry, loader="context", extensions=["GL_*"]).write_files("gl", "4.6", output_dir)
+    defines = [] if current_context else ["-DOGLHPP_NO_CURRENT_CONTEXT"]
+
+    assert build_and_run(output_dir, CONTEXT_DRIVER_SOURCE, ["-pthread"] + defines) == 0
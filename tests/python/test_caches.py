@@ -0,0 +1,188 @@
+import os
+import shutil
+
+import pytest
+
+from oglhppgen import generation_cache as generation_cache_module
+from oglhppgen import model
+from oglhppgen.c_generator import C_Generator
+from oglhppgen.frontend import RegistryFrontend
+from oglhppgen.generation_cache import GenerationCache
+from oglhppgen.registry_cache import RegistryCache, hash_file
+from oglhppgen.streaming import StreamingRegistryFactory
+
+from model_compare import assert_same
+
+
+def copy_registry(gl_xml_file_path, tmp_path):
+    copy_path = str(tmp_path / "gl.xml")
+    shutil.copyfile(gl_xml_file_path, copy_path)
+
+    return copy_path
+
+
+def test_registry_cache_hit(gl_xml_file_path, tmp_path):
+    gl_xml_file_path = copy_registry(gl_xml_file_path, tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    first_cache = RegistryCache(cache_dir)
+    registry = first_cache.load_registry(gl_xml_file_path)
+    repository = first_cache.load_repository(gl_xml_file_path)
+    assert (first_cache.hits, first_cache.misses) == (0, 2)
+
+    second_cache = RegistryCache(cache_dir)
+    assert_same(registry, second_cache.load_registry(gl_xml_file_path))
+    assert_same(repository.commands, second_cache.load_repository(gl_xml_file_path).commands)
+    assert (second_cache.hits, second_cache.misses) == (2, 0)
+
+
+def test_registry_cache_loads_both_models_from_one_parse(gl_xml_file_path, tmp_path):
+    gl_xml_file_path = copy_registry(gl_xml_file_path, tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    class CountingFrontend(RegistryFrontend):
+        parses = 0
+
+        def parse(self, source):
+            CountingFrontend.parses += 1
+            return super().parse(source)
+
+    first_cache = RegistryCache(cache_dir)
+    registry, repository = first_cache.load_models(gl_xml_file_path, CountingFrontend())
+    assert CountingFrontend.parses == 1
+    assert (first_cache.hits, first_cache.misses) == (0, 2)
+
+    # the entries are the ones of load_registry and load_repository
+    second_cache = RegistryCache(cache_dir)
+    assert_same(registry, second_cache.load_registry(gl_xml_file_path))
+    assert_same(repository.commands, second_cache.load_repository(gl_xml_file_path).commands)
+    assert (second_cache.hits, second_cache.misses) == (2, 0)
+
+    # a single missing model is built alone
+    for entry_name in os.listdir(cache_dir):
+        if entry_name.startswith("repository-"):
+            os.remove(os.path.join(cache_dir, entry_name))
+
+    third_cache = RegistryCache(cache_dir)
+    third_registry, third_repository = third_cache.load_models(gl_xml_file_path, CountingFrontend())
+    assert CountingFrontend.parses == 1
+    assert (third_cache.hits, third_cache.misses) == (1, 1)
+    assert_same(repository.commands, third_repository.commands)
+
+
+def test_registry_cache_invalidation(gl_xml_file_path, tmp_path, monkeypatch):
+    gl_xml_file_path = copy_registry(gl_xml_file_path, tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    RegistryCache(cache_dir).load_registry(gl_xml_file_path)
+
+    # a changed registry file misses, and evicts the entry of its previous contents
+    with open(gl_xml_file_path, "a") as file:
+        file.write("<!-- changed -->\n")
+
+    registry_cache = RegistryCache(cache_dir)
+    registry_cache.load_registry(gl_xml_file_path)
+    assert registry_cache.misses == 1
+    assert len(os.listdir(cache_dir)) == 1
+
+    # so does a new parser version
+    monkeypatch.setattr(model, "PARSER_VERSION", model.PARSER_VERSION + 1)
+    registry_cache = RegistryCache(cache_dir)
+    registry_cache.load_registry(gl_xml_file_path)
+    assert registry_cache.misses == 1
+
+
+def test_registry_cache_rebuilds_corrupt_entries(gl_xml_file_path, tmp_path):
+    gl_xml_file_path = copy_registry(gl_xml_file_path, tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    RegistryCache(cache_dir).load_registry(gl_xml_file_path)
+    for entry_name in os.listdir(cache_dir):
+        with open(os.path.join(cache_dir, entry_name), "wb") as file:
+            file.write(b"corrupt")
+
+    registry_cache = RegistryCache(cache_dir)
+    assert len(registry_cache.load_registry(gl_xml_file_path).command_list) > 0
+    assert registry_cache.misses == 1
+
+
+def test_generation_cache_keys(tmp_path):
+    generation_cache = GenerationCache(str(tmp_path))
+    key = generation_cache.key("registry", "c", 1, ("gl", "3.3"), {"loader": "eager", "layout": "single"})
+
+    assert key == generation_cache.key("registry", "c", 1, ("gl", "3.3"), {"layout": "single", "loader": "eager"})
+    assert key != generation_cache.key("other registry", "c", 1, ("gl", "3.3"), {"loader": "eager", "layout": "single"})
+    assert key != generation_cache.key("registry", "hpp", 1, ("gl", "3.3"), {"loader": "eager", "layout": "single"})
+    assert key != generation_cache.key("registry", "c", 2, ("gl", "3.3"), {"loader": "eager", "layout": "single"})
+    assert key != generation_cache.key("registry", "c", 1, ("gl", "4.6"), {"loader": "eager", "layout": "single"})
+    assert key != generation_cache.key("registry", "c", 1, ("gl", "3.3"), {"loader": "lazy", "layout": "single"})
+
+
+def test_generation_cache_key_covers_generator_sources(tmp_path, monkeypatch):
+    source_path = tmp_path / "c_generator.py"
+    source_path.write_text("GENERATOR_VERSION = 1\n")
+    monkeypatch.setattr(generation_cache_module, "generator_sources", lambda: [str(source_path)])
+
+    key = GenerationCache(str(tmp_path)).key("registry", "c", 1, ("gl", "3.3"))
+
+    # an edit without a version bump
+    source_path.write_text("GENERATOR_VERSION = 1\n# edited\n")
+
+    assert key != GenerationCache(str(tmp_path)).key("registry", "c", 1, ("gl", "3.3"))
+
+
+def test_generation_cache_lookup(tmp_path):
+    generation_cache = GenerationCache(str(tmp_path / "generated"))
+    key = generation_cache.key(hash_file(__file__), "c", 1, ("gl", "3.3"))
+
+    assert generation_cache.lookup(key) is None
+
+    outputs = {"include/oglhpp/gl.h": "int a;\n", "src/gl.c": "int b = 0;\n"}
+    generation_cache.store(key, outputs)
+
+    assert generation_cache.lookup(key) == outputs
+    assert (generation_cache.hits, generation_cache.misses) == (1, 1)
+
+
+def test_generation_cache_eviction(tmp_path):
+    generation_cache = GenerationCache(str(tmp_path), max_bytes=4096)
+
+    keys = [generation_cache.key("registry", "c", 1, ("gl", str(i))) for i in range(8)]
+    for i, key in enumerate(keys):
+        # ages the entries stored before, the oldest is evicted first
+        for entry_name in os.listdir(str(tmp_path)):
+            entry_path = os.path.join(str(tmp_path), entry_name)
+            os.utime(entry_path, (0, os.stat(entry_path).st_mtime - 1))
+
+        generation_cache.store(key, {"src/gl.c": "x" * 1024})
+
+    assert generation_cache.lookup(keys[0]) is None
+    assert generation_cache.lookup(keys[-1]) is not None
+
+
+def test_generation_cache_entry_is_streamed(gl_xml_file_path, tmp_path):
+    registry = StreamingRegistryFactory().create_registry(gl_xml_file_path)
+    generator = C_Generator(registry, extensions=["GL_*"], layout="split")
+    generation_cache = GenerationCache(str(tmp_path / "generated"))
+    key = generation_cache.key("registry", "c", 1, ("gl", "4.6"))
+
+    with generation_cache.open_entry(key) as cache_entry:
+        writer = generator.write_files("gl", "4.6", str(tmp_path / "output"), cache_entry=cache_entry)
+
+    outputs = generator.generate("gl", "4.6")
+    assert generation_cache.lookup(key) == outputs
+    assert len(writer.changed_paths) == len(outputs)
+
+
+def test_failed_generation_cache_entry_is_not_stored(tmp_path):
+    generation_cache = GenerationCache(str(tmp_path))
+    key = generation_cache.key("registry", "c", 1, ("gl", "3.3"))
+
+    with pytest.raises(ValueError):
+        with generation_cache.open_entry(key) as cache_entry:
+            with cache_entry.open("src/gl.c") as file:
+                file.write("int a;\n")
+                raise ValueError()
+
+    assert generation_cache.lookup(key) is None
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,181 @@
+import os
+import os.path
+import shutil
+import subprocess
+
+import pytest
+
+from oglhppgen.c_generator import C_Generator
+from oglhppgen.streaming import StreamingRegistryFactory
+
+CC = os.environ.get("CC", "cc")
+
+KHRPLATFORM_INCLUDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test-dynamicLoading",
+                                       "include", "KHR")
+
+# glBindAttribLocation, for a string parameter, which the registry fixture has none of
+BIND_ATTRIB_LOCATION_COMMAND = """<command>
+            <proto>void <name>glBindAttribLocation</name></proto>
+            <param class="program"><ptype>GLuint</ptype> <name>program</name></param>
+            <param><ptype>GLuint</ptype> <name>index</name></param>
+            <param>const <ptype>GLchar</ptype> *<name>name</name></param>
+        </command>
+        <command>
+            <proto>void <name>glUseProgram</name></proto>"""
+
+# Records commands, overwrites the arrays and the string they were given, and replays them into
+# stub commands keeping a copy of the arguments they receive. Returns the number of failed checks.
+DRIVER_SOURCE = """
+#include <oglhpp/command_buffer.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static int calls;
+static int clear_call = -1;
+static GLbitfield clear_mask;
+static int uniform_call = -1;
+static GLint uniform_location;
+static GLsizei uniform_count;
+static GLfloat uniform_value[8];
+static int synth_call = -1;
+static GLenum synth_target;
+static const GLfloat *synth_v = (const GLfloat *)&synth_call;
+static GLsizei synth_count;
+static int buffer_data_calls;
+static GLsizeiptr buffer_data_size[2];
+static int buffer_data_null[2];
+static unsigned char buffer_data[4];
+static int bind_attrib_location_call = -1;
+static GLuint bind_attrib_location_index;
+static char bind_attrib_location_name[16];
+
+static void GLCALLCONV stub_clear(GLbitfield mask) {
+    clear_call = calls++;
+    clear_mask = mask;
+}
+
+static void GLCALLCONV stub_uniform4fv(GLint location, GLsizei count, const GLfloat *value) {
+    uniform_call = calls++;
+    uniform_location = location;
+    uniform_count = count;
+    memcpy(uniform_value, value, sizeof(uniform_value));
+}
+
+static void GLCALLCONV stub_synth0(GLenum target, const GLfloat *v, GLsizei count) {
+    synth_call = calls++;
+    synth_target = target;
+    synth_v = v;
+    synth_count = count;
+}
+
+static void GLCALLCONV stub_buffer_data(GLenum target, GLsizeiptr size, const void *data, GLenum usage) {
+    (void)target;
+    (void)usage;
+    calls++;
+    buffer_data_size[buffer_data_calls] = size;
+    buffer_data_null[buffer_data_calls] = data == NULL;
+    if (data != NULL) {
+        memcpy(buffer_data, data, sizeof(buffer_data));
+    }
+    buffer_data_calls++;
+}
+
+static void GLCALLCONV stub_bind_attrib_location(GLuint program, GLuint index, const GLchar *name) {
+    (void)program;
+    bind_attrib_location_call = calls++;
+    bind_attrib_location_index = index;
+    strncpy(bind_attrib_location_name, name, sizeof(bind_attrib_location_name) - 1);
+}
+
+int main(void) {
+    int failures = 0;
+    struct oglhpp_command_buffer command_buffer;
+    GLfloat value[8] = {1.0f, 2.0f, 3.0f, 4.0f, 5.0f, 6.0f, 7.0f, 8.0f};
+    unsigned char data[4] = {1, 2, 3, 4};
+    char name[16] = "position";
+
+    glClear = stub_clear;
+    glUniform4fv = stub_uniform4fv;
+    glSynth0 = stub_synth0;
+    glBufferData = stub_buffer_data;
+    glBindAttribLocation = stub_bind_attrib_location;
+
+    oglhpp_command_buffer_init(&command_buffer);
+    oglhpp_record_glClear(&command_buffer, 0x4100);
+    oglhpp_record_glUniform4fv(&command_buffer, 3, 2, value);
+    oglhpp_record_glSynth0(&command_buffer, 0x9000, NULL, 0);
+    oglhpp_record_glBufferData(&command_buffer, 0x8892, sizeof(data), data, 0x88E4);
+    oglhpp_record_glBufferData(&command_buffer, 0x8892, 64, NULL, 0x88E4);
+    oglhpp_record_glBindAttribLocation(&command_buffer, 1, 2, name);
+    CHECK(!command_buffer.failed);
+    CHECK(calls == 0);
+
+    /* the recorded commands keep copies of the arrays and strings */
+    memset(value, 0, sizeof(value));
+    memset(data, 0, sizeof(data));
+    strcpy(name, "normal");
+
+    oglhpp_command_buffer_replay(&command_buffer);
+    CHECK(calls == 6);
+
+    CHECK(clear_call == 0 && clear_mask == 0x4100);
+
+    CHECK(uniform_call == 1 && uniform_location == 3 && uniform_count == 2);
+    CHECK(uniform_value[0] == 1.0f && uniform_value[3] == 4.0f && uniform_value[7] == 8.0f);
+
+    CHECK(synth_call == 2 && synth_target == 0x9000 && synth_v == NULL && synth_count == 0);
+
+    CHECK(buffer_data_calls == 2);
+    CHECK(buffer_data_size[0] == 4 && !buffer_data_null[0]);
+    CHECK(buffer_data[0] == 1 && buffer_data[3] == 4);
+    CHECK(buffer_data_size[1] == 64 && buffer_data_null[1]);
+
+    CHECK(bind_attrib_location_call == 5 && bind_attrib_location_index == 2);
+    CHECK(strcmp(bind_attrib_location_name, "position") == 0);
+
+    /* the same commands are replayed again, until the buffer is reset */
+    oglhpp_command_buffer_replay(&command_buffer);
+    CHECK(calls == 12);
+
+    oglhpp_command_buffer_reset(&command_buffer);
+    oglhpp_command_buffer_replay(&command_buffer);
+    CHECK(calls == 12);
+
+    oglhpp_command_buffer_free(&command_buffer);
+
+    return failures;
+}
+"""
+
+
+@pytest.mark.skipif(shutil.which(CC) is None, reason=f"no C compiler {CC}")
+def test_recorded_commands_replay_their_arguments(gl_xml_file_path, tmp_path):
+    with open(gl_xml_file_path) as file:
+        xml = file.read()
+
+    xml_file_path = str(tmp_path / "gl.xml")
+    with open(xml_file_path, "w") as file:
+        xml = xml.replace("""<command>
+            <proto>void <name>glUseProgram</name></proto>""", BIND_ATTRIB_LOCATION_COMMAND)
+        file.write(xml.replace('<command name="glUseProgram"/>',
+                               '<command name="glUseProgram"/>\n            <command name="glBindAttribLocation"/>'))
+
+    output_dir = str(tmp_path / "output")
+    registry = StreamingRegistryFactory().create_registry(xml_file_path)
+    C_Generator(registry, command_buffer=True).write_files("gl", "4.6", output_dir)
+    shutil.copytree(KHRPLATFORM_INCLUDE_DIR, os.path.join(output_dir, "include", "KHR"))
+
+    driver_path = os.path.join(output_dir, "driver.c")
+    with open(driver_path, "w") as file:
+        file.write(DRIVER_SOURCE)
+
+    source_dir = os.path.join(output_dir, "src")
+    source_paths = [os.path.join(source_dir, filename) for filename in sorted(os.listdir(source_dir))]
+    executable_path = os.path.join(output_dir, "driver")
+    subprocess.run([CC, "-std=c99", "-pedantic", "-Wall", "-Wextra", "-Werror",
+                    "-I", os.path.join(output_dir, "include"), *source_paths, driver_path, "-o", executable_path],
+                   check=True)
+
+    assert subprocess.run([executable_path]).returncode == 0
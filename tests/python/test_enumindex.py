@@ -0,0 +1,125 @@
+import os
+import re
+import subprocess
+import sys
+import xml.dom.minidom
+
+from oglhpp.enumindex import EnumIndex
+from oglhpp.glregistry import Enum, EnumCollection, Repository, SinglePassGLXMLParser
+from oglhpp.hppgenerator import CodeGenerator
+
+
+def create_repository(enums, vendor=""):
+    return Repository(features=[], commands=[], enumscollections=[EnumCollection("GL", enums, "", "", vendor)])
+
+
+def names(enums):
+    return [enum.name for enum in enums]
+
+
+def test_aliases_of_a_value_are_deduplicated(gl_xml_file_path):
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+    enum_index = EnumIndex(repository)
+
+    assert names(repository.group_to_enums_dict["FramebufferTarget"]) == ["GL_FRAMEBUFFER", "GL_FRAMEBUFFER_EXT", "GL_FRAMEBUFFER_OES"]
+    assert names(enum_index.group_enums("FramebufferTarget")) == ["GL_FRAMEBUFFER"]
+    assert names(enum_index.group_enums("BufferTargetARB")) == ["GL_ARRAY_BUFFER"]
+
+
+def test_vendor_preference():
+    enum_index = EnumIndex(create_repository([
+        Enum("GL_FOO_NV", "0x10", ["Group"]),
+        Enum("GL_FOO_ARB", "0x10", ["Group"]),
+        Enum("GL_BAR_NV", "0x20", ["Group"]),
+        Enum("GL_BAR_EXT", "0x20", ["Group"]),
+        Enum("GL_BAR", "0x20", ["Group"]),
+        Enum("GL_BAZ_NV", "0x30", ["Group"]),
+        Enum("GL_BAZ_AMD", "0x30", ["Group"]),
+    ], vendor="NV"))
+
+    # AMD is not the vendor of any enum collection, so it is not known as a vendor suffix
+    assert names(enum_index.group_enums("Group")) == ["GL_FOO_ARB", "GL_BAR", "GL_BAZ_AMD"]
+
+
+def test_declaration_order_and_groups_are_kept():
+    enum_index = EnumIndex(create_repository([
+        Enum("GL_C", "0x3", ["First"]),
+        Enum("GL_A", "0x1", ["First", "Second"]),
+        Enum("GL_A_EXT", "0x1", ["Second"]),
+        Enum("GL_B", "0x2", ["Second"]),
+    ]))
+
+    assert names(enum_index.group_enums("First")) == ["GL_C", "GL_A"]
+    assert names(enum_index.group_enums("Second")) == ["GL_A", "GL_B"]
+    assert enum_index.group_enums("Missing") == []
+
+
+def test_unparsed_values_are_never_merged():
+    enum_index = EnumIndex(create_repository([
+        Enum("GL_INVALID_INDEX", "0xFFFFFFFFu", ["Group"]),
+        Enum("GL_OTHER_INVALID_INDEX", "0xFFFFFFFFu", ["Group"]),
+        Enum("GL_HUGE", "0x1FFFFFFFFFFFFFFFF", ["Group"]),
+    ]))
+
+    assert names(enum_index.group_enums("Group")) == ["GL_INVALID_INDEX", "GL_OTHER_INVALID_INDEX", "GL_HUGE"]
+
+
+def test_definitions_of_other_apis_are_left_out(gl_xml_file_path):
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+    enum_index = EnumIndex(repository)
+
+    def active_program_values(api):
+        return [enum.value for enum in enum_index.group_enums("SynthGroup0", api) if enum.name == "GL_ACTIVE_PROGRAM_EXT"]
+
+    assert active_program_values("gl") == ["0x8B8D"]
+    assert active_program_values("gles2") == ["0x8259"]
+    assert active_program_values(None) == ["0x8259", "0x8B8D"]
+
+
+def test_enum_class_identifiers_are_unique(gl_xml_file_path):
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+    generated_code = CodeGenerator(repository, api="gl").generate_consolidated_require(repository.consolidate("gl", "4.6"))
+
+    enum_classes = re.findall(r"enum class (\w+) : \w+ \{(.*?)\};", generated_code, re.DOTALL)
+    assert len(enum_classes) > 0
+
+    for enum_class_name, body in enum_classes:
+        identifiers = re.findall(r"(\w+) = ", body)
+        assert len(identifiers) == len(set(identifiers)), enum_class_name
+
+    framebuffer_target = dict(enum_classes)["FramebufferTarget"]
+    assert re.findall(r"(\w+) = ", framebuffer_target) == ["eFramebuffer"]
+
+
+def test_colliding_identifiers_fall_back_to_the_full_name():
+    enums = [
+        Enum("GL_TEXTURE_2D", "0x1", ["TextureTarget"]),
+        Enum("GL_TARGET_2D", "0x2", ["TextureTarget"]),
+        Enum("GL_2D", "0x3", ["TextureTarget"]),
+    ]
+    generated_enum = CodeGenerator(create_repository(enums)).generate_cpp_enum("TextureTarget", enums)
+
+    # the full name of GL_2D collides as well, it is left out
+    assert re.findall(r"(\w+) = ", generated_enum) == ["e2D", "eTarget2D"]
+
+
+# The groups and the commands come from sets, whose iteration order changes with PYTHONHASHSEED.
+GENERATE_SOURCE = """
+import sys
+import xml.dom.minidom
+from oglhpp.glregistry import SinglePassGLXMLParser
+from oglhpp.hppgenerator import CodeGenerator
+
+repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(sys.argv[1]))
+sys.stdout.write(CodeGenerator(repository, state_cache=True, api="gl").generate_consolidated_require(repository.consolidate("gl", "4.6")))
+"""
+
+
+def test_generated_code_does_not_depend_on_the_hash_seed(gl_xml_file_path):
+    root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+    def generate(hash_seed):
+        return subprocess.run([sys.executable, "-c", GENERATE_SOURCE, gl_xml_file_path], cwd=root_dir, check=True,
+                              capture_output=True, text=True, env={**os.environ, "PYTHONHASHSEED": hash_seed}).stdout
+
+    assert generate("1") == generate("2") == generate("3")
@@ -0,0 +1,80 @@
+import os
+import stat
+
+import pytest
+
+from oglhppgen.output import OutputWriter, current_umask, write_depfile
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_unchanged_file_is_not_rewritten(tmp_path):
+    path = str(tmp_path / "include" / "gl.h")
+
+    OutputWriter().write(path, "int a;\n")
+    os.utime(path, ns=(1000000000, 1000000000))
+
+    writer = OutputWriter()
+    writer.write(path, "int a;\n")
+
+    assert writer.unchanged_paths == [path]
+    assert writer.changed_paths == []
+    assert os.stat(path).st_mtime_ns == 1000000000
+    assert os.listdir(tmp_path / "include") == ["gl.h"]
+
+
+def test_changed_file_is_replaced(tmp_path):
+    path = str(tmp_path / "gl.h")
+
+    OutputWriter().write(path, "int a;\n")
+
+    writer = OutputWriter()
+    with writer.open(path) as file:
+        file.write("int ")
+        file.write("b;\n")
+
+    assert writer.changed_paths == [path]
+    assert open(path).read() == "int b;\n"
+    assert os.listdir(tmp_path) == ["gl.h"]
+
+
+def test_new_file_gets_the_mode_of_open(tmp_path):
+    path = str(tmp_path / "gl.h")
+
+    OutputWriter().write(path, "int a;\n")
+
+    assert file_mode(path) == 0o666 & ~current_umask()
+
+
+def test_replaced_file_keeps_its_mode(tmp_path):
+    path = str(tmp_path / "gl.h")
+
+    OutputWriter().write(path, "int a;\n")
+    os.chmod(path, 0o640)
+    OutputWriter().write(path, "int b;\n")
+
+    assert file_mode(path) == 0o640
+
+
+def test_failed_write_leaves_the_target(tmp_path):
+    path = str(tmp_path / "gl.h")
+    OutputWriter().write(path, "int a;\n")
+
+    with pytest.raises(ValueError):
+        with OutputWriter().open(path) as file:
+            file.write("int b;\n")
+            raise ValueError()
+
+    assert open(path).read() == "int a;\n"
+    assert os.listdir(tmp_path) == ["gl.h"]
+
+
+def test_depfile(tmp_path):
+    path = str(tmp_path / "gl.d")
+
+    write_depfile(path, ["out/gl.h"], ["gl xml/gl.xml", "main.py"])
+
+    assert open(path).read() == "out/gl.h: \\\n  gl\\ xml/gl.xml \\\n  main.py\n"
+    assert file_mode(path) == 0o666 & ~current_umask()
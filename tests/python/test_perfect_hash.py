@@ -0,0 +1,144 @@
+import os.path
+import re
+
+import pytest
+
+from oglhppgen.c_generator import C_Generator, LAYOUTS, LOADERS, PROFILES
+from oglhppgen.perfect_hash import create_perfect_hash, fnv1a, mix
+from oglhppgen.streaming import StreamingRegistryFactory
+
+from c_build import build_and_run, requires_cc
+
+SET_SIZES = list(range(1, 130)) + [256, 512, 1024]
+
+
+@pytest.mark.parametrize("pattern", ["glFunc{}", "GL_EXT_ext{}", "{}"])
+def test_perfect_hash_over_set_sizes(pattern):
+    for size in SET_SIZES:
+        names = [pattern.format(i) for i in range(size)]
+        perfect_hash = create_perfect_hash(names)
+
+        for i, name in enumerate(names):
+            assert perfect_hash.lookup(name) == i
+
+        assert perfect_hash.lookup(pattern.format(size)) is None
+
+
+def test_empty_perfect_hash():
+    assert create_perfect_hash([]).lookup("glClear") is None
+
+
+def test_duplicate_names_raise():
+    with pytest.raises(Exception):
+        create_perfect_hash(["glClear", "glClear"])
+
+
+def test_hash_values():
+    # the generated C code computes the same values
+    assert fnv1a(b"") == 2166136261
+    assert fnv1a(b"a") == 0xE40C292C
+    assert mix(0) == 0
+    assert mix(1) == 0x514E28B7
+
+
+# the commands of gl 1.0 and every extension of the test registry, which the seeded FNV-1a failed on
+FIND_PROC_NAMES = ['glClear', 'glClearColor', 'glEnable', 'glDisable', 'glGetError', 'glGetString', 'glGetIntegerv',
+                   'glBegin', 'glEnd', 'glVertex3f', 'glVertex3fv', 'glClearDepth', 'glDepthRange', 'glSynth0',
+                   'glSynth1', 'glSynth2', 'glSynth3', 'glSynth4', 'glSynth5', 'glSynth6', 'glSynth7', 'glSynth8',
+                   'glSynth9', 'glSynth10', 'glSynth11', 'glSynth12', 'glSynth13', 'glSynth14', 'glSynth15',
+                   'glSynth16', 'glSynth17', 'glSynth18', 'glSynth19', 'glBindFramebufferEXT', 'glBindBuffer',
+                   'glGetUint64vEXT']
+
+
+def test_find_proc_command_set():
+    perfect_hash = create_perfect_hash(FIND_PROC_NAMES)
+
+    for i, name in enumerate(FIND_PROC_NAMES):
+        assert perfect_hash.lookup(name) == i
+
+
+@pytest.mark.parametrize("loader", LOADERS)
+@pytest.mark.parametrize("profile", PROFILES)
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("command_buffer", [False, True])
+def test_find_proc_with_every_extension(gl_xml_file_path, loader, profile, layout, command_buffer):
+    if loader == "context" and layout == "split":
+        pytest.skip("the split layout is not available with the context loader")
+
+    registry = StreamingRegistryFactory().create_registry(gl_xml_file_path)
+    generator = C_Generator(registry, loader=loader, extensions=["GL_*"], profile=profile, layout=layout,
+                            command_buffer=command_buffer)
+
+    for number in ["1.0", "4.6"]:
+        assert "oglhpp_find_proc_index" in generator.generate("gl", number)["src/gl.c"]
+
+
+# Looks every generated command up, and names close to them, which are not commands.
+FIND_PROC_DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#include <stdio.h>
+#include <string.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static const char *command_names[] = {COMMAND_NAMES};
+
+static const char *other_names[] = {"", "g", "gl", "glClear_", "glClea", "GLCLEAR", "glSynth57", "glBindFramebufferEXT_",
+                                    "GL_EXT_timer_query", "glClearglClear"};
+
+static void stub_command(void) {
+}
+
+static OGLHPP_PROC stub_get_proc_address(const char *name) {
+    /* no glGetString, the extensions are loaded whatever the context supports */
+    if (strncmp(name, "glGetString", 11) == 0) {
+        return NULL;
+    }
+
+    return stub_command;
+}
+
+int main(void) {
+    int failures = 0;
+    size_t i;
+
+    oglhpp_load_functions(stub_get_proc_address);
+    LOAD_EXTENSIONS
+
+    for (i = 0; i < sizeof(command_names) / sizeof(command_names[0]); i++) {
+        if (strncmp(command_names[i], "glGetString", 11) != 0) {
+            CHECK(oglhpp_find_proc(command_names[i]) != NULL);
+        }
+    }
+
+    for (i = 0; i < sizeof(other_names) / sizeof(other_names[0]); i++) {
+        CHECK(oglhpp_find_proc(other_names[i]) == NULL);
+    }
+
+    return failures;
+}
+"""
+
+
+@requires_cc
+@pytest.mark.parametrize("loader", LOADERS)
+def test_find_proc_at_run_time(gl_xml_file_path, tmp_path, loader):
+    registry = StreamingRegistryFactory().create_registry(gl_xml_file_path)
+    output_dir = str(tmp_path)
+    C_Generator(registry, loader=loader, extensions=["GL_*"]).write_files("gl", "4.6", output_dir)
+
+    with open(os.path.join(output_dir, "src", "gl.c")) as file:
+        proc_names = re.search(r"oglhpp_proc_names\[\] =(.*?);", file.read(), re.DOTALL).group(1)
+    command_names = re.findall(r'"(\w+)\\0"', proc_names)
+    assert len(command_names) > 60 and "glSynth56" in command_names and "glGetUint64vEXT" in command_names
+
+    # every extension loader, with the dispatch table made current by oglhpp_load_functions for the context loader
+    with open(os.path.join(output_dir, "include", "oglhpp", "gl.h")) as file:
+        extension_loaders = sorted(set(re.findall(r"\b(oglhpp_load_(?:context_)?GL_\w+)\(", file.read())))
+    context_argument = "oglhpp_current_context, " if loader == "context" else ""
+    load_extensions = "\n    ".join(f"{extension_loader}({context_argument}stub_get_proc_address);"
+                                     for extension_loader in extension_loaders)
+
+    driver_source = FIND_PROC_DRIVER_SOURCE.replace("COMMAND_NAMES", ", ".join(f'"{name}"' for name in command_names)) \
+        .replace("LOAD_EXTENSIONS", load_extensions)
+    assert build_and_run(output_dir, driver_source) == 0
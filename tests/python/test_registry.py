@@ -0,0 +1,123 @@
+import xml.dom.minidom
+
+from oglhpp.glregistry import Feature, GLXMLParser, Remove, Repository, Require, SinglePassGLXMLParser
+from oglhppgen.frontend import RegistryFrontend
+from oglhppgen.model import RegistryFactory
+from oglhppgen.streaming import StreamingRegistryFactory
+
+from model_compare import assert_same
+
+REPOSITORY_ATTRIBUTES = ["features", "commands", "enumscollections", "commanddict", "objectdict", "group_to_enums_dict"]
+
+
+def test_streaming_registry_matches_minidom(gl_xml_file_path):
+    minidom_registry = RegistryFactory().create_registry(xml.dom.minidom.parse(gl_xml_file_path).childNodes[0])
+    streaming_registry = StreamingRegistryFactory().create_registry(gl_xml_file_path)
+
+    assert len(streaming_registry.command_list) > 0
+    assert_same(minidom_registry, streaming_registry)
+
+
+def test_single_pass_repository_matches_minidom(gl_xml_file_path):
+    tree = xml.dom.minidom.parse(gl_xml_file_path)
+    repository = GLXMLParser().create_repository(tree)
+    single_pass_repository = SinglePassGLXMLParser().create_repository(tree)
+
+    for name in REPOSITORY_ATTRIBUTES:
+        assert_same(getattr(repository, name), getattr(single_pass_repository, name), name)
+
+
+def test_frontend_matches_minidom(gl_xml_file_path):
+    tree = xml.dom.minidom.parse(gl_xml_file_path)
+    registry = RegistryFactory().create_registry(tree.childNodes[0])
+    repository = GLXMLParser().create_repository(tree)
+
+    frontend_registry, frontend_repository = RegistryFrontend().parse(gl_xml_file_path)
+
+    assert_same(registry, frontend_registry)
+    for name in REPOSITORY_ATTRIBUTES:
+        assert_same(getattr(repository, name), getattr(frontend_repository, name), name)
+
+
+def test_uncompacted_models_match(gl_xml_file_path):
+    registry, repository = RegistryFrontend(compact=True).parse(gl_xml_file_path)
+    uncompacted_registry, uncompacted_repository = RegistryFrontend(compact=False).parse(gl_xml_file_path)
+
+    assert_same(registry, uncompacted_registry)
+    for name in REPOSITORY_ATTRIBUTES:
+        assert_same(getattr(repository, name), getattr(uncompacted_repository, name), name)
+
+
+def test_consolidate_matches_features(gl_xml_file_path):
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+
+    # without the availability index, the requires of every feature up to the version, less the removals
+    commands = set()
+    for feature in repository.features_per_api["gl"]:
+        for require in feature.require_list:
+            commands.update(require.commands)
+        for remove in feature.remove_list:
+            commands.difference_update(remove.commands)
+
+    assert repository.consolidate("gl", "4.6").commands == commands
+    assert "glBegin" in repository.consolidate("gl", "3.1").commands
+    assert "glBegin" not in repository.consolidate("gl", "3.2").commands
+
+
+VERSIONS = ["1.0", "1.1", "1.2", "1.3", "1.4", "1.5", "2.0", "2.1", "3.0", "3.1", "3.2", "3.3", "4.0", "4.1", "4.2", "4.3",
+            "4.4", "4.5", "4.6"]
+
+
+def test_consolidate_profiles(gl_xml_file_path):
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+
+    # glBegin is removed from the 3.2 core profile only
+    for version in ["3.1", "3.2", "4.6"]:
+        assert "glBegin" in repository.consolidate("gl", version, profile="compatibility").commands
+        assert "GL_CURRENT_BIT_COMPAT" in repository.consolidate("gl", version, profile="compatibility").enums
+
+    assert "glBegin" in repository.consolidate("gl", "3.1", profile="core").commands
+    assert "glBegin" not in repository.consolidate("gl", "3.2", profile="core").commands
+    assert "GL_CURRENT_BIT_COMPAT" not in repository.consolidate("gl", "4.6", profile="core").enums
+
+    # the commands of both profiles are the same, but for the removed ones
+    core = repository.consolidate("gl", "4.6", profile="core").commands
+    compatibility = repository.consolidate("gl", "4.6", profile="compatibility").commands
+    assert compatibility - core == {"glBegin", "glEnd", "glVertex3f", "glVertex3fv"}
+    assert core == repository.consolidate("gl", "4.6").commands
+
+
+def test_versions_exposing(gl_xml_file_path):
+    repository = SinglePassGLXMLParser().create_repository(xml.dom.minidom.parse(gl_xml_file_path))
+    availability = repository.availability
+
+    assert availability.versions_exposing("glBegin", "gl", profile="core") == VERSIONS[:VERSIONS.index("3.2")]
+    assert availability.versions_exposing("glBegin", "gl", profile="compatibility") == VERSIONS
+    assert availability.versions_exposing("glBegin", "gl") == VERSIONS[:VERSIONS.index("3.2")]
+    assert availability.versions_exposing("GL_CURRENT_BIT_COMPAT", "gl", profile="core") == VERSIONS[:VERSIONS.index("3.2")]
+    assert availability.versions_exposing("GL_CURRENT_BIT_COMPAT", "gl", profile="compatibility") == VERSIONS
+
+    assert availability.versions_exposing("glFenceSync", "gl") == VERSIONS[VERSIONS.index("3.2"):]
+    assert availability.versions_exposing("glMissing", "gl") == []
+    assert availability.versions_exposing("glClear", "vulkan") == []
+
+
+def test_two_digit_minor_versions():
+    def feature(number, commands):
+        return Feature("gl", f"GL_VERSION_{number.replace('.', '_')}", number, [Require(enums=[], commands=commands)], [])
+
+    remove = Remove("core")
+    remove.commands = ["glOld"]
+    features = [feature("1.10", ["glTen"]), feature("1.2", ["glTwo", "glOld"]), feature("1.9", ["glNine"])]
+    features[0].remove_list.append(remove)
+    repository = Repository(features=features, commands=[], enumscollections=[])
+
+    # 1.10 comes after 1.9, not between 1.1 and 1.2
+    assert repository.consolidate("gl", "1.9").commands == {"glTwo", "glOld", "glNine"}
+    assert repository.consolidate("gl", "1.10", profile="compatibility").commands == {"glTwo", "glOld", "glNine", "glTen"}
+    assert repository.consolidate("gl", "1.10", profile="core").commands == {"glTwo", "glNine", "glTen"}
+    assert repository.consolidate("gl", "1.1").commands == set()
+
+    assert repository.availability.versions_exposing("glTen", "gl") == ["1.10"]
+    assert repository.availability.versions_exposing("glTwo", "gl") == ["1.2", "1.9", "1.10"]
+    assert repository.availability.versions_exposing("glOld", "gl", profile="core") == ["1.2", "1.9"]
@@ -0,0 +1,172 @@
+import os
+import os.path
+import shutil
+import subprocess
+
+import pytest
+
+from oglhpp.hppgenerator import CodeGenerator
+from oglhppgen.c_generator import C_Generator
+from oglhppgen.frontend import RegistryFrontend
+
+CC = os.environ.get("CC", "cc")
+CXX = os.environ.get("CXX", "c++")
+
+KHRPLATFORM_INCLUDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test-dynamicLoading",
+                                       "include", "KHR")
+
+# Calls the wrapper of gl46.hpp with stub commands counting the calls they receive, and checks
+# which ones the state cache forwards. Returns the number of failed checks.
+DRIVER_SOURCE = """
+#include <oglhpp/gl.h>
+#define __glad_h_
+#include "gl46.hpp"
+#include <stdio.h>
+
+#define CHECK(condition) if (!(condition)) { fprintf(stderr, "failed: %s\\n", #condition); failures++; }
+
+static int bind_buffer_calls;
+static GLenum bound_buffer_target;
+static GLuint bound_buffer;
+static int bind_framebuffer_calls;
+static GLenum bound_framebuffer_target;
+static GLuint bound_framebuffer;
+static int bind_vertex_array_calls;
+static int enable_calls;
+static int disable_calls;
+
+static void GLCALLCONV stub_bind_buffer(GLenum target, GLuint buffer) {
+    bind_buffer_calls++;
+    bound_buffer_target = target;
+    bound_buffer = buffer;
+}
+
+static void GLCALLCONV stub_bind_framebuffer(GLenum target, GLuint framebuffer) {
+    bind_framebuffer_calls++;
+    bound_framebuffer_target = target;
+    bound_framebuffer = framebuffer;
+}
+
+static void GLCALLCONV stub_bind_vertex_array(GLuint array) {
+    (void)array;
+    bind_vertex_array_calls++;
+}
+
+static void GLCALLCONV stub_enable(GLenum cap) {
+    (void)cap;
+    enable_calls++;
+}
+
+static void GLCALLCONV stub_disable(GLenum cap) {
+    (void)cap;
+    disable_calls++;
+}
+
+int main() {
+    int failures = 0;
+
+    glBindBuffer = stub_bind_buffer;
+    glBindFramebuffer = stub_bind_framebuffer;
+    glBindVertexArray = stub_bind_vertex_array;
+    glEnable = stub_enable;
+    glDisable = stub_disable;
+
+    // the first call is forwarded, the same one again is not
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 1);
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 1);
+    CHECK(bind_buffer_calls == 1);
+    CHECK(bound_buffer_target == 0x8892 && bound_buffer == 1);
+    CHECK(gl::state::hits() == 1 && gl::state::misses() == 1);
+
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 2);
+    CHECK(bind_buffer_calls == 2 && bound_buffer == 2);
+
+    gl::enable(gl::EnableCap::eBlend);
+    gl::enable(gl::EnableCap::eBlend);
+    gl::enable(gl::EnableCap::eDepthTest);
+    gl::disable(gl::EnableCap::eBlend);
+    gl::disable(gl::EnableCap::eBlend);
+    CHECK(enable_calls == 2 && disable_calls == 1);
+
+    gl::state::resetCounters();
+    CHECK(gl::state::hits() == 0 && gl::state::misses() == 0);
+
+    // every value is forgotten
+    gl::state::invalidate();
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 2);
+    gl::disable(gl::EnableCap::eBlend);
+    CHECK(bind_buffer_calls == 3 && disable_calls == 2);
+    CHECK(gl::state::hits() == 0 && gl::state::misses() == 2);
+
+    // a key outside of the group is forwarded, and forgets the whole state
+    gl::bindBuffer(static_cast<gl::BufferTargetARB>(0x8893), 3);
+    CHECK(bind_buffer_calls == 4 && bound_buffer_target == 0x8893 && bound_buffer == 3);
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 2);
+    CHECK(bind_buffer_calls == 5);
+
+    // binding a vertex array forgets the buffer bindings, which belong to it
+    gl::bindVertexArray(1);
+    gl::bindVertexArray(1);
+    CHECK(bind_vertex_array_calls == 1);
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 2);
+    CHECK(bind_buffer_calls == 6);
+    gl::bindBuffer(gl::BufferTargetARB::eArray, 2);
+    CHECK(bind_buffer_calls == 6);
+
+    // a single framebuffer target is valid at once, as GL_FRAMEBUFFER sets both of the others
+    gl::bindFramebuffer(gl::FramebufferTarget::eDraw, 1);
+    gl::bindFramebuffer(gl::FramebufferTarget::eDraw, 1);
+    CHECK(bind_framebuffer_calls == 1);
+    gl::bindFramebuffer(gl::FramebufferTarget::eRead, 2);
+    gl::bindFramebuffer(gl::FramebufferTarget::eDraw, 1);
+    CHECK(bind_framebuffer_calls == 3);
+    CHECK(bound_framebuffer_target == 0x8CA9 && bound_framebuffer == 1);
+    gl::bindFramebuffer(gl::FramebufferTarget::eFramebuffer, 4);
+    gl::bindFramebuffer(gl::FramebufferTarget::eFramebuffer, 4);
+    gl::bindFramebuffer(gl::FramebufferTarget::eDraw, 1);
+    CHECK(bind_framebuffer_calls == 5);
+    CHECK(bound_framebuffer_target == 0x8CA9 && bound_framebuffer == 1);
+
+    return failures;
+}
+"""
+
+
+@pytest.mark.skipif(shutil.which(CC) is None or shutil.which(CXX) is None,
+                    reason=f"no C compiler {CC} or C++ compiler {CXX}")
+def test_state_cache_elides_calls(gl_xml_file_path, tmp_path):
+    # draw and read framebuffer targets, for the exclusive framebuffer bindings
+    with open(gl_xml_file_path) as file:
+        xml = file.read()
+
+    xml_file_path = str(tmp_path / "gl.xml")
+    with open(xml_file_path, "w") as file:
+        file.write(xml.replace('<enum value="0x8D40" name="GL_FRAMEBUFFER" group="FramebufferTarget"/>',
+                               '<enum value="0x8D40" name="GL_FRAMEBUFFER" group="FramebufferTarget"/>\n'
+                               '        <enum value="0x8CA8" name="GL_READ_FRAMEBUFFER" group="FramebufferTarget"/>\n'
+                               '        <enum value="0x8CA9" name="GL_DRAW_FRAMEBUFFER" group="FramebufferTarget"/>'))
+
+    registry, repository = RegistryFrontend().parse(xml_file_path)
+
+    output_dir = str(tmp_path / "output")
+    C_Generator(registry).write_files("gl", "4.6", output_dir)
+    shutil.copytree(KHRPLATFORM_INCLUDE_DIR, os.path.join(output_dir, "include", "KHR"))
+
+    with open(os.path.join(output_dir, "gl46.hpp"), "w") as file:
+        code_generator = CodeGenerator(repository, state_cache=True, api="gl")
+        file.write(code_generator.generate_consolidated_require(repository.consolidate("gl", "4.6")))
+
+    driver_path = os.path.join(output_dir, "driver.cpp")
+    with open(driver_path, "w") as file:
+        file.write(DRIVER_SOURCE)
+
+    include_dir = os.path.join(output_dir, "include")
+    object_path = os.path.join(output_dir, "gl.o")
+    executable_path = os.path.join(output_dir, "driver")
+    subprocess.run([CC, "-std=c99", "-I", include_dir, "-c", os.path.join(output_dir, "src", "gl.c"), "-o", object_path],
+                   check=True)
+    # glShaderSource has a parameter whose pointer indirection the parser gets wrong
+    subprocess.run([CXX, "-std=c++11", "-fpermissive", "-w", "-I", include_dir, "-I", output_dir, driver_path, object_path,
+                    "-o", executable_path], check=True)
+
+    assert subprocess.run([executable_path]).returncode == 0
@@ -0,0 +1,91 @@
+import os
+
+from oglhppgen import usage
+from oglhppgen.usage import UsageScanner, scan_file
+
+
+def write_source(file_path, source):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    with open(file_path, "w") as file:
+        file.write(source)
+
+
+def test_scan_file_names(tmp_path):
+    file_path = str(tmp_path / "draw.cpp")
+    write_source(file_path, """
+        gl::bindBuffer(gl::BufferTargetARB::eArray, buffer);
+        gl::drawArrays(mode, 0, count);
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT);
+        auto proc = glad_glClear;
+        int global_glow = GLOW;
+        gl::Enum value;
+    """)
+
+    # gl::BufferTargetARB and gl::Enum are types of the wrapper, not commands
+    assert scan_file(file_path) == {"glBindBuffer", "glDrawArrays", "glClear", "GL_COLOR_BUFFER_BIT", "GL_DEPTH_BUFFER_BIT"}
+
+
+def test_scan_source_dirs(tmp_path):
+    write_source(str(tmp_path / "src" / "main.c"), "glEnable(GL_BLEND);\n")
+    write_source(str(tmp_path / "src" / "render" / "draw.hpp"), "gl::useProgram(program);\n")
+    write_source(str(tmp_path / "src" / "notes.txt"), "glDisable(GL_BLEND);\n")
+    write_source(str(tmp_path / "src" / "generated" / "gl.h"), "glDisable(GL_DEPTH_TEST);\n")
+    write_source(str(tmp_path / "tools" / "tool.cc"), "glFinish();\n")
+
+    usage_scanner = UsageScanner()
+    used_names = usage_scanner.scan([str(tmp_path / "src"), str(tmp_path / "tools")],
+                                    exclude_dirs=[str(tmp_path / "src" / "generated")])
+
+    assert used_names == {"glEnable", "GL_BLEND", "glUseProgram", "glFinish"}
+    assert usage_scanner.source_paths == sorted([str(tmp_path / "src" / "main.c"),
+                                                 str(tmp_path / "src" / "render" / "draw.hpp"),
+                                                 str(tmp_path / "tools" / "tool.cc")])
+
+
+def test_scan_cache(tmp_path):
+    source_dir = str(tmp_path / "src")
+    cache_dir = str(tmp_path / "cache")
+    write_source(os.path.join(source_dir, "a.c"), "glEnable(GL_BLEND);\n")
+    write_source(os.path.join(source_dir, "b.c"), "glClear(GL_DEPTH_BUFFER_BIT);\n")
+    write_source(os.path.join(source_dir, "c.c"), "glFinish();\n")
+
+    first_scanner = UsageScanner(cache_dir)
+    first_scanner.scan([source_dir])
+    assert (first_scanner.hits, first_scanner.misses) == (0, 3)
+
+    second_scanner = UsageScanner(cache_dir)
+    assert second_scanner.scan([source_dir]) == {"glEnable", "GL_BLEND", "glClear", "GL_DEPTH_BUFFER_BIT", "glFinish"}
+    assert (second_scanner.hits, second_scanner.misses) == (3, 0)
+
+    # a file of another size, or of the same size with another modification time, is scanned again
+    write_source(os.path.join(source_dir, "a.c"), "glDisable(GL_BLEND);\n")
+    write_source(os.path.join(source_dir, "b.c"), "glClear(GL_STENCIL_BUFFER_BIT);\n")
+    stat = os.stat(os.path.join(source_dir, "b.c"))
+    os.utime(os.path.join(source_dir, "b.c"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    third_scanner = UsageScanner(cache_dir)
+    assert third_scanner.scan([source_dir]) == {"glDisable", "GL_BLEND", "glClear", "GL_STENCIL_BUFFER_BIT", "glFinish"}
+    assert (third_scanner.hits, third_scanner.misses) == (1, 2)
+
+    # the names of a deleted file are forgotten
+    os.remove(os.path.join(source_dir, "c.c"))
+
+    fourth_scanner = UsageScanner(cache_dir)
+    assert fourth_scanner.scan([source_dir]) == {"glDisable", "GL_BLEND", "glClear", "GL_STENCIL_BUFFER_BIT"}
+    assert (fourth_scanner.hits, fourth_scanner.misses) == (2, 0)
+
+    fifth_scanner = UsageScanner(cache_dir)
+    assert fifth_scanner.scan([source_dir]) == {"glDisable", "GL_BLEND", "glClear", "GL_STENCIL_BUFFER_BIT"}
+    assert fifth_scanner.source_paths == [os.path.join(source_dir, "a.c"), os.path.join(source_dir, "b.c")]
+
+
+def test_parallel_scan(tmp_path, monkeypatch):
+    source_dir = str(tmp_path / "src")
+    for i in range(8):
+        write_source(os.path.join(source_dir, f"{i}.c"), f"glSynth{i}();\n")
+
+    monkeypatch.setattr(usage, "MIN_PARALLEL_FILES", 4)
+    usage_scanner = UsageScanner(max_workers=2)
+
+    assert usage_scanner.scan([source_dir]) == {f"glSynth{i}" for i in range(8)}